@@ -0,0 +1,114 @@
+"""
+🧠 Completion analytics for the Habit Tracker.
+Vectorized mood / duration / "helped" statistics over the logged completion details.
+Everything works on one flat DataFrame built from data["completions"], so any window
+over years of logs is a handful of pandas operations instead of per-day loops.
+"""
+
+import numpy as np
+import pandas as pd
+
+from records import Mood
+
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+# ─────────────────────────────────────────────
+# Frame building
+# ─────────────────────────────────────────────
+def completions_frame(completions):
+    """Flatten {day: {habit_id: Completion}} into one typed DataFrame."""
+    days, hids, minutes, moods, helped, detailed = [], [], [], [], [], []
+    for day, day_comps in completions.items():
+        for hid, c in day_comps.items():
+            days.append(day)
+            hids.append(int(hid))
+            minutes.append(np.nan if c.minutes is None else c.minutes)
+            moods.append(int(c.mood))
+            helped.append(np.nan if c.helped is None else int(c.helped))
+            detailed.append(c.has_details())
+    return pd.DataFrame({
+        "date": pd.to_datetime(pd.Series(days, dtype="object")),
+        "habit_id": np.array(hids, dtype=np.int32),
+        "minutes": np.array(minutes, dtype=np.float32),
+        "mood": np.array(moods, dtype=np.int8),
+        "helped": np.array(helped, dtype=np.float32),
+        "detailed": np.array(detailed, dtype=bool),
+    })
+
+
+def window(frame, start, end):
+    """Rows with start <= date <= end (both datetime.date)."""
+    dates = frame["date"].values
+    mask = (dates >= np.datetime64(start, "ns")) & (dates <= np.datetime64(end, "ns"))
+    return frame[mask]
+
+
+# ─────────────────────────────────────────────
+# Statistics
+# ─────────────────────────────────────────────
+def mood_distribution(frame):
+    """Count of completions per mood (Mood.NONE excluded), for every mood level."""
+    moods = frame["mood"].to_numpy()
+    counts = np.bincount(moods, minlength=len(Mood))[1:]
+    return pd.Series(counts, index=[m.emoji for m in list(Mood)[1:]], name="count")
+
+
+def weekly_minutes(frame, start, end):
+    """Average logged minutes per week for each habit over the window."""
+    n_weeks = max(((end - start).days + 1) / 7, 1)
+    return (frame.groupby("habit_id")["minutes"].sum() / n_weeks).rename("minutes_per_week")
+
+
+def helped_divergence(frame):
+    """Per-habit "Yes, it helped" rate and its distance from the mean rate across habits."""
+    answered = frame.dropna(subset=["helped"])
+    if answered.empty:
+        return pd.DataFrame(columns=["helped_rate", "divergence", "answers"])
+    rates = answered.assign(yes=answered["helped"] > 0).groupby("habit_id").agg(
+        helped_rate=("yes", "mean"), answers=("yes", "size")
+    )
+    rates["helped_rate"] *= 100
+    rates["divergence"] = rates["helped_rate"] - rates["helped_rate"].mean()
+    return rates[["helped_rate", "divergence", "answers"]]
+
+
+def mood_completion_correlation(frame, habits, start, end):
+    """Pearson correlation between a day's mean mood and that day's completion rate."""
+    days = pd.date_range(start, end, freq="D")
+    if frame.empty or not habits:
+        return None
+
+    # Number of habits scheduled on each weekday of the window
+    scheduled_by_wd = np.zeros(7)
+    for h in habits:
+        for wd in h.get("target_days", []):
+            if wd in WEEKDAYS:
+                scheduled_by_wd[WEEKDAYS.index(wd)] += 1
+    scheduled = scheduled_by_wd[days.dayofweek]
+
+    done = frame.groupby("date").size().reindex(days, fill_value=0).to_numpy()
+    rated = frame[frame["mood"] > 0]
+    mood = rated.groupby("date")["mood"].mean().reindex(days).to_numpy()
+
+    valid = (scheduled > 0) & ~np.isnan(mood)
+    if valid.sum() < 3:
+        return None
+    rate = np.minimum(done[valid] / scheduled[valid], 1.0)
+    mood = mood[valid]
+    if rate.std() == 0 or mood.std() == 0:
+        return None
+    return float(np.corrcoef(mood, rate)[0, 1])
+
+
+def insights(completions, habits, start, end):
+    """All History insight tables for one window and set of habits, in a single pass over the data."""
+    frame = window(completions_frame(completions), start, end)
+    frame = frame[frame["habit_id"].isin([int(h["id"]) for h in habits])]
+    return {
+        "logged": int(frame["detailed"].sum()),
+        "mood_distribution": mood_distribution(frame),
+        "weekly_minutes": weekly_minutes(frame, start, end),
+        "helped": helped_divergence(frame),
+        "mood_correlation": mood_completion_correlation(frame, habits, start, end),
+    }
@@ -0,0 +1,227 @@
+"""
+🔌 Headless HTTP API for the Habit Tracker.
+A small Starlette service next to the Streamlit app, sharing its data layer (store.py)
+and MongoDB connection handling. Meant for phone shortcuts and scripts:
+
+    uvicorn api:app --host 127.0.0.1 --port 8600
+
+Endpoints:
+    GET  /health                         connection state
+    GET  /habits                         habits with current / longest streak and 7 / 30 day rates
+    GET  /habits/{habit_id}/stats        streaks and rate for ?days=N
+    POST /completions                    log or unlog one completion
+    POST /completions/bulk               {"events": [...]} up to MAX_BULK log / unlog ops per request
+    GET  /history                        NDJSON stream of completions, ?start=&end=&habit_id=
+
+The MongoDB URL comes from HABIT_MONGO_URL or .streamlit/secrets.toml; if HABIT_API_TOKEN
+is set, requests need an "Authorization: Bearer <token>" header.
+"""
+
+import json
+import os
+import tomllib
+from datetime import date, timedelta
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+from pymongo.errors import ConnectionFailure
+
+import events
+import milestones
+import stats
+import store
+import connection
+from connection import CircuitOpenError
+
+MAX_BULK = 1000
+HISTORY_BATCH = 1000
+
+
+# ─────────────────────────────────────────────
+# Config & connection
+# ─────────────────────────────────────────────
+def read_secrets():
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".streamlit", "secrets.toml")
+    if not os.path.exists(path):
+        return {}
+    with open(path, "rb") as f:
+        return tomllib.load(f)
+
+
+def mongo_url():
+    url = os.environ.get("HABIT_MONGO_URL")
+    if url:
+        return url
+    return read_secrets().get("connections", {}).get("mongo", {}).get("url")
+
+
+def mongo_settings():
+    """[connections.mongo] from the secrets file, with the URL resolved as in mongo_url()."""
+    return {**read_secrets().get("connections", {}).get("mongo", {}), "url": mongo_url()}
+
+
+_manager = None
+
+
+def get_manager():
+    global _manager
+    if _manager is None:
+        conf = mongo_settings()
+        if not conf["url"]:
+            raise RuntimeError("No MongoDB URL: set HABIT_MONGO_URL or connections.mongo.url in .streamlit/secrets.toml")
+        _manager = connection.from_settings(conf)
+    return _manager
+
+
+def get_db():
+    return get_manager().get()
+
+
+def get_read_db():
+    return get_manager().get_read()
+
+
+def error(status, message, **extra):
+    return JSONResponse({"error": message, **extra}, status_code=status)
+
+
+class TokenAuth(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        token = os.environ.get("HABIT_API_TOKEN")
+        if token and request.headers.get("authorization") != f"Bearer {token}":
+            return error(401, "missing or invalid bearer token")
+        return await call_next(request)
+
+
+async def db_unavailable(request, exc):
+    if not isinstance(exc, CircuitOpenError) and _manager is not None:
+        _manager.report_failure(exc)
+    return error(503, f"database unavailable: {exc}")
+
+
+# ─────────────────────────────────────────────
+# Handlers
+# ─────────────────────────────────────────────
+def health(request):
+    try:
+        status = get_manager().status()
+    except RuntimeError as e:
+        return error(503, str(e))
+    return JSONResponse({"status": "ok" if status["state"] == "closed" else "degraded", "db": status["state"]})
+
+
+def habit_stats(done, h, today, days=30):
+    return {
+        "current_streak": stats.current_streak(done, h["id"], today),
+        "longest_streak": stats.longest_streak(done, h["id"]),
+        "rate_7": round(stats.completion_rate(done, h["id"], 7, today), 1),
+        f"rate_{days}": round(stats.completion_rate(done, h["id"], days, today), 1),
+    }
+
+
+def list_habits(request):
+    db = get_read_db()
+    habits = store.load_habits(db)
+    done = store.load_done_index(db)
+    today = date.today()
+    return JSONResponse([
+        {k: h.get(k) for k in ("id", "name", "icon", "category", "target_days", "unit", "target", "target_op")}
+        | habit_stats(done, h, today)
+        for h in habits
+    ])
+
+
+def get_habit_stats(request):
+    db = get_read_db()
+    hid = request.path_params["habit_id"]
+    habit = next((h for h in store.load_habits(db) if h["id"] == hid), None)
+    if habit is None:
+        return error(404, f"unknown habit_id {hid}")
+    try:
+        days = max(1, min(int(request.query_params.get("days", 30)), 3660))
+    except ValueError:
+        return error(400, "days must be an integer")
+    done = store.load_done_index(db, [hid])
+    return JSONResponse({"id": hid, "name": habit["name"], **habit_stats(done, habit, date.today(), days)})
+
+
+def _apply(db, ops):
+    before, after, patches, errors = store.apply_completion_ops(db, ops)
+    ev = events.record(db, "api_bulk", before, after, patches, partial=True) if patches else None
+    earned = _achievements(db, patches) if patches else []
+    logged = sum(1 for p in patches if p["k"][0] == "completion" and p["a"] is not None)
+    unlogged = sum(1 for p in patches if p["k"][0] == "completion" and p["a"] is None)
+    return {"received": len(ops), "logged": logged, "unlogged": unlogged, "changed_rows": len(patches),
+            "event_seq": ev["seq"] if ev else None, "achievements": [a["_id"] for a in earned], "errors": errors}
+
+
+def _achievements(db, patches):
+    if not any(p["k"][0] == "completion" and p["a"] is not None for p in patches):
+        return []
+    try:
+        data = {"habits": store.load_habits(db), "completions": store.load_done_index(db)}
+        return milestones.on_write(db, data, patches)
+    except Exception:
+        # The completions are already written; achievements catch up on the next write
+        return []
+
+
+async def log_one(request):
+    try:
+        op = await request.json()
+    except json.JSONDecodeError:
+        return error(400, "body must be JSON")
+    if not isinstance(op, dict):
+        return error(400, "body must be a JSON object")
+    # Parsing is async; the pymongo work goes to the threadpool so it never blocks the event loop
+    return JSONResponse(await run_in_threadpool(lambda: _apply(get_db(), [op])))
+
+
+async def log_bulk(request):
+    try:
+        body = await request.json()
+    except json.JSONDecodeError:
+        return error(400, "body must be JSON")
+    ops = body.get("events") if isinstance(body, dict) else body
+    if not isinstance(ops, list) or not all(isinstance(op, dict) for op in ops):
+        return error(400, "expected {\"events\": [{...}, ...]}")
+    if len(ops) > MAX_BULK:
+        return error(413, f"at most {MAX_BULK} events per request", received=len(ops))
+    return JSONResponse(await run_in_threadpool(lambda: _apply(get_db(), ops)))
+
+
+def history(request):
+    q = request.query_params
+    try:
+        end = date.fromisoformat(q.get("end", str(date.today())))
+        start = date.fromisoformat(q.get("start", str(end - timedelta(days=30))))
+    except ValueError:
+        return error(400, "start / end must be YYYY-MM-DD")
+    query = {"date": {"$gte": str(start), "$lte": str(end)}}
+    if q.get("habit_id"):
+        query["habit_id"] = str(q["habit_id"])
+    cursor = get_read_db().completions.find(query, {"_id": 0}).sort("date", 1).batch_size(HISTORY_BATCH)
+
+    def rows():
+        for row in cursor:
+            yield json.dumps(row, default=str) + "\n"
+
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+
+app = Starlette(
+    routes=[
+        Route("/health", health),
+        Route("/habits", list_habits),
+        Route("/habits/{habit_id:int}/stats", get_habit_stats),
+        Route("/completions", log_one, methods=["POST"]),
+        Route("/completions/bulk", log_bulk, methods=["POST"]),
+        Route("/history", history),
+    ],
+    middleware=[Middleware(TokenAuth)],
+    exception_handlers={ConnectionFailure: db_unavailable},
+)
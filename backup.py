@@ -0,0 +1,367 @@
+"""
+💾 Streaming backup and point-in-time restore for the Habit Tracker.
+A full backup streams every data collection through a cursor into one compressed file
+each (JSON lines or raw BSON, gzip or zstd). An incremental backup stores only the
+change-log events (events.py) recorded since the previous backup, so it is as small as the
+edits themselves, plus whole dumps of the collections written outside the log (UNLOGGED:
+archived habits' history, the cold-tier manifest, achievements and DSA reviews). Restoring a
+backup checks every file first, loads its full base into staging collections with parallel
+batched inserts, swaps those in and replays the deltas in order, optionally stopping at a
+point in time. Backups also copy the cold-tier Parquet partitions (tiering.py) they
+reference, so a restore never points the archive manifest at files that are gone.
+
+What an incremental does not capture: maintenance's orphan and duplicate clean-up of the hot
+collections (the next maintenance run redoes it) and hot rows moved to the cold tier since
+the full backup, which come back hot and are archived again by the next run.
+
+Backups live in one directory per backup with a manifest.json, written last:
+
+    python backup.py backup [--full] [--format bson] [--compression zstd] [--label nightly]
+    python backup.py list
+    python backup.py restore <backup id> [--until 2026-10-01T12:00:00+00:00]   # naive times are UTC
+"""
+
+import argparse
+import gzip
+import io
+import json
+import os
+import shutil
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import bson
+import pyarrow.parquet as pq
+from bson import json_util
+from bson.codec_options import CodecOptions
+
+import maintenance
+import store
+import tiering
+
+COLLECTIONS = ["habits", "completions", "dsa_problems", "daily_notes", "habit_values", "completions_archive",
+               "habit_values_archive", "archive_manifest", "achievements", "dsa_reviews"]
+# Written without an event (srs.log_review, milestones.record, store.archive_habit, tiering): incrementals dump them whole
+UNLOGGED = ["completions_archive", "habit_values_archive", "archive_manifest", "achievements", "dsa_reviews"]
+STAGING = "{}_restoring"
+BATCH = 2000
+CODEC = CodecOptions(tz_aware=True, tzinfo=timezone.utc)
+JSON_OPTIONS = json_util.JSONOptions(json_mode=json_util.JSONMode.RELAXED, tz_aware=True, tzinfo=timezone.utc)
+EXTENSIONS = {"gzip": ".gz", "zstd": ".zst", "none": ""}
+
+
+# ─────────────────────────────────────────────
+# Streams
+# ─────────────────────────────────────────────
+def _open(path, mode, compression):
+    if compression == "gzip":
+        return gzip.open(path, mode, compresslevel=6)
+    if compression == "zstd":
+        import zstandard  # optional: pip install zstandard
+        raw = open(path, mode)
+        if "w" in mode:
+            return zstandard.ZstdCompressor(level=3, threads=-1).stream_writer(raw, closefd=True)
+        return zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+    return open(path, mode)
+
+
+def check_codec(compression):
+    if compression not in EXTENSIONS:
+        raise ValueError(f"Unknown compression {compression!r}")
+    if compression == "zstd":
+        try:
+            import zstandard  # noqa: F401
+        except ImportError:
+            raise RuntimeError("This backup is zstd-compressed: pip install zstandard") from None
+
+
+def write_docs(path, docs, fmt, compression):
+    n = 0
+    with _open(path, "wb", compression) as f:
+        for doc in docs:
+            if fmt == "bson":
+                f.write(bson.encode(doc))
+            else:
+                f.write(json_util.dumps(doc, json_options=JSON_OPTIONS).encode("utf-8") + b"\n")
+            n += 1
+    return n
+
+
+def read_docs(path, fmt, compression):
+    with _open(path, "rb", compression) as f:
+        if fmt == "bson":
+            yield from bson.decode_file_iter(f, codec_options=CODEC)
+        else:
+            for line in io.TextIOWrapper(io.BufferedReader(f), encoding="utf-8"):
+                if line.strip():
+                    yield json_util.loads(line, json_options=JSON_OPTIONS)
+
+
+def _batches(docs, size=BATCH):
+    batch = []
+    for doc in docs:
+        batch.append(doc)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ─────────────────────────────────────────────
+# Manifests
+# ─────────────────────────────────────────────
+def list_backups(root):
+    """All complete backups, newest first."""
+    manifests = []
+    if not os.path.isdir(root):
+        return manifests
+    for name in os.listdir(root):
+        path = os.path.join(root, name, "manifest.json")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                manifests.append(json.load(f))
+    return sorted(manifests, key=lambda m: m["created"], reverse=True)
+
+
+def _chain(root, backup_id):
+    """The full backup and the incrementals leading up to backup_id, oldest first."""
+    by_id = {m["id"]: m for m in list_backups(root)}
+    chain = []
+    m = by_id.get(backup_id)
+    if m is None:
+        raise KeyError(f"No backup {backup_id!r} in {root}")
+    while m is not None:
+        chain.append(m)
+        if m["kind"] == "full":
+            return chain[::-1]
+        m = by_id.get(m["base"])
+    raise RuntimeError(f"Backup {backup_id} has no full base (was it deleted?)")
+
+
+def _event_seq(db):
+    doc = db.counters.find_one({"_id": "events"})
+    return doc["seq"] if doc else 0
+
+
+def _new_dir(root):
+    backup_id = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}-{uuid.uuid4().hex[:6]}"
+    path = os.path.join(root, backup_id)
+    os.makedirs(path)
+    return backup_id, path
+
+
+def _finish(path, manifest):
+    with open(os.path.join(path, "manifest.json.tmp"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(os.path.join(path, "manifest.json.tmp"), os.path.join(path, "manifest.json"))
+    return manifest
+
+
+# ─────────────────────────────────────────────
+# Backup
+# ─────────────────────────────────────────────
+def _partition_path(path, name):
+    return os.path.join(path, "archive", *name.split("/"))
+
+
+def _copy_partitions(db, archive, path, already=()):
+    # Parquet is already compressed: plain file copies. `already`: backup dirs that hold partitions this one can reuse
+    n = 0
+    for entry in db.archive_manifest.find({}):
+        name = tiering.partition_name(entry["coll"], entry["month"], entry["version"])
+        src = archive.local_path(name)
+        if src is None or any(os.path.exists(_partition_path(d, name)) for d in already):
+            continue
+        dst = _partition_path(path, name)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        shutil.copyfile(src, dst)
+        n += 1
+    return n
+
+
+def _restore_partitions(db, archive, paths):
+    """Put back partitions the restored manifest references but the archive lost; paths newest backup first."""
+    n = 0
+    for entry in db.archive_manifest.find({}):
+        name = tiering.partition_name(entry["coll"], entry["month"], entry["version"])
+        if archive.local_path(name) is not None:
+            continue
+        src = next((_partition_path(d, name) for d in paths if os.path.exists(_partition_path(d, name))), None)
+        if src is not None:
+            archive.write(name, pq.read_table(src))
+            n += 1
+    return n
+
+
+def _dump(db, path, colls, ext, fmt, compression):
+    def dump(coll):
+        cursor = db[coll].find({}).batch_size(BATCH)
+        return coll, write_docs(os.path.join(path, coll + ext), cursor, fmt, compression)
+
+    with ThreadPoolExecutor(max_workers=len(colls)) as pool:
+        return dict(pool.map(dump, colls))
+
+
+def full_backup(db, root, label="", fmt="jsonl", compression="gzip", archive=None):
+    check_codec(compression)
+    started = time.perf_counter()
+    # Events from here on are replayed by the next incremental; replay is idempotent
+    seq = _event_seq(db)
+    backup_id, path = _new_dir(root)
+    ext = (".bson" if fmt == "bson" else ".jsonl") + EXTENSIONS[compression]
+    counts = _dump(db, path, COLLECTIONS, ext, fmt, compression)
+    partitions = _copy_partitions(db, archive, path) if archive is not None else 0
+    return _finish(path, {
+        "id": backup_id, "kind": "full", "base": None, "label": label, "format": fmt, "compression": compression,
+        "created": datetime.now(timezone.utc).isoformat(), "seq": seq, "files": {c: c + ext for c in COLLECTIONS},
+        "rows": counts, "partitions": partitions, "seconds": round(time.perf_counter() - started, 2),
+    })
+
+
+def incremental_backup(db, root, label="", fmt="jsonl", compression="gzip", archive=None):
+    """Events since the latest backup and the UNLOGGED collections; falls back to a full backup when there is none."""
+    latest = next(iter(list_backups(root)), None)
+    if latest is None:
+        return full_backup(db, root, label, fmt, compression, archive)
+    check_codec(compression)
+    started = time.perf_counter()
+    backup_id, path = _new_dir(root)
+    ext = (".bson" if fmt == "bson" else ".jsonl") + EXTENSIONS[compression]
+    cursor = db.events.find({"seq": {"$gt": latest["seq"]}}, {"_id": 0}).sort("seq", 1).batch_size(BATCH)
+    counts = {"events": write_docs(os.path.join(path, "events" + ext), cursor, fmt, compression)}
+    counts.update(_dump(db, path, UNLOGGED, ext, fmt, compression))
+    chain_dirs = [os.path.join(root, m["id"]) for m in _chain(root, latest["id"])]
+    partitions = _copy_partitions(db, archive, path, chain_dirs) if archive is not None else 0
+    seq = max(_event_seq(db), latest["seq"])
+    return _finish(path, {
+        "id": backup_id, "kind": "incremental", "base": latest["id"], "label": label, "format": fmt,
+        "compression": compression, "created": datetime.now(timezone.utc).isoformat(), "seq": seq,
+        "files": {c: c + ext for c in counts}, "rows": counts, "partitions": partitions,
+        "seconds": round(time.perf_counter() - started, 2),
+    })
+
+
+# ─────────────────────────────────────────────
+# Restore
+# ─────────────────────────────────────────────
+def _plan(root, backup_id, until):
+    """
+    Everything restore() needs, checked before the database is touched: the backups to read
+    ({coll: (backup dir, manifest)}, the later one winning) and the events to replay.
+    """
+    chain = _chain(root, backup_id)
+    if until is not None and until < datetime.fromisoformat(chain[0]["created"]):
+        raise ValueError(f"{until} is before full backup {chain[0]['id']} ({chain[0]['created']}): restore an older full backup instead")
+    if until is not None:
+        # Backups after `until` are only needed for their events up to it
+        cut = next((i for i, m in enumerate(chain) if i and datetime.fromisoformat(m["created"]) > until), len(chain) - 1)
+        chain = chain[:cut + 1]
+    for m in chain:
+        check_codec(m["compression"])
+        for name in m["files"].values():
+            if not os.path.exists(os.path.join(root, m["id"], name)):
+                raise FileNotFoundError(f"Backup {m['id']} is missing {name}")
+    sources = {}
+    for m in chain:
+        if until is None or m["kind"] == "full" or datetime.fromisoformat(m["created"]) <= until:
+            for coll in COLLECTIONS:
+                if coll in m["files"]:
+                    sources[coll] = (os.path.join(root, m["id"]), m)
+    replay = []
+    for m in chain[1:]:
+        for ev in read_docs(os.path.join(root, m["id"], m["files"]["events"]), m["format"], m["compression"]):
+            if until is not None and ev["ts"] > until:
+                break
+            replay.append(ev)
+    return chain, sources, replay
+
+
+def restore(db, root, backup_id, until=None, archive=None, workers=8):
+    """
+    Replace the data collections with the state at backup_id (or at `until` if that comes
+    before it; a naive `until` is UTC), putting back any archive partitions that went
+    missing since. Collections the backup has no copy of (older backups predate some) are
+    left as they are. Returns {"rows": {coll: n}, "kept": [coll], "partitions": n, "events": n, "seconds": s}.
+    """
+    started = time.perf_counter()
+    if until is not None and until.tzinfo is None:
+        until = until.replace(tzinfo=timezone.utc)
+    chain, sources, replay = _plan(root, backup_id, until)
+
+    # Load into staging collections first: a failed read leaves the live data alone
+    def load(coll):
+        path, m = sources[coll]
+        staging = db[STAGING.format(coll)]
+        staging.drop()
+        docs = read_docs(os.path.join(path, m["files"][coll]), m["format"], m["compression"])
+        futures = [pool.submit(staging.insert_many, batch, ordered=False) for batch in _batches(docs)]
+        return coll, sum(len(f.result().inserted_ids) for f in futures)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool, ThreadPoolExecutor(max_workers=len(sources)) as readers:
+            counts = dict(readers.map(load, list(sources)))
+    except Exception:
+        for coll in sources:
+            db[STAGING.format(coll)].drop()
+        raise
+    for coll, n in counts.items():
+        if n:
+            db[STAGING.format(coll)].rename(coll, dropTarget=True)
+        else:
+            db[coll].delete_many({})
+    maintenance.ensure_indexes(db)  # the swapped-in collections come without them
+    paths = [os.path.join(root, m["id"]) for m in reversed(chain)]
+    partitions = _restore_partitions(db, archive, paths) if archive is not None else 0
+
+    for ev in replay:
+        if "habit_move" in ev:
+            # Archiving moves rows between partitions; its patches only describe the visible state
+            (store.archive_habit if ev["habit_move"] == "archive" else store.restore_habit)(db, ev["habit_id"])
+        else:
+            store.write_patches(db, ev["patches"])
+    return {"rows": counts, "kept": [c for c in COLLECTIONS if c not in sources], "partitions": partitions,
+            "events": len(replay), "seconds": round(time.perf_counter() - started, 2)}
+
+
+def main():
+    import api
+
+    parser = argparse.ArgumentParser(description="Back up or restore the habit tracker database.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("backup")
+    b.add_argument("--full", action="store_true", help="full backup instead of changes since the last one")
+    b.add_argument("--format", choices=["jsonl", "bson"], default="jsonl")
+    b.add_argument("--compression", choices=list(EXTENSIONS), default="gzip")
+    b.add_argument("--label", default="")
+    sub.add_parser("list")
+    r = sub.add_parser("restore")
+    r.add_argument("backup_id")
+    r.add_argument("--until", type=datetime.fromisoformat, help="stop replaying changes after this time (UTC unless it has an offset)")
+    parser.add_argument("--dir", default=api.read_secrets().get("backup", {}).get("path", "backups"))
+    args = parser.parse_args()
+
+    if args.cmd == "list":
+        for m in list_backups(args.dir):
+            print(f"{m['id']}  {m['kind']:<11} {m['label']:<12} {sum(m['rows'].values()):>8} rows  {m['created']}")
+        return
+    db = api.get_db()
+    conf = api.read_secrets().get("archive", {})
+    archive_root = conf.get("path", "archive")
+    if conf.get("backend", "local") == "gridfs":
+        archive = tiering.GridFSArchive(api.get_db, archive_root)
+    else:
+        archive = tiering.LocalArchive(archive_root)
+    if args.cmd == "backup":
+        make = full_backup if args.full else incremental_backup
+        m = make(db, args.dir, args.label, args.format, args.compression, archive)
+        print(f"{m['kind']} backup {m['id']}: {m['rows']} in {m['seconds']}s")
+    else:
+        report = restore(db, args.dir, args.backup_id, args.until, archive)
+        print(f"Restored {report['rows']} and replayed {report['events']} changes in {report['seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
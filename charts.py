@@ -0,0 +1,141 @@
+"""
+📊 History chart builders for the Habit Tracker.
+Frames and Plotly figures for the History tab, shared by the Streamlit app and the
+headless report generator so both draw exactly the same charts.
+"""
+
+from datetime import timedelta
+
+import pandas as pd
+import plotly.graph_objects as go
+
+import stats
+
+PIE_COLORS = ["#6c63ff", "#f7971e", "#06b6d4", "#ec4899", "#4ade80", "#a78bfa"]
+
+
+# ─────────────────────────────────────────────
+# Frames
+# ─────────────────────────────────────────────
+def history_frame(data, view_today, n_days, habit_ids):
+    """Daily completion rate and the (habit x day) heatmap pivot for the window, or None if empty."""
+    habits = [h for h in data["habits"] if h["id"] in habit_ids]
+    rows = []
+    for i in range(n_days - 1, -1, -1):
+        d = view_today - timedelta(days=i)
+        day_completions = data["completions"].get(str(d), {})
+        for h in habits:
+            rows.append({
+                "Date": d,
+                "Habit": h["name"],
+                "Done": 1 if str(h["id"]) in day_completions else 0,
+                "Color": h["color"],
+            })
+    if not rows:
+        return None
+    df = pd.DataFrame(rows)
+    daily = df.groupby("Date")["Done"].mean().reset_index()
+    daily["Rate"] = daily["Done"] * 100
+    pivot = df.pivot_table(index="Habit", columns="Date", values="Done", aggfunc="sum").fillna(0)
+    return {"daily": daily, "pivot": pivot}
+
+
+def habit_stats(data, view_today, n_days, longest_completions=None):
+    """Streaks and rates per habit id; longest_completions may add archived history for the longest streak."""
+    completions = data["completions"]
+    return {
+        h["id"]: {
+            "streak": stats.current_streak(completions, h["id"], view_today),
+            "longest": stats.longest_streak(longest_completions or completions, h["id"]),
+            "rate_7": stats.completion_rate(completions, h["id"], 7, view_today),
+            "rate_30": stats.completion_rate(completions, h["id"], 30, view_today),
+            "rate_n": stats.completion_rate(completions, h["id"], n_days, view_today),
+        }
+        for h in data["habits"]
+    }
+
+
+def category_rates(habits, rates):
+    cat_data = {}
+    for h in habits:
+        cat_data.setdefault(h["category"], []).append(rates[h["id"]])
+    return list(cat_data), [sum(v) / len(v) for v in cat_data.values()]
+
+
+# ─────────────────────────────────────────────
+# Figures
+# ─────────────────────────────────────────────
+def completion_line(daily, theme):
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=daily["Date"], y=daily["Rate"],
+        mode="lines+markers",
+        line=dict(color="#6c63ff", width=3),
+        marker=dict(size=7, color="#a78bfa"),
+        fill="tozeroy",
+        fillcolor="rgba(108,99,255,0.1)",
+        name="Completion %"
+    ))
+    fig.update_layout(
+        paper_bgcolor=theme["card_bg1"], plot_bgcolor=theme["card_bg1"],
+        font=dict(color=theme["text"]),
+        yaxis=dict(title="Completion %", range=[0, 105], gridcolor=theme["card_border"]),
+        xaxis=dict(gridcolor=theme["card_border"]),
+        height=280, margin=dict(l=10, r=10, t=10, b=10),
+        showlegend=False
+    )
+    return fig
+
+
+def completion_heatmap(pivot, theme):
+    fig = go.Figure(data=go.Heatmap(
+        z=pivot.values,
+        x=[str(c) for c in pivot.columns],
+        y=pivot.index.tolist(),
+        colorscale=[[0, theme["card_bg1"]], [0.5, "#6c63ff"], [1, "#a78bfa"]],
+        showscale=False,
+        xgap=3, ygap=3,
+    ))
+    fig.update_layout(
+        paper_bgcolor=theme["bg"], plot_bgcolor=theme["bg"],
+        font=dict(color=theme["text"]),
+        height=200 + 40 * len(pivot.index),
+        margin=dict(l=10, r=10, t=10, b=10),
+    )
+    return fig
+
+
+def category_donut(labels, values, theme):
+    fig = go.Figure(data=go.Pie(
+        labels=labels, values=values,
+        hole=0.55,
+        marker=dict(colors=PIE_COLORS[:len(labels)]),
+        textinfo="label+percent",
+        insidetextorientation="radial",
+    ))
+    fig.update_layout(
+        paper_bgcolor=theme["bg"], font=dict(color=theme["text"]),
+        height=300, margin=dict(l=10, r=10, t=10, b=10),
+        showlegend=False,
+        annotations=[dict(text="Avg Rate", x=0.5, y=0.5, font_size=14, showarrow=False, font_color=theme["text_muted"])]
+    )
+    return fig
+
+
+def habit_rate_bars(habits, rates, theme):
+    values = [rates[h["id"]] for h in habits]
+    fig = go.Figure(go.Bar(
+        x=values, y=[h["name"] for h in habits], orientation="h",
+        marker=dict(color=[h["color"] for h in habits]),
+        text=[f"{v:.0f}%" for v in values],
+        textposition="auto",
+    ))
+    fig.update_layout(
+        paper_bgcolor=theme["bg"], plot_bgcolor=theme["bg"],
+        font=dict(color=theme["text"]),
+        xaxis=dict(range=[0, 105], gridcolor=theme["card_border"]),
+        yaxis=dict(gridcolor=theme["card_border"]),
+        height=300, margin=dict(l=10, r=10, t=10, b=10),
+        showlegend=False
+    )
+    return fig
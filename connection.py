@@ -0,0 +1,204 @@
+"""
+🔌 MongoDB connection manager for the Habit Tracker.
+Wraps one MongoClient in a circuit breaker. While Mongo is unreachable the breaker is
+open and get() fails immediately instead of stalling every rerun on server selection;
+a background health-check thread probes with exponential backoff and closes the
+breaker again once a ping succeeds.
+
+get() is the handle for writes and read-your-writes loads, with the configured write
+concern. get_read() is for analytics and history reads that can tolerate a little lag;
+it routes by the configured read preference (e.g. secondaries, or the nearest member
+with bounded staleness), so heavy scans stay off the primary. Both come from the
+[connections.mongo] settings:
+
+    read_preference = "secondaryPreferred"   # primary, primaryPreferred, secondary, nearest
+    max_staleness_seconds = 120              # at least 90; omit for no bound
+    write_concern = "majority"               # or a number of members
+    write_journal = true
+    write_timeout_ms = 5000
+
+A single-node replica set (mongod --replSet rs0, then rs.initiate()) is enough to try this
+locally: secondaryPreferred falls back to the primary there, secondary fails fast.
+"""
+
+import random
+import threading
+import time
+
+import pymongo
+from pymongo import read_preferences
+from pymongo.errors import ConnectionFailure
+from pymongo.write_concern import WriteConcern
+
+CLOSED = "closed"        # healthy, requests go straight through
+OPEN = "open"            # unreachable, requests fail fast
+HALF_OPEN = "half-open"  # health checker is probing
+
+
+READ_PREFERENCES = {
+    "primary": read_preferences.Primary,
+    "primaryPreferred": read_preferences.PrimaryPreferred,
+    "secondary": read_preferences.Secondary,
+    "secondaryPreferred": read_preferences.SecondaryPreferred,
+    "nearest": read_preferences.Nearest,
+}
+
+
+class CircuitOpenError(ConnectionFailure):
+    pass
+
+
+def read_preference(name="primary", max_staleness_seconds=-1):
+    if name == "primary":
+        return read_preferences.Primary()
+    return READ_PREFERENCES[name](max_staleness=int(max_staleness_seconds))
+
+
+def from_settings(conf, db_name="tracker"):
+    """A ConnectionManager from a [connections.mongo]-style mapping (url plus the routing options)."""
+    pref = None
+    if "read_preference" in conf:
+        pref = read_preference(conf["read_preference"], conf.get("max_staleness_seconds", -1))
+    concern = None
+    if any(k in conf for k in ("write_concern", "write_journal", "write_timeout_ms")):
+        w = conf.get("write_concern")
+        concern = WriteConcern(w=int(w) if isinstance(w, str) and w.isdigit() else w,
+                               j=conf.get("write_journal"), wtimeout=conf.get("write_timeout_ms"))
+    # Unset options fall back to whatever the URL says
+    return ConnectionManager(conf["url"], db_name=db_name, read_preference=pref, write_concern=concern)
+
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def shared(conf, db_name="tracker"):
+    """One manager per URL and database in the process, so a server-start prewarm and the app share a pool."""
+    with _shared_lock:
+        key = (conf["url"], db_name)
+        if key not in _shared:
+            _shared[key] = from_settings(conf, db_name)
+        return _shared[key]
+
+
+class ConnectionManager:
+    def __init__(self, url, db_name="tracker", base_backoff=1.0, max_backoff=60.0, health_interval=15.0,
+                 server_selection_timeout_ms=5000, connect_timeout_ms=10000, read_preference=None, write_concern=None):
+        self.url = url
+        self.db_name = db_name
+        self.read_preference = read_preference
+        self.write_concern = write_concern
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.health_interval = health_interval
+        self.client_kwargs = dict(serverSelectionTimeoutMS=server_selection_timeout_ms, connectTimeoutMS=connect_timeout_ms)
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._client = None
+        self.state = None          # unknown until the first probe
+        self.failures = 0
+        self.retry_at = 0.0
+        self.last_error = None
+        self.last_ok = None
+
+        self._checker = threading.Thread(target=self._health_loop, name="mongo-health", daemon=True)
+        self._checker_started = False
+        self._closed = False
+
+    # ── Public API
+    def get(self):
+        """Return the database handle, or raise CircuitOpenError without touching the network."""
+        return self._database(write_concern=self.write_concern)
+
+    def get_read(self):
+        """Database handle for lag-tolerant reads, routed by the configured read preference."""
+        return self._database(read_preference=self.read_preference)
+
+    def report_failure(self, exc):
+        """Called by data-layer code when an operation hit a connection error."""
+        if isinstance(exc, ConnectionFailure):
+            self._trip(exc)
+
+    def status(self):
+        with self._lock:
+            return {
+                "state": self.state or HALF_OPEN,
+                "failures": self.failures,
+                "retry_in": max(0.0, self.retry_at - time.monotonic()) if self.state == OPEN else 0.0,
+                "last_error": self.last_error,
+                "last_ok": self.last_ok,
+            }
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        if self._client is not None:
+            self._client.close()
+
+    # ── Internals
+    def _database(self, **options):
+        with self._lock:
+            state = self.state
+        if state is None:
+            self._probe()  # first use: one synchronous check so the first load gets real data
+            self._start_checker()
+        with self._lock:
+            if self.state == CLOSED:
+                return self._client.get_database(self.db_name, **options)
+            wait = max(0, self.retry_at - time.monotonic())
+            raise CircuitOpenError(f"MongoDB unavailable ({self.last_error}); next retry in {wait:.0f}s")
+
+    def _client_or_create(self):
+        if self._client is None:
+            # MongoClient construction is non-blocking; it discovers servers in the background
+            self._client = pymongo.MongoClient(self.url, **self.client_kwargs)
+        return self._client
+
+    def _probe(self):
+        with self._lock:
+            if self.state == OPEN:
+                self.state = HALF_OPEN
+        try:
+            self._client_or_create().admin.command("ping")
+        except Exception as e:
+            self._trip(e)
+            return False
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.last_error = None
+            self.last_ok = time.time()
+        return True
+
+    def _trip(self, exc):
+        with self._lock:
+            self.failures += 1
+            backoff = min(self.max_backoff, self.base_backoff * 2 ** (self.failures - 1))
+            self.retry_at = time.monotonic() + backoff * random.uniform(0.8, 1.2)
+            self.state = OPEN
+            self.last_error = str(exc).split(",")[0][:200]
+        self._wake.set()
+
+    def _start_checker(self):
+        with self._lock:
+            if self._checker_started:
+                return
+            self._checker_started = True
+        self._checker.start()
+
+    def _health_loop(self):
+        while not self._closed:
+            with self._lock:
+                if self.state == CLOSED:
+                    delay = self.health_interval
+                else:
+                    delay = max(0.0, self.retry_at - time.monotonic())
+            self._wake.wait(delay)
+            self._wake.clear()
+            if self._closed:
+                return
+            with self._lock:
+                due = self.state == CLOSED or time.monotonic() >= self.retry_at
+            if due:
+                self._probe()
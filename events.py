@@ -0,0 +1,203 @@
+"""
+🕘 Event-sourced mutation log for the Habit Tracker.
+Every save appends one immutable event to the `events` collection holding the row-level
+patches ({key, before, after}) between the previous and the new state. Compact snapshots
+of all rows are written every SNAPSHOT_EVERY events, so rebuilding the state as of any
+moment is one snapshot load plus a short replay. Undo / redo are just the inverse /
+original patches applied to the current state and recorded as new events.
+"""
+
+import copy
+import hashlib
+import json
+from datetime import datetime, timezone
+
+import pymongo
+
+from records import Completion
+from series import ValueSeries
+
+SNAPSHOT_EVERY = 200
+SNAPSHOT_CHUNK = 5000
+
+ACTION_LABELS = {
+    "log": "Logged a habit",
+    "uncheck": "Unchecked a habit",
+    "habit_add": "Added a habit",
+    "habit_delete": "Deleted a habit",
+    "habit_edit": "Edited a habit",
+    "habit_archive": "Archived a habit",
+    "habit_restore": "Restored an archived habit",
+    "dsa_edit": "Edited DSA problems",
+    "dsa_review": "Reviewed a DSA problem",
+    "note_save": "Saved a daily note",
+    "reset": "Reset all data",
+    "undo": "Undo",
+    "redo": "Redo",
+    "api_bulk": "Logged via API",
+    "restore": "Restored a backup",
+}
+
+
+# ─────────────────────────────────────────────
+# State <-> rows
+# ─────────────────────────────────────────────
+def state_rows(data):
+    """Flatten the app state into {key tuple: plain JSON value}."""
+    rows = {}
+    for h in data.get("habits", []):
+        rows[("habit", str(h["id"]))] = copy.deepcopy({k: v for k, v in h.items() if k != "_id"})
+    for day, comps in data.get("completions", {}).items():
+        for hid, c in comps.items():
+            rows[("completion", day, hid)] = c.to_row()
+    for hid, s in data.get("values", {}).items():
+        for day, v in s.items():
+            rows[("value", hid, day)] = v
+    for p in data.get("dsa_problems", []):
+        rows[("dsa", str(p["id"]))] = {k: v for k, v in p.items() if k != "_id"}
+    for n in data.get("daily_notes", []):
+        rows[("note", n["date"])] = n["note"]
+    return rows
+
+
+def digest(rows):
+    """Content hash of a row state: sessions holding the same data get the same token."""
+    h = hashlib.blake2b(digest_size=12)
+    for key in sorted(rows):
+        h.update(json.dumps([key, rows[key]], sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()
+
+
+def rows_to_state(rows):
+    habits, completions, values, dsa, notes = [], {}, {}, [], []
+    for key, val in rows.items():
+        kind = key[0]
+        if kind == "habit":
+            habits.append(copy.deepcopy(val))
+        elif kind == "completion":
+            completions.setdefault(key[1], {})[key[2]] = Completion.from_row(val)
+        elif kind == "value":
+            values.setdefault(key[1], ValueSeries()).set(key[2], float(val))
+        elif kind == "dsa":
+            dsa.append(dict(val))
+        elif kind == "note":
+            notes.append({"date": key[1], "note": val})
+    habits.sort(key=lambda h: h["id"])
+    dsa.sort(key=lambda p: p["id"])
+    notes.sort(key=lambda n: n["date"])
+    return {"habits": habits, "completions": completions, "dsa_problems": dsa, "daily_notes": notes, "values": values}
+
+
+def diff(before, after):
+    patches = []
+    for key, new in after.items():
+        old = before.get(key)
+        if old != new:
+            patches.append({"k": list(key), "b": old, "a": new})
+    for key, old in before.items():
+        if key not in after:
+            patches.append({"k": list(key), "b": old, "a": None})
+    return patches
+
+
+def apply_patches(rows, patches, inverse=False):
+    for p in (reversed(patches) if inverse else patches):
+        key = tuple(p["k"])
+        val = p["b"] if inverse else p["a"]
+        if val is None:
+            rows.pop(key, None)
+        else:
+            rows[key] = copy.deepcopy(val)
+    return rows
+
+
+# ─────────────────────────────────────────────
+# Event store
+# ─────────────────────────────────────────────
+def ensure_indexes(db):
+    db.events.create_index([("seq", pymongo.ASCENDING)], unique=True)
+    db.events.create_index([("ts", pymongo.ASCENDING)])
+    db.snapshots.create_index([("seq", pymongo.DESCENDING), ("part", pymongo.ASCENDING)])
+
+
+def _next_seq(db):
+    doc = db.counters.find_one_and_update(
+        {"_id": "events"}, {"$inc": {"seq": 1}}, upsert=True, return_document=pymongo.ReturnDocument.AFTER
+    )
+    return doc["seq"]
+
+
+def write_snapshot(db, seq, rows, ts=None):
+    ts = ts or datetime.now(timezone.utc)
+    items = [[list(k), v] for k, v in rows.items()]
+    parts = max(1, -(-len(items) // SNAPSHOT_CHUNK))
+    docs = [
+        {"seq": seq, "ts": ts, "part": i, "parts": parts, "rows": items[i * SNAPSHOT_CHUNK:(i + 1) * SNAPSHOT_CHUNK]}
+        for i in range(parts)
+    ]
+    db.snapshots.insert_many(docs)
+
+
+def record(db, action, before_rows, after_rows, patches=None, partial=False, **extra):
+    """Append the patches between two row states as one event. Returns the event (or None if nothing changed).
+
+    partial=True means the rows only cover the keys the event touched (e.g. the API's bulk
+    writes): no snapshot is taken from them, the next full-state record() catches up instead.
+    """
+    if patches is None:
+        patches = diff(before_rows, after_rows)
+    if not patches and action not in ("undo", "redo"):
+        return None
+    head = None if partial else db.snapshots.find_one({}, {"_id": 0, "seq": 1}, sort=[("seq", pymongo.DESCENDING)])
+    if not partial and head is None:
+        # First full-state event: keep the state before it as the base snapshot (after any partial events)
+        ensure_indexes(db)
+        counter = db.counters.find_one({"_id": "events"}) or {}
+        head = {"seq": counter.get("seq", 0)}
+        write_snapshot(db, head["seq"], before_rows)
+    event = {"seq": _next_seq(db), "ts": datetime.now(timezone.utc), "action": action, "patches": patches, **extra}
+    db.events.insert_one(dict(event))
+    if not partial and event["seq"] - head["seq"] >= SNAPSHOT_EVERY:
+        write_snapshot(db, event["seq"], after_rows, event["ts"])
+    return event
+
+
+def get_event(db, seq):
+    return db.events.find_one({"seq": seq}, {"_id": 0})
+
+
+def recent_events(db, limit=20):
+    return list(db.events.find({}, {"_id": 0, "patches": 0}).sort("seq", pymongo.DESCENDING).limit(limit))
+
+
+def undone_seqs(db, seqs):
+    """Which of the given event seqs are currently undone (last undo not followed by a redo)."""
+    state = {}
+    for ev in db.events.find({"$or": [{"undoes": {"$in": seqs}}, {"redoes": {"$in": seqs}}]}, {"_id": 0, "undoes": 1, "redoes": 1}).sort("seq", 1):
+        if "undoes" in ev:
+            state[ev["undoes"]] = True
+        else:
+            state[ev["redoes"]] = False
+    return {s for s, undone in state.items() if undone}
+
+
+def load_snapshot(db, before_ts=None):
+    query = {} if before_ts is None else {"ts": {"$lte": before_ts}}
+    head = db.snapshots.find_one(query, {"_id": 0, "seq": 1, "parts": 1}, sort=[("seq", pymongo.DESCENDING)])
+    if head is None:
+        # Nothing that old: the base snapshot is the earliest state we know
+        head = db.snapshots.find_one({}, {"_id": 0, "seq": 1, "parts": 1}, sort=[("seq", pymongo.ASCENDING)])
+        if head is None:
+            return 0, {}
+    rows = {}
+    for doc in db.snapshots.find({"seq": head["seq"]}, {"_id": 0, "rows": 1}).sort("part", 1):
+        rows.update((tuple(k), v) for k, v in doc["rows"])
+    return head["seq"], rows
+
+
+def state_as_of(db, ts):
+    """Rebuild the app state as it was at `ts` (aware datetime): nearest snapshot + replay."""
+    seq, rows = load_snapshot(db, ts)
+    for ev in db.events.find({"seq": {"$gt": seq}, "ts": {"$lte": ts}}, {"_id": 0, "patches": 1}).sort("seq", 1):
+        apply_patches(rows, ev["patches"])
+    return rows_to_state(rows)
@@ -5,13 +5,36 @@ Requirements: pip install streamlit plotly pandas
 """
 
 import streamlit as st
+import streamlit.components.v1 as components
 import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
-from datetime import date, timedelta, datetime
+from datetime import date, timedelta, datetime, timezone
 import json
 import os
+import pickle
+import uuid
 import pymongo
+import connection
+from connection import CircuitOpenError
+import analytics
+import series
+import rules
+import render
+import events
+import maintenance
+import store
+import stats
+import trends
+import milestones
+import srs
+import charts
+import tiering
+import backup
+import prefetch
+import publish
+import reminders
+from records import Completion, Mood, Helped, DURATION_OPTIONS, MOOD_EMOJIS, HELPED_LABELS
 
 # ─────────────────────────────────────────────
 # Config & Page Setup
@@ -43,12 +66,13 @@ t_card_border = "#e9ecef"
 t_text_muted = "#6c757d"
 t_stat_bg = "#eef2f5"
 t_input_bg = "#ffffff"
+THEME = {"bg": t_bg, "text": t_text, "card_bg1": t_card_bg1, "card_bg2": t_card_bg2,
+         "card_border": t_card_border, "text_muted": t_text_muted, "stat_bg": t_stat_bg}
 
 # ─────────────────────────────────────────────
 # Custom CSS
 # ─────────────────────────────────────────────
-st.markdown(f"""
-<style>
+THEME_CSS = f"""
     /* Main background */
     .stApp {{ background-color: {t_bg}; color: {t_text}; }}
 
@@ -177,8 +201,34 @@ st.markdown(f"""
         padding-bottom: 8px;
         border-bottom: 1px solid {t_card_border};
     }}
-</style>
-""", unsafe_allow_html=True)
+"""
+
+def inject_css_once(css):
+    # The <style> tag lives in the parent document's <head>, so it survives reruns
+    # and only has to be sent on a session's first run.
+    if st.session_state.get("_theme_css_injected"):
+        return
+    components.html(f"""<script>
+        const doc = window.parent.document;
+        let tag = doc.getElementById("habit-theme");
+        if (!tag) {{ tag = doc.createElement("style"); tag.id = "habit-theme"; doc.head.appendChild(tag); }}
+        tag.textContent = {json.dumps(css)};
+    </script>""", height=0)
+    st.session_state["_theme_css_injected"] = True
+
+inject_css_once(THEME_CSS)
+
+_checklist_component = components.declare_component(
+    "habit_checklist", path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "components", "checklist")
+)
+
+def habit_checklist(html, key):
+    """Render the checklist as one payload; returns a new click event or None."""
+    event = _checklist_component(html=html, key=key, default=None)
+    if not event or event.get("nonce") == st.session_state.get(f"{key}_nonce"):
+        return None
+    st.session_state[f"{key}_nonce"] = event["nonce"]
+    return event
 
 
 DEFAULT_DATA = {
@@ -188,20 +238,37 @@ DEFAULT_DATA = {
         {"id": 3, "name": "Drink 8 Glasses",  "icon": "💧", "category": "Health", "target_days": ["Mon","Tue","Wed","Thu","Fri","Sat","Sun"], "color": "#06b6d4", "created": str(date.today() - timedelta(days=15))},
         {"id": 4, "name": "Meditate",          "icon": "🧘", "category": "Wellness", "target_days": ["Mon","Tue","Wed","Thu","Fri","Sat","Sun"], "color": "#ec4899", "created": str(date.today() - timedelta(days=10))},
     ],
-    "completions": {},  # {"YYYY-MM-DD": {"habit_id": {"time": "", "mode": "", "notes": "", "helped": ""}}}
+    "completions": {},  # {"YYYY-MM-DD": {"habit_id": Completion(minutes, mood, helped, notes)}}
     "dsa_problems": [], # [{"id": 1, "topic": "Array", "name": "Two Sum", "url": "https://...", "difficulty": "Easy", "status": "open", "completed_on": None}]
-    "daily_notes": []   # [{"date": "YYYY-MM-DD", "note": "..."}]
+    "daily_notes": [],  # [{"date": "YYYY-MM-DD", "note": "..."}]
+    "values": {},       # {"habit_id": ValueSeries} for quantitative habits (unit / target / target_op on the habit)
 }
 
 @st.cache_resource
-def get_db_conn():
+def get_db_manager():
+    # Cached for the whole server process: one client, one breaker, one health-check thread
     if "connections" in st.secrets and "mongo" in st.secrets["connections"]:
         if "url" in st.secrets["connections"]["mongo"]:
-            url = st.secrets["connections"]["mongo"]["url"]
-            client = pymongo.MongoClient(url, serverSelectionTimeoutMS=5000, connectTimeoutMS=10000)
-            client.admin.command('ping')
-            return client.tracker
-    raise Exception("Could not connect to MongoDB or missing credentials in st.secrets")
+            return connection.shared(st.secrets["connections"]["mongo"])
+    return None
+
+def get_db_conn():
+    manager = get_db_manager()
+    if manager is None:
+        raise Exception("Could not connect to MongoDB or missing credentials in st.secrets")
+    return manager.get()
+
+def get_read_db():
+    # Analytics and history reads: may be served by a secondary, a little behind the primary
+    manager = get_db_manager()
+    if manager is None:
+        raise Exception("Could not connect to MongoDB or missing credentials in st.secrets")
+    return manager.get_read()
+
+def report_db_failure(e):
+    manager = get_db_manager()
+    if manager is not None:
+        manager.report_failure(e)
 
 def init_db(db):
     pass
@@ -214,77 +281,49 @@ def load_data():
         db = None
     if db is not None:
         try:
-            habits_data = list(db.habits.find({}, {"_id": 0}))
-            completions_data = list(db.completions.find({}, {"_id": 0}))
-            dsa_data = list(db.dsa_problems.find({}, {"_id": 0}))
-            
-            # Parse habits
-            habits = []
-            for h in habits_data:
-                if not h.get("id"): continue
-                if "target_days" in h and isinstance(h["target_days"], str) and h["target_days"]:
-                    h["target_days"] = h["target_days"].split(",")
-                elif "target_days" not in h:
-                    h["target_days"] = []
-                h["id"] = int(h["id"])
-                if not h.get("icon"): h["icon"] = "⭐"
-                habits.append(h)
-
-            # Parse completions
-            completions = {}
-            for row in completions_data:
-                d = str(row.get("date", ""))
-                hid = str(row.get("habit_id", ""))
-                if not d or not hid: continue
-                
-                if d not in completions:
-                    completions[d] = {}
-                completions[d][hid] = {
-                    "duration": str(row.get("duration", "")),
-                    "mode": str(row.get("mode", "")),
-                    "notes": str(row.get("notes", "")),
-                    "helped": str(row.get("helped", ""))
-                }
-
-            # Parse DSA
-            dsa = []
-            for p in dsa_data:
-                if not p.get("id"): continue
-                p["id"] = int(p["id"])
-                if not p.get("topic"): p["topic"] = ""
-                if not p.get("url"): p["url"] = ""
-                if "completed_on" not in p: p["completed_on"] = None
-                dsa.append(p)
-
-            # Parse Daily Notes
-            daily_notes = []
-            try:
-                notes_data = list(db.daily_notes.find({}, {"_id": 0}))
-                for row in notes_data:
-                    if not row.get("date"): continue
-                    daily_notes.append({
-                        "date": str(row["date"]),
-                        "note": str(row.get("note", ""))
-                    })
-            except Exception:
-                pass
-            
-            return {"habits": habits, "completions": completions, "dsa_problems": dsa, "daily_notes": daily_notes}
+            return store.shared_state(db)
             
         except Exception as e:
-            st.warning(f"Database connection issue: {e}. Please check your connection.")
-            return DEFAULT_DATA.copy()
+            report_db_failure(e)
+            if db_status()["state"] == "closed":
+                # Not a connection failure (a bad document, a parse error): shown once, not retried per rerun
+                import traceback
+                print(f"Load Error: {traceback.format_exc()}")
+                st.error(f"Couldn't read your data ({e}). Showing offline defaults; reload the page to try again.")
+            else:
+                st.warning(f"Database connection issue: {e}. Please check your connection.")
             
     # Use default habits but start with no completions
     data = DEFAULT_DATA.copy()
     data["completions"] = {}
     data["dsa_problems"] = []
     data["daily_notes"] = []
+    data["values"] = {}
+    data["dsa_day_counts"] = rules.build_dsa_index([])
+    # Offline data must never overwrite the database once it comes back
+    data["offline"] = True
+    # get_data() swaps it for the real data only once this breaker state turns "closed"; if
+    # the breaker was already closed the failure wasn't the connection, and retrying on
+    # every rerun would just repeat it
+    data["offline_breaker"] = db_status()["state"]
     return data
 
-def save_data(data):
+def stamp_version(data, rows=None):
+    # A content hash, so cached analytics are shared by every session holding the same data
+    data["version"] = events.digest(events.state_rows(data) if rows is None else rows)
+    return data
+
+def save_data(data, action="edit", **event_extra):
+    after = events.state_rows(data)
+    stamp_version(data, after)
+    if data.get("offline"):
+        st.error("You're in offline mode, so changes can't be saved. They'll be available again once the database reconnects.")
+        return False
     try:
         db = get_db_conn()
+    except CircuitOpenError as e:
+        st.error(f"Failed to connect to MongoDB: {e}")
+        return False
     except Exception as e:
         import traceback
         st.error(f"Failed to connect to MongoDB: {e}")
@@ -293,100 +332,349 @@ def save_data(data):
 
     if db is not None:
         try:
-            # Prepare Habits list
-            habits_list = []
-            for h in data.get("habits", []):
-                h_copy = dict(h)
-                if isinstance(h_copy.get("target_days"), list):
-                    h_copy["target_days"] = ",".join(h_copy["target_days"])
-                habits_list.append(h_copy)
-
-            # Prepare Completions list
-            comp_list = []
-            for day, day_comps in data.get("completions", {}).items():
-                for hid, detail in day_comps.items():
-                    comp_list.append({
-                        "date": day,
-                        "habit_id": hid,
-                        "duration": detail.get("duration", ""),
-                        "mode": detail.get("mode", ""),
-                        "notes": detail.get("notes", ""),
-                        "helped": detail.get("helped", "")
-                    })
-
-            # Prepare DSA list
-            dsa_list = data.get("dsa_problems", [])
-
-            # Prepare Daily Notes list
-            notes_list = data.get("daily_notes", [])
-
-            print(f"DEBUG: Saving Habits - {len(habits_list)} items")
-            print(f"DEBUG: Saving Completions - {len(comp_list)} items")
-            print(f"DEBUG: Saving DSA - {len(dsa_list)} items")
-            print(f"DEBUG: Saving Notes - {len(notes_list)} items")
-
-            db.habits.delete_many({})
-            db.completions.delete_many({})
-            db.dsa_problems.delete_many({})
-            db.daily_notes.delete_many({})
-            
-            if habits_list: db.habits.insert_many(habits_list)
-            if comp_list: db.completions.insert_many(comp_list)
-            if dsa_list: db.dsa_problems.insert_many(dsa_list)
-            if notes_list: db.daily_notes.insert_many(notes_list)
+            # Write only the rows that changed since this session last loaded / saved,
+            # so concurrent writers (other sessions, the HTTP API) aren't overwritten
+            patches = events.diff(st.session_state.get("saved_rows", {}), after)
+            counts = store.write_patches(db, patches)
+            print(f"DEBUG: Saved {len(patches)} changed rows - {counts}")
 
             # Update session state to match saved data
             st.session_state.data = data
+            record_event(db, action, after, patches, **event_extra)
+            note_achievements(db, data, patches)
+            request_publish()
             
             print("DEBUG: Save Complete!")
             return True
             
         except Exception as e:
             import traceback
+            report_db_failure(e)
             st.error(f"Failed to save to MongoDB: {e}")
             print(f"MongoDB Save Error: {traceback.format_exc()}")
             return False
     return False
 
+def set_session_data(data):
+    rows = events.state_rows(data)
+    st.session_state.data = stamp_version(data, rows)
+    st.session_state.saved_rows = rows
+
 def get_data():
     if "data" not in st.session_state:
-        st.session_state.data = load_data()
+        set_session_data(load_data())
+    elif (st.session_state.data.get("offline") and st.session_state.data.get("offline_breaker") != "closed"
+          and db_status()["state"] == "closed"):
+        # Database is back: swap the offline placeholder for the real data
+        set_session_data(load_data())
     return st.session_state.data
 
+def record_event(db, action, after, patches, **event_extra):
+    # The collections stay the materialized view; the event log is append-only history
+    try:
+        ev = events.record(db, action, st.session_state.get("saved_rows", {}), after, patches, **event_extra)
+    except Exception:
+        import traceback
+        print(f"Event Log Error: {traceback.format_exc()}")
+        ev = None
+    st.session_state.saved_rows = after
+    if ev is not None and action not in ("undo", "redo"):
+        st.session_state.setdefault("undo_stack", []).append(ev["seq"])
+        st.session_state["redo_stack"] = []
+
+def note_achievements(db, data, patches):
+    # Only what this write touched is re-checked; a failure here never fails the save
+    try:
+        new = milestones.on_write(db, data, patches)
+    except Exception:
+        import traceback
+        print(f"Achievements Error: {traceback.format_exc()}")
+        return
+    if new and "achievements" in st.session_state:
+        st.session_state.achievements = new + st.session_state.achievements
+    st.session_state.setdefault("new_achievements", []).extend(new)
+
+def get_achievements(data):
+    # Loaded once per session and extended by note_achievements, so reruns never scan history
+    if "achievements" not in st.session_state:
+        if data.get("offline"):
+            return []
+        try:
+            db = get_db_conn()
+            cold = get_cold_tier()
+            completions = data["completions"] if cold is None else tiering.merge_tiers(data["completions"], get_cold_done_index(cold["token"]))
+            milestones.backfill(db, completions, data["habits"], data.get("dsa_problems", []))
+            st.session_state.achievements = milestones.load(db)
+        except Exception as e:
+            print(f"Achievements Error: {e}")
+            return []
+    return st.session_state.achievements
+
+def set_habit_archived(habit_id, archived, action=None, **event_extra):
+    """Archive or restore a habit. A move between partitions rather than a row edit, logged like any other change."""
+    data = get_data()
+    if data.get("offline"):
+        st.error("You're in offline mode, so changes can't be saved. They'll be available again once the database reconnects.")
+        return False
+    try:
+        db = get_db_conn()
+        if archived:
+            store.archive_habit(db, habit_id)
+        else:
+            store.restore_habit(db, habit_id)
+        # Not shared_state(): the event that invalidates the snapshot isn't recorded yet
+        new_data = store.load_state(db)
+    except Exception as e:
+        report_db_failure(e)
+        st.error(f"Failed to {'archive' if archived else 'restore'} the habit: {e}")
+        return False
+    after = events.state_rows(new_data)
+    stamp_version(new_data, after)
+    record_event(db, action or ("habit_archive" if archived else "habit_restore"), after,
+                 events.diff(st.session_state.get("saved_rows", {}), after),
+                 habit_id=int(habit_id), habit_move="archive" if archived else "restore", **event_extra)
+    st.session_state.data = new_data
+    request_publish()
+    return True
+
+def reload_session(db):
+    # After a reset or restore every loaded view is stale; the undo / redo stacks stay
+    set_session_data(store.load_state(db))
+    st.session_state.pop("achievements", None)
+    get_cold_tier.clear()
+
+def reset_all_data(db, action="reset", **event_extra):
+    """Snapshot, then clear every data collection and the cold tier. Returns the snapshot id (None if it failed)."""
+    try:
+        with st.spinner("Taking a pre-reset snapshot…"):
+            snap = backup.full_backup(db, get_backup_dir(), label="pre-reset", archive=get_archive())
+    except Exception as e:
+        st.error(f"Reset cancelled: the pre-reset snapshot failed ({e}).")
+        return None
+    before = st.session_state.get("saved_rows") or events.state_rows(get_data())
+    for coll in backup.COLLECTIONS:
+        db[coll].delete_many({})
+    if get_archive() is not None:
+        tiering.clear(db, get_archive())
+    events.record(db, action, before, {}, backup=snap["id"], **event_extra)
+    return snap["id"]
+
+def restore_backup(db, backup_id, action="restore", **event_extra):
+    """Restore a backup and log it like any other change. Returns restore()'s report (None if it failed)."""
+    before = st.session_state.get("saved_rows") or events.state_rows(get_data())
+    try:
+        with st.spinner("Restoring…"):
+            result = backup.restore(db, get_backup_dir(), backup_id, archive=get_archive())
+    except Exception as e:
+        # Checked and staged before the swap: the current data is untouched
+        st.error(f"Restore failed, nothing was replaced: {e}")
+        return None
+    events.record(db, action, before, events.state_rows(store.load_state(db)), backup=backup_id, **event_extra)
+    return result
+
+def replay_event(seq, redo=False):
+    """Undo (inverse patches) or redo (original patches) one logged event on top of the current state."""
+    db = get_db_conn()
+    ev = events.get_event(db, seq)
+    if ev is None:
+        return False
+    if "habit_move" in ev:
+        # Undo / redo of an archive or restore is the opposite / same move
+        archive = (ev["habit_move"] == "archive") == redo
+        if redo:
+            return set_habit_archived(ev["habit_id"], archive, action="redo", redoes=seq)
+        return set_habit_archived(ev["habit_id"], archive, action="undo", undoes=seq)
+    if ev["action"] == "reset" and ev.get("backup"):
+        # A reset also cleared the cold tier, archived habits, reviews and achievements: only its snapshot brings them back
+        if redo:
+            done = reset_all_data(db, action="redo", redoes=seq) is not None
+        else:
+            done = restore_backup(db, ev["backup"], action="undo", undoes=seq) is not None
+        if done:
+            reload_session(db)
+        return done
+    data = get_data()
+    rows = events.apply_patches(events.state_rows(data), ev["patches"], inverse=not redo)
+    new_data = {**data, **events.rows_to_state(rows)}
+    new_data["dsa_day_counts"] = rules.build_dsa_index(new_data["dsa_problems"])
+    if redo:
+        return save_data(new_data, action="redo", redoes=seq)
+    return save_data(new_data, action="undo", undoes=seq)
+
+def undo_last():
+    stack = st.session_state.get("undo_stack", [])
+    if stack and replay_event(stack[-1]):
+        st.session_state.setdefault("redo_stack", []).append(stack.pop())
+        return True
+    return False
+
+def redo_last():
+    stack = st.session_state.get("redo_stack", [])
+    if stack and replay_event(stack[-1], redo=True):
+        st.session_state.setdefault("undo_stack", []).append(stack.pop())
+        return True
+    return False
+
+@st.cache_data(show_spinner=False, ttl=300, max_entries=16)
+def get_state_as_of(day_str):
+    # End of the chosen day, UTC
+    ts = datetime.fromisoformat(day_str).replace(hour=23, minute=59, second=59, tzinfo=timezone.utc)
+    return events.state_as_of(get_read_db(), ts)
+
+@st.cache_resource
+def get_maintenance_worker():
+    # One worker per server process; it reaches Mongo through the same circuit breaker
+    manager = get_db_manager()
+    if manager is None:
+        return None
+    hours = float(st.secrets["connections"]["mongo"].get("maintenance_interval_hours", 6))
+    return maintenance.MaintenanceWorker(manager.get, interval_hours=hours, archive=get_archive())
+
+@st.cache_resource
+def get_reminder_scheduler():
+    # Opt-in: [reminders] enabled = true in st.secrets
+    manager = get_db_manager()
+    if manager is None or "reminders" not in st.secrets or not st.secrets["reminders"].get("enabled"):
+        return None
+    return reminders.ReminderScheduler(lambda name: manager.get().client[name], dict(st.secrets["reminders"]))
+
+@st.cache_resource
+def get_archive():
+    # Cold tier for closed months older than a year: local Parquet files or a GridFS bucket
+    conf = st.secrets["archive"] if "archive" in st.secrets else {}
+    root = conf.get("path", os.path.join(os.path.dirname(os.path.abspath(__file__)), "archive"))
+    if conf.get("backend", "local") == "gridfs":
+        manager = get_db_manager()
+        return tiering.GridFSArchive(manager.get, root) if manager is not None else None
+    return tiering.LocalArchive(root)
+
+@st.cache_resource
+def get_publisher():
+    # Opt-in: [publish] enabled = true in st.secrets; wall displays then read static files instead of running sessions
+    manager = get_db_manager()
+    if manager is None or "publish" not in st.secrets or not st.secrets["publish"].get("enabled"):
+        return None
+    conf = st.secrets["publish"]
+    out_dir = conf.get("path", os.path.join(os.path.dirname(os.path.abspath(__file__)), "site"))
+    return publish.Publisher(manager.get, out_dir, float(conf.get("interval_seconds", publish.REFRESH)),
+                             refresh=int(conf.get("refresh_seconds", publish.REFRESH)))
+
+def request_publish():
+    publisher = get_publisher()
+    if publisher is not None:
+        publisher.request()
+
+def get_backup_dir():
+    conf = st.secrets["backup"] if "backup" in st.secrets else {}
+    return conf.get("path", os.path.join(os.path.dirname(os.path.abspath(__file__)), "backups"))
+
+@st.cache_data(show_spinner=False, ttl=60)
+def get_cold_tier():
+    # None when nothing is archived (or the database is unreachable): callers skip the cold tier.
+    # The manifest is read on the primary, like the hot rows: a lagging secondary may not list a
+    # month the primary has already deleted from the hot tier. Only the Parquet scans are heavy.
+    try:
+        db = get_db_conn()
+        token = tiering.manifest_token(db)
+        return {"token": token, "earliest": tiering.earliest_day(db)} if token else None
+    except Exception:
+        return None
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def get_cold_done_index(token):
+    return tiering.cold_done_index(get_db_conn(), get_archive())
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def get_cold_completions(token, start, end):
+    return tiering.cold_completions(get_db_conn(), get_archive(), start, end)
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def get_cold_notes(token):
+    return tiering.cold_notes(get_db_conn(), get_archive())
+
+def with_cold_history(data, start, end):
+    """data with archived completions merged in, if [start, end] reaches back into the cold tier."""
+    cold = None if data.get("offline") or start >= tiering.cold_cutoff() else get_cold_tier()
+    if cold is None:
+        return data
+    archived = get_cold_completions(cold["token"], str(start), str(end))
+    return {**data, "completions": tiering.merge_tiers(data["completions"], archived), "version": f"{data['version']}+{cold['token']}"}
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def get_archived_history(version, habit_ids):
+    # Primary on purpose: right after archiving, a lagging secondary wouldn't have the moved rows yet
+    return store.load_archived(get_db_conn(), habit_ids)
+
+def with_archived_habits(data):
+    """data plus the archived habits and their history, for the History tab's on-demand view."""
+    archived = data.get("archived_habits", [])
+    if not archived or data.get("offline"):
+        return data
+    history = get_archived_history(data["version"], tuple(h["id"] for h in archived))
+    return {**data, "habits": data["habits"] + archived,
+            "completions": tiering.merge_tiers(data["completions"], history["completions"]),
+            "values": {**data.get("values", {}), **history["values"]},
+            "version": f"{data['version']}+archived"}
+
+def db_status():
+    manager = get_db_manager()
+    if manager is None:
+        return {"state": "missing", "failures": 0, "retry_in": 0.0, "last_error": "No MongoDB credentials in st.secrets", "last_ok": None}
+    return manager.status()
+
 @st.dialog("Log Habit Details", width="large")
 def log_habit_dialog(habit_id, day_str, h_name):
     data = get_data()
-    existing = data.get("completions", {}).get(day_str, {}).get(str(habit_id), {})
+    existing = data.get("completions", {}).get(day_str, {}).get(str(habit_id)) or Completion(15, Mood.GOOD, Helped.YES)
+    habit = next((h for h in data["habits"] if h["id"] == int(habit_id)), {})
     
     st.markdown(f"#### Logging details for **{h_name}** on {day_str}")
+
+    amount_val = None
+    if series.is_quantitative(habit):
+        unit = habit["unit"]
+        prev = data.setdefault("values", {}).get(str(habit_id))
+        prev_val = prev.get(day_str) if prev is not None else None
+        if unit == "hours":
+            amount_val = st.number_input("Amount (hours)", min_value=0.0, step=0.25, value=float(prev_val or 0.0))
+        else:
+            amount_val = st.number_input(f"Amount ({series.UNITS[unit].lower()})", min_value=0, step=1, value=int(prev_val or 0))
+        if habit.get("target") is not None:
+            st.caption(f"Target: {series.TARGET_OPS[habit.get('target_op', '>=')].lower()} {series.format_value({'unit': unit}, habit['target'])}. "
+                       "The day only counts as done when the target is met.")
     
-    dur_opts = ["< 15 minutes", "15 minutes", "30 minutes", "45 minutes", "1 hour", "1.5 hours", "2+ hours"]
-    d_idx = dur_opts.index(existing.get("duration", "15 minutes")) if existing.get("duration", "15 minutes") in dur_opts else 1
+    dur_opts = list(DURATION_OPTIONS)
+    d_idx = dur_opts.index(existing.duration_label) if existing.duration_label in dur_opts else 1
     duration_val = st.selectbox("Duration", dur_opts, index=d_idx)
     
     st.markdown("**How did it feel?**")
-    emoji_modes = ["😭", "😟", "😐", "🙂", "😄", "🚀"]
-    m_idx = emoji_modes.index(existing.get("mode", "🙂")) if existing.get("mode", "🙂") in emoji_modes else 3
-    mode_val = st.radio("Mode", emoji_modes, index=m_idx, horizontal=True, label_visibility="collapsed")
+    m_idx = MOOD_EMOJIS.index(existing.mood_emoji) if existing.mood_emoji in MOOD_EMOJIS else 3
+    mode_val = st.radio("Mode", MOOD_EMOJIS, index=m_idx, horizontal=True, label_visibility="collapsed")
     
-    notes_val = st.text_area("Notes", value=existing.get("notes", ""), placeholder="How did it go?")
+    notes_val = st.text_area("Notes", value=existing.notes, placeholder="How did it go?")
     
-    h_opts = ["Yes", "No", "Not sure"]
-    h_idx = h_opts.index(existing.get("helped", "Yes")) if existing.get("helped", "Yes") in h_opts else 0
+    h_opts = list(HELPED_LABELS.values())
+    h_idx = h_opts.index(existing.helped_label) if existing.helped_label in h_opts else 0
     helped_val = st.selectbox("Did it help you?", h_opts, index=h_idx)
     
     if st.button("Save", use_container_width=True):
         data = get_data()
         hid = str(habit_id)
-        if day_str not in data["completions"]:
-            data["completions"][day_str] = {}
-        data["completions"][day_str][hid] = {
-            "duration": duration_val,
-            "mode": mode_val,
-            "notes": notes_val,
-            "helped": helped_val
-        }
-        if save_data(data):
+        if amount_val is not None:
+            data["values"].setdefault(hid, series.ValueSeries()).set(day_str, float(amount_val))
+        if amount_val is None or series.meets_target(habit, amount_val):
+            if day_str not in data["completions"]:
+                data["completions"][day_str] = {}
+            data["completions"][day_str][hid] = Completion(
+                DURATION_OPTIONS[duration_val],
+                Mood.from_emoji(mode_val),
+                Helped.from_label(helped_val),
+                notes_val,
+            )
+        elif hid in data["completions"].get(day_str, {}):
+            # Value was lowered below the target
+            del data["completions"][day_str][hid]
+        if save_data(data, action="log"):
             st.rerun()
 
 @st.dialog("Confirm Uncheck")
@@ -416,8 +704,10 @@ def confirm_delete_dialog(habit_id, h_name):
             for day in data["completions"]:
                 if hid_str in data["completions"][day]:
                     del data["completions"][day][hid_str]
+            data.get("values", {}).pop(hid_str, None)
+            maintenance.prune_empty_days(data["completions"])
                     
-            if save_data(data):
+            if save_data(data, action="habit_delete"):
                 st.rerun()
     with col2:
         if st.button("Cancel", use_container_width=True):
@@ -428,61 +718,116 @@ def remove_completion(habit_id, day_str):
     hid = str(habit_id)
     if day_str in data["completions"] and hid in data["completions"][day_str]:
         del data["completions"][day_str][hid]
-        return save_data(data)
+        if not data["completions"][day_str]:
+            del data["completions"][day_str]
+        if hid in data.get("values", {}):
+            data["values"][hid].remove(day_str)
+        return save_data(data, action="uncheck")
     return True
 
 def is_done(habit_id, day_str):
     data = get_data()
     return str(habit_id) in data["completions"].get(day_str, {})
 
-def calculate_streak(habit_id):
-    data = get_data()
-    streak = 0
-    d = date.today()
-    hid = str(habit_id)
-    while True:
-        ds = str(d)
-        if hid in data["completions"].get(ds, {}):
-            streak += 1
-            d -= timedelta(days=1)
-        else:
-            break
-    return streak
-
-def calculate_longest_streak(habit_id):
-    data = get_data()
-    all_dates = sorted(data["completions"].keys())
-    if not all_dates:
-        return 0
-    best = cur = 0
-    prev = None
-    hid = str(habit_id)
-    for ds in all_dates:
-        if hid in data["completions"][ds]:
-            d = date.fromisoformat(ds)
-            if prev and (d - prev).days == 1:
-                cur += 1
-            else:
-                cur = 1
-            best = max(best, cur)
-            prev = d
-        else:
-            cur = 0
-            prev = None
-    return best
+def calculate_streak(habit_id, data=None, today=None):
+    data = data or get_data()
+    return stats.current_streak(data["completions"], habit_id, today)
+
+def calculate_longest_streak(habit_id, data=None):
+    data = data or get_data()
+    completions = data["completions"]
+    cold = None if data.get("offline") else get_cold_tier()
+    if cold is not None:
+        # The longest run may well be in archived history
+        completions = tiering.merge_tiers(completions, get_cold_done_index(cold["token"]))
+    return stats.longest_streak(completions, habit_id)
+
+def get_completion_rate(habit_id, days=30, data=None, today=None):
+    data = data or get_data()
+    return stats.completion_rate(data["completions"], habit_id, days, today)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def get_insights(version, start, end, habit_ids, _data):
+    return analytics.insights(_data["completions"], [h for h in _data["habits"] if h["id"] in habit_ids], start, end)
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def get_trends(version, today, lookback, _data):
+    return trends.compute(_data["completions"], _data["habits"], today, lookback)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def get_history_frame(version, view_today, n_days, habit_ids, _data):
+    return charts.history_frame(_data, view_today, n_days, habit_ids)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def get_habit_stats(version, view_today, n_days, _data):
+    cold = None if _data.get("offline") else get_cold_tier()
+    # The longest run may well be in archived history
+    longest = tiering.merge_tiers(_data["completions"], get_cold_done_index(cold["token"])) if cold else None
+    return charts.habit_stats(_data, view_today, n_days, longest)
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def get_dsa_table(version, _problems):
+    df_probs = pd.DataFrame(_problems)
+    # Map status to a boolean 'Done' column
+    df_probs['Done'] = df_probs['status'] == 'completed'
+    # Select and reorder columns for display
+    display_cols = ['Done', 'topic', 'name', 'difficulty', 'url', 'completed_on']
+    return df_probs[display_cols].copy()
+
+def get_review_queue(data):
+    # Built once per problem list; reviews re-queue their problem instead of rebuilding
+    if st.session_state.get("review_queue_src") is not data["dsa_problems"]:
+        st.session_state.review_queue = srs.ReviewQueue(data["dsa_problems"])
+        st.session_state.review_queue_src = data["dsa_problems"]
+    return st.session_state.review_queue
+
+def review_problem(data, p, quality):
+    schedule = srs.review(p, quality)
+    p["srs"] = schedule
+    get_review_queue(data).update(p)
+    if save_data(data, action="dsa_review"):
+        try:
+            srs.log_review(get_db_conn(), p, quality, schedule)
+        except Exception as e:
+            print(f"Review Log Error: {e}")
+        st.rerun()
 
-def get_completion_rate(habit_id, days=30):
-    data = get_data()
-    total = 0
-    done = 0
-    hid = str(habit_id)
-    for i in range(days):
-        d = str(date.today() - timedelta(days=i))
-        total += 1
-        if hid in data["completions"].get(d, {}):
-            done += 1
-    return (done / total * 100) if total else 0
+@st.cache_data(show_spinner=False, max_entries=16)
+def get_sorted_notes(version, _notes):
+    return sorted(_notes, key=lambda x: x["date"], reverse=True)
 
+@st.cache_resource
+def get_prefetcher():
+    return prefetch.Prefetcher()
+
+def prefetch_other_tabs(current, data):
+    # Warm the caches behind the default state of the tabs the user is likely to open next
+    if data.get("offline"):
+        return
+    # The tasks outlive this rerun, and the next one edits session data in place: give them their own copy
+    data = pickle.loads(pickle.dumps(data, pickle.HIGHEST_PROTOCOL))
+    today = date.today()
+    tasks = []
+    if current != "📊  History & Filters":
+        ids = tuple(h["id"] for h in data["habits"])
+        tasks += [
+            ("history_frame", get_history_frame, (data["version"], today, 7, ids, data)),
+            ("habit_stats", get_habit_stats, (data["version"], today, 7, data)),
+            ("trends", get_trends, (data["version"], today, trends.LOOKBACK, data)),
+            ("insights", get_insights, (data["version"], today - timedelta(days=6), today, ids, data)),
+        ]
+    if current != "💻  DSA Tracker" and data.get("dsa_problems"):
+        tasks.append(("dsa_table", get_dsa_table, (data["version"], data["dsa_problems"])))
+    if current != "📝  Daily Notes":
+        tasks.append(("notes", get_sorted_notes, (data["version"], data.get("daily_notes", []))))
+    get_prefetcher().submit(st.session_state.setdefault("_session_id", uuid.uuid4().hex), tasks)
+
+
+get_maintenance_worker()
+get_reminder_scheduler()
+get_publisher()
+# This session's rerun comes first: drop whatever it still had queued for prefetching
+get_prefetcher().cancel(st.session_state.setdefault("_session_id", uuid.uuid4().hex))
 
 # ─────────────────────────────────────────────
 # Main App
@@ -555,27 +900,23 @@ if current_tab == "📅  Today's Dashboard":
     st.markdown("<br>", unsafe_allow_html=True)
     st.markdown('<div class="section-title">📆 Your Week at a Glance</div>', unsafe_allow_html=True)
     st.caption("A summary of how many habits you've completed each day over the past week.")
-    week_cols = st.columns(7)
-    for i, col in enumerate(week_cols):
+    week_days = []
+    for i in range(7):
         d = date.today() - timedelta(days=6-i)
-        ds = str(d)
-        day_completions = data["completions"].get(ds, {})
+        day_completions = data["completions"].get(str(d), {})
         done_today = sum(1 for h in habits if str(h["id"]) in day_completions)
-        is_today = (d == date.today())
-        
-        bg_color = "#6c63ff" if is_today else ("#e6f4ea" if done_today == total and total > 0 else t_card_bg1)
-        border_color = "2px solid #6c63ff" if is_today else f"1px solid {t_card_border}"
-        day_text = 'white' if is_today or done_today==total else "#666"
-        frac_text = "#1e8e3e" if done_today==total and total>0 else t_text_muted
-        t_w_muted = "#888"
-
-        with col:
-            st.markdown(f"""
-            <div style="background:{bg_color}; border:{border_color}; border-radius:12px; padding:10px; text-align:center;">
-                <div style="font-size:0.7rem; color:{t_w_muted};">{d.strftime('%a')}</div>
-                <div style="font-size:1.1rem; font-weight:700; color:{day_text};">{d.day}</div>
-                <div style="font-size:0.75rem; color:{frac_text};">{done_today}/{total}</div>
-            </div>""", unsafe_allow_html=True)
+        week_days.append((d, done_today, d == date.today()))
+    st.markdown(render.week_strip(week_days, total, THEME), unsafe_allow_html=True)
+
+    # ── Achievements
+    for a in st.session_state.pop("new_achievements", []):
+        st.toast(f"{a['icon']} Achievement unlocked: {a['title']} — {a['detail']}")
+    earned = get_achievements(data)
+    if earned:
+        st.markdown("<br>", unsafe_allow_html=True)
+        st.markdown('<div class="section-title">🏅 Achievements</div>', unsafe_allow_html=True)
+        st.caption(f"{len(earned)} earned so far. Your most recent:")
+        st.markdown(render.achievements(earned[:8], THEME), unsafe_allow_html=True)
 
     # ── Habit checklist
     st.markdown("<br>", unsafe_allow_html=True)
@@ -585,49 +926,37 @@ if current_tab == "📅  Today's Dashboard":
     if not habits:
         st.info("No habits yet! Go to 'Manage Habits' tab to add some.")
     else:
+        trend_table = get_trends(data["version"], date.today(), trends.LOOKBACK, data)["table"]
+        rows = []
         for h in habits:
             done = is_done(h["id"], today_str)
             streak = calculate_streak(h["id"])
-            rate = get_completion_rate(h["id"])
 
-            col_check, col_info = st.columns([1, 11])
-            with col_check:
-                st.markdown("<br>", unsafe_allow_html=True)
-                if st.button("✅" if done else "⬜", key=f"toggle_{h['id']}_{today_str}", help="Toggle"):
-                    if done:
-                        confirm_uncheck_dialog(h["id"], today_str, h["name"])
-                    else:
-                        log_habit_dialog(h["id"], today_str, h["name"])
-
-            with col_info:
-                edit_html = f'<a href="?edit_habit={h["id"]}&edit_date={today_str}" target="_self" style="text-decoration:none; background:{t_card_bg2}; border:1px solid {t_card_border}; padding:2px 6px; border-radius:12px; font-size:0.75rem; color:{t_text_muted}; margin-left:4px;" title="Edit Log Details">✏️ Edit</a>' if done else ''
-                badge = f'<span class="done-badge">✓ Done</span>{edit_html}' if done else '<span class="pending-badge">Pending</span>'
-                streak_html = f'<span class="streak-badge">🔥 {streak} day streak</span>' if streak > 0 else ''
-                
-                details_html = ""
-                if done:
-                    detail = today_completions.get(str(h["id"]), {})
-                    if detail.get("duration") or detail.get("mode") or detail.get("notes") or detail.get("helped") or detail.get("time"):
-                        parts = []
-                        if detail.get("duration"): parts.append(f"⏳ {detail['duration']}")
-                        elif detail.get("time"): parts.append(f"⏱️ {detail['time']}")  # fallback for older entries
-                        if detail.get("mode"): parts.append(f"🎯 {detail['mode']}")
-                        if detail.get("helped"): parts.append(f"💡 {detail['helped']}")
-                        details_line = " | ".join(parts)
-                        notes_line = f"<div style='margin-top:4px;'>📝 <i>{detail['notes']}</i></div>" if detail.get("notes") else ""
-                        details_html = f"<div style='margin-top:12px; padding:10px; background:{t_bg}; border-radius:8px; font-size:0.85rem; border: 1px solid {t_card_border}; color:#a78bfa;'>{'<div>' + details_line + '</div>' if details_line else ''}{notes_line}</div>"
-                
-                st.markdown(f"""
-                <div class="habit-card" style="border-left: 4px solid {h['color']}; {'opacity:0.6; filter: grayscale(40%);' if done else ''}">
-                    <div style="display:flex; justify-content:space-between; align-items:center; margin-bottom:8px;">
-                        <div style="font-size:1.1rem; font-weight:700;">
-                            {h['icon']} {h['name']} 
-                            <span style="font-size:0.75rem; color:{t_text_muted}; font-weight:400; margin-left:8px;">(Goal: {h['category']})</span>
-                        </div>
-                        <div style="display:flex; gap:8px; align-items:center;">{streak_html} {badge}</div>
-                    </div>
-                    {details_html}
-                </div>""", unsafe_allow_html=True)
+            extra_badges = ""
+            trend = trend_table.loc[h["id"]] if h["id"] in trend_table.index else None
+            if trend is not None and trend["streak_risk"] >= 0.5:
+                extra_badges += f'<span class="pending-badge" style="background:#fff4e5; color:#b45309;" title="Chance of breaking your streak today">⚠️ Streak at risk {trend["streak_risk"] * 100:.0f}%</span> '
+            if trend is not None and abs(trend["wow_delta"]) >= 15:
+                arrow = "📈" if trend["wow_delta"] > 0 else "📉"
+                extra_badges += f'<span class="pending-badge" style="background:{t_stat_bg}; color:{t_text_muted};" title="Change in 7-day rate vs. the week before">{arrow} {trend["wow_delta"]:+.0f}% this week</span> '
+            if h.get("rule"):
+                extra_badges += f'<span class="pending-badge" style="background:{t_stat_bg}; color:{t_text_muted};" title="Completed automatically">🔗 {rules.RULE_SOURCES.get(h["rule"].get("source"), "Auto")}</span> '
+            if series.is_quantitative(h):
+                h_series = data.get("values", {}).get(str(h["id"]))
+                today_val = h_series.get(today_str) if h_series is not None else None
+                if today_val is not None:
+                    extra_badges += f'<span class="pending-badge" style="background:{t_stat_bg}; color:{t_text};">📏 {series.format_value(h, today_val)}</span> '
+
+            rows.append(render.checklist_row(h, done, streak, today_completions.get(str(h["id"])), extra_badges, THEME))
+
+        event = habit_checklist(render.checklist(rows), key=f"checklist_{today_str}")
+        if event:
+            ev_habit = next((h for h in habits if h["id"] == event["habit_id"]), None)
+            if ev_habit is not None:
+                if event["action"] == "uncheck":
+                    confirm_uncheck_dialog(ev_habit["id"], today_str, ev_habit["name"])
+                else:
+                    log_habit_dialog(ev_habit["id"], today_str, ev_habit["name"])
 
     # ── Motivational footer
     if pct == 100:
@@ -644,6 +973,23 @@ if current_tab == "📅  Today's Dashboard":
 # ══════════════════════════════════════════════
 elif current_tab == "📊  History & Filters":
     data = get_data()
+    view_today = date.today()
+
+    # ── Time travel
+    with st.expander("🕰️ View As Of a Past Date"):
+        st.caption("Rebuilds your habits and completions from the change log exactly as they were at the end of the chosen day.")
+        as_of_on = st.toggle("Enable time-travel view", key="as_of_on")
+        as_of = st.date_input("As of", value=date.today() - timedelta(days=1), max_value=date.today(), key="as_of_date")
+    if as_of_on and not data.get("offline"):
+        try:
+            data = {**get_state_as_of(str(as_of)), "version": f"{data['version']}@{as_of}"}
+            view_today = as_of
+            st.info(f"🕰️ Read-only view of your data as it was on {as_of.strftime('%B %d, %Y')}.")
+        except Exception as e:
+            st.warning(f"Couldn't rebuild that date from the change log: {e}")
+    if data.get("archived_habits"):
+        if st.toggle(f"📦 Include archived habits ({len(data['archived_habits'])})", key="show_archived"):
+            data = with_archived_habits(data)
     habits = data["habits"]
 
     # ── Filters
@@ -656,10 +1002,18 @@ elif current_tab == "📊  History & Filters":
         categories = ["All Categories"] + list(set(h["category"] for h in habits))
         sel_cat = st.selectbox("Category", categories)
     with col_f3:
-        time_range = st.selectbox("Time Range", ["Last 7 Days", "Last 14 Days", "Last 30 Days", "Last 90 Days"])
-
-    days_map = {"Last 7 Days": 7, "Last 14 Days": 14, "Last 30 Days": 30, "Last 90 Days": 90}
-    n_days = days_map[time_range]
+        time_range = st.selectbox("Time Range", ["Last 7 Days", "Last 14 Days", "Last 30 Days", "Last 90 Days", "Last 365 Days", "All Time"])
+
+    days_map = {"Last 7 Days": 7, "Last 14 Days": 14, "Last 30 Days": 30, "Last 90 Days": 90, "Last 365 Days": 365}
+    if time_range == "All Time":
+        firsts = [date.fromisoformat(min(data["completions"]))] if data["completions"] else []
+        cold = None if data.get("offline") else get_cold_tier()
+        if cold and cold["earliest"]:
+            firsts.append(cold["earliest"])
+        n_days = max((view_today - min(firsts)).days + 1, 1) if firsts else 1
+    else:
+        n_days = days_map[time_range]
+    data = with_cold_history(data, view_today - timedelta(days=n_days - 1), view_today)
 
     # Filter habits
     filtered_habits = habits
@@ -672,154 +1026,223 @@ elif current_tab == "📊  History & Filters":
     st.markdown("<br>", unsafe_allow_html=True)
     st.markdown('<div class="section-title">📈 Completion History</div>', unsafe_allow_html=True)
 
-    # Build dataframe
-    rows = []
-    for i in range(n_days - 1, -1, -1):
-        d = date.today() - timedelta(days=i)
-        ds = str(d)
-        day_completions = data["completions"].get(ds, {})
-        for h in filtered_habits:
-            rows.append({
-                "Date": d,
-                "Habit": h["name"],
-                "Done": 1 if str(h["id"]) in day_completions else 0,
-                "Color": h["color"],
-            })
-
-    if rows:
-        df = pd.DataFrame(rows)
+    frame = get_history_frame(data["version"], view_today, n_days, tuple(h["id"] for h in filtered_habits), data)
+    habit_stats = get_habit_stats(data["version"], view_today, n_days, data)
 
+    if frame is not None:
         # Daily completion rate line chart
-        daily = df.groupby("Date")["Done"].mean().reset_index()
-        daily["Rate"] = daily["Done"] * 100
-
-        fig_line = go.Figure()
-        fig_line.add_trace(go.Scatter(
-            x=daily["Date"], y=daily["Rate"],
-            mode="lines+markers",
-            line=dict(color="#6c63ff", width=3),
-            marker=dict(size=7, color="#a78bfa"),
-            fill="tozeroy",
-            fillcolor="rgba(108,99,255,0.1)",
-            name="Completion %"
-        ))
-        fig_line.update_layout(
+        daily = frame["daily"]
+
+        fig_line = charts.completion_line(daily, THEME)
+        st.plotly_chart(fig_line, use_container_width=True)
+
+        # Habit heatmap
+        if len(filtered_habits) > 1:
+            pivot = frame["pivot"]
+            fig_heat = charts.completion_heatmap(pivot, THEME)
+            st.plotly_chart(fig_heat, use_container_width=True)
+
+        export_rows = []
+        for i in range(n_days - 1, -1, -1):
+            ds = str(view_today - timedelta(days=i))
+            day_completions = data["completions"].get(ds, {})
+            for h in filtered_habits:
+                c = day_completions.get(str(h["id"]))
+                if c is not None:
+                    export_rows.append({"date": ds, "habit": h["name"], "minutes": c.minutes, "mood": c.mood_emoji,
+                                        "helped": c.helped_label, "notes": c.notes})
+        st.download_button("⬇️ Export CSV", pd.DataFrame(export_rows).to_csv(index=False),
+                           file_name=f"habits_{view_today - timedelta(days=n_days - 1)}_{view_today}.csv", mime="text/csv")
+
+    # ── Trend & forecast
+    if filtered_habits:
+        trend = get_trends(data["version"], view_today, trends.LOOKBACK, data)
+        # The forecast keeps the standard window; the chart's history covers the whole range
+        span = trend if n_days <= trends.LOOKBACK else get_trends(data["version"], view_today, n_days, data)
+        recent = trends.daily_rates(span, [h["id"] for h in filtered_habits], view_today - timedelta(days=n_days - 1))
+        ahead = trends.forecast(trend, filtered_habits)
+        st.markdown('<div class="section-title">🔮 Trend & Forecast</div>', unsafe_allow_html=True)
+        st.caption("Rolling 7-day completion rate over scheduled days, and the expected rate for the next week based on recent momentum and how each weekday usually goes.")
+        fig_fc = go.Figure()
+        fig_fc.add_trace(go.Scatter(x=recent.index, y=recent["rate"], mode="markers", name="Daily",
+                                    marker=dict(size=6, color="#a78bfa")))
+        fig_fc.add_trace(go.Scatter(x=recent.index, y=recent["rolling_7"], mode="lines", name="7-day rate",
+                                    line=dict(color="#6c63ff", width=3)))
+        fig_fc.add_trace(go.Scatter(x=ahead.index, y=ahead.values, mode="lines+markers", name="Forecast",
+                                    line=dict(color="#f7971e", width=3, dash="dash")))
+        fig_fc.update_layout(
             paper_bgcolor=t_card_bg1, plot_bgcolor=t_card_bg1,
             font=dict(color=t_text),
             yaxis=dict(title="Completion %", range=[0, 105], gridcolor=t_card_border),
             xaxis=dict(gridcolor=t_card_border),
             height=280, margin=dict(l=10, r=10, t=10, b=10),
-            showlegend=False
+            legend=dict(orientation="h", y=1.1),
         )
-        st.plotly_chart(fig_line, use_container_width=True)
-
-        # Habit heatmap
-        if len(filtered_habits) > 1:
-            pivot = df.pivot_table(index="Habit", columns="Date", values="Done", aggfunc="sum").fillna(0)
-            fig_heat = go.Figure(data=go.Heatmap(
-                z=pivot.values,
-                x=[str(c) for c in pivot.columns],
-                y=pivot.index.tolist(),
-                colorscale=[[0, t_card_bg1], [0.5, "#6c63ff"], [1, "#a78bfa"]],
-                showscale=False,
-                xgap=3, ygap=3,
-            ))
-            fig_heat.update_layout(
-                paper_bgcolor=t_bg, plot_bgcolor=t_bg,
-                font=dict(color=t_text),
-                height=200 + 40 * len(filtered_habits),
-                margin=dict(l=10, r=10, t=10, b=10),
-            )
-            st.plotly_chart(fig_heat, use_container_width=True)
+        st.plotly_chart(fig_fc, use_container_width=True)
+
+        table = trend["table"].loc[[h["id"] for h in filtered_habits]]
+        momentum = pd.DataFrame({
+            "Habit": [f"{h['icon']} {h['name']}" for h in filtered_habits],
+            "7-day %": table["rate_7"].round(0).values,
+            "30-day %": table["rate_30"].round(0).values,
+            "Week-over-week": table["wow_delta"].round(0).values,
+            "Momentum": table["momentum"].round(1).values,
+        })
+        st.dataframe(momentum, hide_index=True, use_container_width=True)
 
     # ── Streaks section
     st.markdown('<div class="section-title">🔥 Streaks & Statistics</div>', unsafe_allow_html=True)
 
-    streak_cols = st.columns(len(filtered_habits) if filtered_habits else 1)
-    for idx, h in enumerate(filtered_habits):
-        streak = calculate_streak(h["id"])
-        longest = calculate_longest_streak(h["id"])
-        rate_7  = get_completion_rate(h["id"], 7)
-        rate_30 = get_completion_rate(h["id"], 30)
+    cards = []
+    for h in filtered_habits:
+        hs = habit_stats[h["id"]]
+        cards.append(render.streak_card(h, hs["streak"], hs["longest"], hs["rate_7"], hs["rate_30"], THEME))
+    st.markdown(render.streak_cards(cards), unsafe_allow_html=True)
 
-        with streak_cols[idx % len(streak_cols)]:
-            fire = "🔥" * min(streak, 5) if streak > 0 else "💤"
-            st.markdown(f"""
-            <div class="habit-card" style="border-left: 4px solid {h['color']};">
-                <div style="font-size:1.05rem; font-weight:700; margin-bottom:12px;">{h['icon']} {h['name']}</div>
-                <div style="display:grid; grid-template-columns:1fr 1fr; gap:10px; text-align:center;">
-                    <div style="background:{t_bg}; border-radius:10px; padding:10px;">
-                        <div style="font-size:1.8rem; font-weight:800; color:#e65100;">{streak}</div>
-                        <div style="font-size:0.72rem; color:{t_text_muted};">Current Streak {fire}</div>
-                    </div>
-                    <div style="background:{t_bg}; border-radius:10px; padding:10px;">
-                        <div style="font-size:1.8rem; font-weight:800; color:#6c63ff;">{longest}</div>
-                        <div style="font-size:0.72rem; color:{t_text_muted};">Best Ever 🏆</div>
-                    </div>
-                    <div style="background:{t_bg}; border-radius:10px; padding:10px;">
-                        <div style="font-size:1.4rem; font-weight:700; color:#1e8e3e;">{rate_7:.0f}%</div>
-                        <div style="font-size:0.72rem; color:{t_text_muted};">7-Day Rate</div>
-                    </div>
-                    <div style="background:{t_bg}; border-radius:10px; padding:10px;">
-                        <div style="font-size:1.4rem; font-weight:700; color:#00838f;">{rate_30:.0f}%</div>
-                        <div style="font-size:0.72rem; color:{t_text_muted};">30-Day Rate</div>
-                    </div>
-                </div>
-            </div>""", unsafe_allow_html=True)
+    # ── Quantitative habits
+    quant_habits = [h for h in filtered_habits if series.is_quantitative(h)]
+    if quant_habits:
+        st.markdown("<br>", unsafe_allow_html=True)
+        st.markdown('<div class="section-title">📏 Tracked Values</div>', unsafe_allow_html=True)
+        grain = st.radio("Roll up by", list(series.FREQS), horizontal=True, key="value_grain")
+        win_end = view_today
+        win_start = win_end - timedelta(days=n_days - 1)
+        for h in quant_habits:
+            h_series = data.get("values", {}).get(str(h["id"]))
+            if h_series is None or not len(h_series):
+                st.caption(f"{h['icon']} {h['name']}: no values logged yet.")
+                continue
+            roll = series.rollup(h_series.to_series(win_start, win_end), grain)
+            if roll.empty:
+                st.caption(f"{h['icon']} {h['name']}: no values in this time range.")
+                continue
+            stat = "mean" if grain == "Daily" or h.get("target") is not None else "sum"
+            fig_val = go.Figure()
+            fig_val.add_trace(go.Bar(
+                x=roll.index, y=roll[stat], name=stat.title(),
+                marker=dict(color=h["color"]),
+                customdata=roll[["p50", "p90"]].values,
+                hovertemplate="%{y:.1f} (p50 %{customdata[0]:.1f}, p90 %{customdata[1]:.1f})<extra></extra>",
+            ))
+            if h.get("target") is not None:
+                fig_val.add_hline(y=h["target"], line_dash="dash", line_color=t_text_muted,
+                                  annotation_text=f"Target {series.format_value({'unit': h['unit']}, h['target'])}")
+            fig_val.update_layout(
+                title=f"{h['icon']} {h['name']} — {grain.lower()} {'average' if stat == 'mean' else 'total'}",
+                paper_bgcolor=t_card_bg1, plot_bgcolor=t_card_bg1,
+                font=dict(color=t_text),
+                yaxis=dict(title=series.UNITS[h["unit"]], gridcolor=t_card_border),
+                xaxis=dict(gridcolor=t_card_border),
+                height=260, margin=dict(l=10, r=10, t=40, b=10),
+                showlegend=False
+            )
+            st.plotly_chart(fig_val, use_container_width=True)
 
     # ── Category breakdown donut
     st.markdown("<br>", unsafe_allow_html=True)
     st.markdown('<div class="section-title">📂 Category Breakdown</div>', unsafe_allow_html=True)
 
-    cat_data = {}
-    for h in habits:
-        rate = get_completion_rate(h["id"], n_days)
-        cat = h["category"]
-        if cat not in cat_data:
-            cat_data[cat] = []
-        cat_data[cat].append(rate)
-
-    cat_labels = list(cat_data.keys())
-    cat_vals = [sum(v)/len(v) for v in cat_data.values()]
-    colors_pie = ["#6c63ff","#f7971e","#06b6d4","#ec4899","#4ade80","#a78bfa"]
-
-    fig_donut = go.Figure(data=go.Pie(
-        labels=cat_labels, values=cat_vals,
-        hole=0.55,
-        marker=dict(colors=colors_pie[:len(cat_labels)]),
-        textinfo="label+percent",
-        insidetextorientation="radial",
-    ))
-    fig_donut.update_layout(
-        paper_bgcolor=t_bg, font=dict(color=t_text),
-        height=300, margin=dict(l=10, r=10, t=10, b=10),
-        showlegend=False,
-        annotations=[dict(text="Avg Rate", x=0.5, y=0.5, font_size=14, showarrow=False, font_color=t_text_muted)]
-    )
+    rates_n = {hid: hs["rate_n"] for hid, hs in habit_stats.items()}
+    fig_donut = charts.category_donut(*charts.category_rates(habits, rates_n), THEME)
     col_d1, col_d2 = st.columns([1, 1])
     with col_d1:
         st.plotly_chart(fig_donut, use_container_width=True)
     with col_d2:
         # Bar chart per habit
-        bar_habits = [h["name"] for h in habits]
-        bar_vals = [get_completion_rate(h["id"], n_days) for h in habits]
-        bar_colors = [h["color"] for h in habits]
-        fig_bar = go.Figure(go.Bar(
-            x=bar_vals, y=bar_habits, orientation="h",
-            marker=dict(color=bar_colors),
-            text=[f"{v:.0f}%" for v in bar_vals],
-            textposition="auto",
-        ))
-        fig_bar.update_layout(
-            paper_bgcolor=t_bg, plot_bgcolor=t_bg,
-            font=dict(color=t_text),
-            xaxis=dict(range=[0, 105], gridcolor=t_card_border),
-            yaxis=dict(gridcolor=t_card_border),
-            height=300, margin=dict(l=10, r=10, t=10, b=10),
-            showlegend=False
-        )
+        fig_bar = charts.habit_rate_bars(habits, rates_n, THEME)
         st.plotly_chart(fig_bar, use_container_width=True)
 
+    # ── Mood / duration / helped insights
+    st.markdown("<br>", unsafe_allow_html=True)
+    st.markdown('<div class="section-title">🧠 Mood & Impact Insights</div>', unsafe_allow_html=True)
+    st.caption("What your logged durations, moods and \"Did it help you?\" answers say about each habit.")
+
+    win_end = view_today
+    win_start = win_end - timedelta(days=n_days - 1)
+    ins = get_insights(data["version"], win_start, win_end, tuple(h["id"] for h in filtered_habits), data)
+
+    if not ins["logged"]:
+        st.info("No logged details in this time range yet.")
+    else:
+        names_by_id = {h["id"]: f"{h['icon']} {h['name']}" for h in filtered_habits}
+        corr = ins["mood_correlation"]
+        mood_counts = ins["mood_distribution"]
+        rated = mood_counts.sum()
+        avg_mood = (mood_counts.values * range(1, len(mood_counts) + 1)).sum() / rated if rated else 0
+
+        c_i1, c_i2, c_i3 = st.columns(3)
+        with c_i1:
+            st.markdown(f"""
+            <div class="stat-card" title="Completions with logged details in this range">
+                <div class="stat-number">{ins['logged']}</div>
+                <div class="stat-label">Logged Sessions</div>
+            </div>""", unsafe_allow_html=True)
+        with c_i2:
+            st.markdown(f"""
+            <div class="stat-card" title="Average mood on a 1 (😭) to 6 (🚀) scale">
+                <div class="stat-number">{avg_mood:.1f}</div>
+                <div class="stat-label">Average Mood</div>
+            </div>""", unsafe_allow_html=True)
+        with c_i3:
+            st.markdown(f"""
+            <div class="stat-card" title="Correlation between a day's average mood and how many habits you completed that day (-1 to 1)">
+                <div class="stat-number">{'—' if corr is None else f'{corr:+.2f}'}</div>
+                <div class="stat-label">Mood ↔ Completion</div>
+            </div>""", unsafe_allow_html=True)
+
+        col_m1, col_m2 = st.columns([1, 1])
+        with col_m1:
+            fig_mood = go.Figure(go.Bar(
+                x=mood_counts.index.tolist(), y=mood_counts.values,
+                marker=dict(color="#a78bfa"),
+            ))
+            fig_mood.update_layout(
+                title="Mood Distribution",
+                paper_bgcolor=t_bg, plot_bgcolor=t_bg,
+                font=dict(color=t_text),
+                yaxis=dict(gridcolor=t_card_border),
+                height=300, margin=dict(l=10, r=10, t=40, b=10),
+                showlegend=False
+            )
+            st.plotly_chart(fig_mood, use_container_width=True)
+        with col_m2:
+            wk = ins["weekly_minutes"]
+            wk = wk[wk.index.isin(list(names_by_id))]
+            fig_min = go.Figure(go.Bar(
+                x=wk.values, y=[names_by_id[i] for i in wk.index], orientation="h",
+                marker=dict(color="#06b6d4"),
+                text=[f"{v:.0f} min" for v in wk.values],
+                textposition="auto",
+            ))
+            fig_min.update_layout(
+                title="Avg Minutes per Week",
+                paper_bgcolor=t_bg, plot_bgcolor=t_bg,
+                font=dict(color=t_text),
+                xaxis=dict(gridcolor=t_card_border),
+                height=300, margin=dict(l=10, r=10, t=40, b=10),
+                showlegend=False
+            )
+            st.plotly_chart(fig_min, use_container_width=True)
+
+        helped = ins["helped"]
+        helped = helped[helped.index.isin(list(names_by_id))]
+        if not helped.empty:
+            fig_help = go.Figure(go.Bar(
+                x=helped["divergence"], y=[names_by_id[i] for i in helped.index], orientation="h",
+                marker=dict(color=["#1e8e3e" if v >= 0 else "#ef3c3f" for v in helped["divergence"]]),
+                text=[f"{r:.0f}% helped" for r in helped["helped_rate"]],
+                textposition="auto",
+            ))
+            fig_help.update_layout(
+                title="\"Did it help?\" vs. Average Across Habits (pts)",
+                paper_bgcolor=t_bg, plot_bgcolor=t_bg,
+                font=dict(color=t_text),
+                xaxis=dict(gridcolor=t_card_border, zerolinecolor=t_text_muted),
+                height=120 + 40 * len(helped), margin=dict(l=10, r=10, t=40, b=10),
+                showlegend=False
+            )
+            st.plotly_chart(fig_help, use_container_width=True)
+
 
     # ── Detailed Past Logs
     st.markdown("<br>", unsafe_allow_html=True)
@@ -829,14 +1252,14 @@ elif current_tab == "📊  History & Filters":
     # Gather logs for the selected habits over the filtered time period
     logs = []
     for i in range(n_days):
-        d = date.today() - timedelta(days=i)
+        d = view_today - timedelta(days=i)
         ds = str(d)
         if ds in data.get("completions", {}):
             for h in filtered_habits:
                 hid = str(h["id"])
                 if hid in data["completions"][ds]:
                     entry = data["completions"][ds][hid]
-                    if any(entry.values()): # If any details were actually logged
+                    if entry.has_details(): # If any details were actually logged
                         logs.append({
                             "date": d,
                             "habit_name": h["name"],
@@ -850,14 +1273,8 @@ elif current_tab == "📊  History & Filters":
     else:
         for log in logs:
             detail = log["detail"]
-            parts = []
-            if detail.get("duration"): parts.append(f"⏳ {detail['duration']}")
-            elif detail.get("time"): parts.append(f"⏱️ {detail['time']}")
-            if detail.get("mode"): parts.append(f"🎯 {detail['mode']}")
-            if detail.get("helped"): parts.append(f"💡 {detail['helped']}")
-            
-            details_line = " | ".join(parts)
-            notes_line = f"<div style='margin-top:10px; font-style:italic; padding:12px; background:{t_card_bg2}; border-radius:8px; border-left:4px solid {log['color']};'>\" {detail['notes']} \"</div>" if detail.get("notes") else ""
+            details_line = render.detail_parts(detail)
+            notes_line = f"<div style='margin-top:10px; font-style:italic; padding:12px; background:{t_card_bg2}; border-radius:8px; border-left:4px solid {log['color']};'>\" {detail.notes} \"</div>" if detail.notes else ""
             
             st.markdown(f"""
             <div class="habit-card" style="margin-bottom:10px; padding:16px;">
@@ -898,6 +1315,33 @@ elif current_tab == "💻  DSA Tracker":
         st.markdown(f'<div class="stat-card"><div class="stat-number" style="color:#ef3c3f;">{hard}</div><div class="stat-label">Hard</div></div>', unsafe_allow_html=True)
 
     st.markdown("<br>", unsafe_allow_html=True)
+
+    # ── Spaced repetition
+    queue = get_review_queue(data)
+    if len(queue):
+        st.markdown('<h3 style="margin-top:0; color:#6c63ff;">🔁 Due for Review</h3>', unsafe_allow_html=True)
+        st.caption("Solved problems come back on a spaced schedule. Grade how well you remembered the solution: the better you did, the longer until the next review.")
+        col_rt, col_rd = st.columns(2)
+        with col_rt: review_topics = st.multiselect("Topic", queue.topics(), key="review_topics")
+        with col_rd: review_diffs = st.multiselect("Difficulty", ["Easy", "Medium", "Hard"], key="review_difficulties")
+        due_now = queue.due(date.today(), set(review_topics), set(review_diffs), limit=srs.REVIEW_BATCH)
+        if not due_now:
+            st.success("Nothing due for review today 🎉")
+        elif len(due_now) == srs.REVIEW_BATCH:
+            st.caption(f"Showing the {srs.REVIEW_BATCH} most overdue.")
+        for p in due_now:
+            sched = srs.state(p)
+            overdue = (date.today() - date.fromisoformat(sched["due"])).days
+            col_p, *col_grades = st.columns([6, 1, 1, 1, 1])
+            with col_p:
+                link = f"[{p['name']}]({p['url']})" if p.get("url") else p["name"]
+                when = "due today" if overdue == 0 else f"{overdue} day{'s' if overdue != 1 else ''} overdue"
+                st.markdown(f"**{link}** <span style='color:{t_text_muted}; font-size:0.8rem;'>· {p['topic'] or 'No topic'} · {p['difficulty']} · {when} · {sched['reviews']} reviews</span>", unsafe_allow_html=True)
+            for col, (label, quality) in zip(col_grades, srs.GRADES.items()):
+                with col:
+                    if st.button(label, key=f"review_{p['id']}_{quality}", use_container_width=True):
+                        review_problem(data, p, quality)
+        st.markdown("<br>", unsafe_allow_html=True)
     
     # ── Simple form to add a new problem quickly
     with st.expander("➕ Add New Problem", expanded=False):
@@ -924,7 +1368,7 @@ elif current_tab == "💻  DSA Tracker":
                         "completed_on": None
                     })
                     data["dsa_problems"] = problems
-                    if save_data(data):
+                    if save_data(data, action="dsa_edit"):
                         st.rerun()
                 else:
                     st.error("Problem name is required.")
@@ -936,13 +1380,7 @@ elif current_tab == "💻  DSA Tracker":
         st.info("No problems added yet. Add one above!")
     else:
         # Prepare dataframe for data_editor
-        df_probs = pd.DataFrame(problems)
-        # Map status to a boolean 'Done' column
-        df_probs['Done'] = df_probs['status'] == 'completed'
-        
-        # Select and reorder columns for display
-        display_cols = ['Done', 'topic', 'name', 'difficulty', 'url', 'completed_on']
-        df_display = df_probs[display_cols].copy()
+        df_display = get_dsa_table(data["version"], problems)
         
         # Configure column types and names
         column_config = {
@@ -967,6 +1405,7 @@ elif current_tab == "💻  DSA Tracker":
         # Sync back to data dictionary if changes made
         if not edited_df.equals(df_display):
             new_problems = []
+            new_by_row = {}
             for i, row in edited_df.iterrows():
                 status = "completed" if row['Done'] else "open"
                 
@@ -994,9 +1433,21 @@ elif current_tab == "💻  DSA Tracker":
                     "status": status,
                     "completed_on": comp_date
                 })
+                # The review schedule isn't in the table: keep it while the problem stays solved
+                if row['Done'] and orig_row is not None and problems[i].get("srs"):
+                    new_problems[-1]["srs"] = problems[i]["srs"]
+                new_by_row[i] = new_problems[-1]
+
+            # Only rows the editor reports as touched can move the solved-per-day counts
+            editor_state = st.session_state.get("dsa_editor", {})
+            touched_rows = set(editor_state.get("edited_rows", {})) | set(editor_state.get("deleted_rows", []))
+            changes = [(problems[r] if r < len(problems) else None, new_by_row.get(r)) for r in touched_rows]
+            changes += [(None, p) for r, p in new_by_row.items() if r >= len(problems)]
+            touched_days = rules.update_dsa_index(rules.get_dsa_index(data), changes)
             
             data["dsa_problems"] = new_problems
-            if save_data(data):
+            rules.materialize(data, touched_days)
+            if save_data(data, action="dsa_edit"):
                 st.rerun()
 
 
@@ -1025,10 +1476,21 @@ elif current_tab == "⚙️  Manage Habits":
                 ["Mon","Tue","Wed","Thu","Fri","Sat","Sun"],
                 default=["Mon","Tue","Wed","Thu","Fri","Sat","Sun"]
             )
+            col_u, col_op, col_t = st.columns(3)
+            with col_u:
+                new_unit = st.selectbox("Tracked As", list(series.UNITS), format_func=series.UNITS.get)
+            with col_op:
+                new_op = st.selectbox("Target", list(series.TARGET_OPS), format_func=series.TARGET_OPS.get)
+            with col_t:
+                new_target = st.number_input("Target Value", min_value=0.0, value=1.0, step=1.0, help="Ignored for done / not done habits")
+            new_rule = st.selectbox("Auto-complete From", [None] + list(rules.RULE_SOURCES),
+                                    format_func=lambda k: "Nothing (log manually)" if k is None else rules.RULE_SOURCES[k],
+                                    help="Done / not done habits complete at 1 per day; quantitative habits use the target above")
             submitted = st.form_submit_button("✨ Add Habit", use_container_width=True)
             if submitted:
                 if new_name.strip():
-                    new_id = max((h["id"] for h in habits), default=0) + 1
+                    # Archived habits keep their ids: never hand one out again
+                    new_id = max((h["id"] for h in habits + data.get("archived_habits", [])), default=0) + 1
                     habits.append({
                         "id": new_id,
                         "name": new_name.strip(),
@@ -1037,13 +1499,44 @@ elif current_tab == "⚙️  Manage Habits":
                         "target_days": new_days,
                         "color": new_color,
                         "created": str(date.today()),
+                        "unit": new_unit,
+                        **({"target": float(new_target), "target_op": new_op} if new_unit != "check" else {}),
+                        **({"rule": {"source": new_rule, "min": 1}} if new_rule else {}),
                     })
-                    if save_data(data):
+                    if new_rule:
+                        rules.backfill(data, habits[-1])
+                    if save_data(data, action="habit_add"):
                         st.success(f"✅ '{new_name}' added!")
                         st.rerun()
                 else:
                     st.error("Please enter a habit name.")
 
+        # ── Link existing habits to a derived source
+        st.markdown("<br>", unsafe_allow_html=True)
+        with st.expander("🔗 Auto-complete Rules"):
+            st.caption("Link a habit to tracked activity so it checks itself off, e.g. 'DSA 2 Problems A day' from solved problems.")
+            if habits:
+                r_habit = st.selectbox("Habit", [h["name"] for h in habits], key="rule_habit")
+                r_h = next(h for h in habits if h["name"] == r_habit)
+                cur_rule = r_h.get("rule") or {}
+                r_source = st.selectbox("Source", [None] + list(rules.RULE_SOURCES),
+                                        index=([None] + list(rules.RULE_SOURCES)).index(cur_rule.get("source")),
+                                        format_func=lambda k: "Nothing (log manually)" if k is None else rules.RULE_SOURCES[k],
+                                        key="rule_source")
+                if series.is_quantitative(r_h):
+                    st.caption(f"Uses the habit's target: {series.TARGET_OPS[r_h.get('target_op', '>=')].lower()} {r_h.get('target', 1):g}.")
+                    r_min = 1
+                else:
+                    r_min = st.number_input("Minimum per day", min_value=1, value=int(cur_rule.get("min", 1)), step=1, key="rule_min")
+                if st.button("💾 Save Rule", use_container_width=True):
+                    if r_source:
+                        r_h["rule"] = {"source": r_source, "min": int(r_min)}
+                        rules.backfill(data, r_h)
+                    else:
+                        r_h.pop("rule", None)
+                    if save_data(data, action="habit_edit"):
+                        st.rerun()
+
         # ── Mark completions for past dates
         st.markdown("<br>", unsafe_allow_html=True)
         st.markdown('<div class="section-title">📅 Log Past Completion</div>', unsafe_allow_html=True)
@@ -1067,9 +1560,11 @@ elif current_tab == "⚙️  Manage Habits":
             for h in habits:
                 streak = calculate_streak(h["id"])
                 rate = get_completion_rate(h["id"])
-                col_h, col_del = st.columns([10, 1])
+                col_h, col_arch, col_del = st.columns([9, 1, 1])
                 with col_h:
                     days_txt = ", ".join(h.get("target_days", []))
+                    if series.is_quantitative(h) and h.get("target") is not None:
+                        days_txt += f" &nbsp;|&nbsp; 🎯 {series.TARGET_OPS[h.get('target_op', '>=')]} {series.format_value({'unit': h['unit']}, h['target'])}"
                     st.markdown(f"""
                     <div class="habit-card" style="border-left: 4px solid {h['color']};">
                         <div style="display:flex; justify-content:space-between; align-items:center;">
@@ -1081,25 +1576,153 @@ elif current_tab == "⚙️  Manage Habits":
                         </div>
                         <div style="margin-top:6px; font-size:0.75rem; color:{t_text_muted};">Added: {h.get('created','—')}</div>
                     </div>""", unsafe_allow_html=True)
+                with col_arch:
+                    st.markdown("<br><br>", unsafe_allow_html=True)
+                    if st.button("📦", key=f"arch_{h['id']}", help="Archive habit (keeps its history)"):
+                        if set_habit_archived(h["id"], True):
+                            st.rerun()
                 with col_del:
                     st.markdown("<br><br>", unsafe_allow_html=True)
                     if st.button("🗑️", key=f"del_{h['id']}", help="Delete habit"):
                         confirm_delete_dialog(h["id"], h["name"])
 
+        # ── Archived habits
+        archived_habits = data.get("archived_habits", [])
+        if archived_habits:
+            with st.expander(f"📦 Archived Habits ({len(archived_habits)})"):
+                st.caption("Archived habits are left out of the dashboard and stats. Their history is kept and can be viewed in History; restoring brings it all back.")
+                for h in archived_habits:
+                    col_ah, col_restore = st.columns([5, 2])
+                    with col_ah:
+                        st.markdown(f"{h['icon']} **{h['name']}** <span style='color:{t_text_muted}; font-size:0.8rem;'>· {h['category']} · archived {h.get('archived_on', '—')}</span>", unsafe_allow_html=True)
+                    with col_restore:
+                        if st.button("♻️ Restore", key=f"unarch_{h['id']}", use_container_width=True):
+                            if set_habit_archived(h["id"], False):
+                                st.rerun()
+
         # ── Reset data
         st.markdown("<br>", unsafe_allow_html=True)
         with st.expander("⚠️ Danger Zone"):
-            st.warning("This will delete ALL habits and history permanently.")
+            st.warning("This will delete ALL habits and history, including archived habits, the cold-tier archive, reviews and achievements. "
+                       "A full snapshot is taken first: undoing the reset from Recent Changes restores it, or pick the \"pre-reset\" backup under 💾 Backups.")
             if st.button("🔴 Reset All Data", type="secondary"):
                 db = get_db_conn()
-                if db is not None:
-                    db.habits.delete_many({})
-                    db.completions.delete_many({})
-                    db.dsa_problems.delete_many({})
-                    db.daily_notes.delete_many({})
+                if db is not None and reset_all_data(db) is None:
+                    st.stop()
                 st.session_state.clear()
                 st.rerun()
 
+        # ── Backups
+        with st.expander("💾 Backups"):
+            st.caption("Full backups stream every collection to compressed files; later ones store the changes since the previous backup plus reviews, achievements and archived history. A snapshot is taken automatically before every reset.")
+            backup_dir = get_backup_dir()
+            if st.button("💾 Back Up Now"):
+                db = get_db_conn()
+                if db is not None:
+                    m = backup.incremental_backup(db, backup_dir, archive=get_archive())
+                    st.toast(f"{m['kind'].title()} backup {m['id']} saved ({sum(m['rows'].values())} rows, {m['seconds']}s).")
+            backups = backup.list_backups(backup_dir)
+            if not backups:
+                st.info("No backups yet.")
+            else:
+                labels = {
+                    m["id"]: f"{m['created'][:16].replace('T', ' ')} UTC · {m['kind']}{' · ' + m['label'] if m['label'] else ''} · {sum(m['rows'].values())} rows"
+                    for m in backups[:20]
+                }
+                chosen = st.selectbox("Backup", list(labels), format_func=labels.get)
+                sure = st.checkbox("Replace all current data with this backup")
+                if st.button("♻️ Restore", disabled=not sure):
+                    db = get_db_conn()
+                    if db is not None:
+                        result = restore_backup(db, chosen)
+                        if result is not None:
+                            st.session_state.clear()
+                            st.toast(f"Restored {sum(result['rows'].values())} rows and {result['events']} changes in {result['seconds']}s."
+                                     + (f" Kept as they were (not in this backup): {', '.join(result['kept'])}." if result["kept"] else ""))
+                            get_cold_tier.clear()
+                            st.rerun()
+
+        # ── Store maintenance
+        with st.expander("🧹 Maintenance"):
+            st.caption("Runs in the background every few hours: removes history of deleted habits, duplicate rows, archives months older than a year, and rebuilds rollups and indexes.")
+            worker = get_maintenance_worker()
+            if worker is None:
+                st.info("Maintenance needs a database connection.")
+            else:
+                report = worker.last
+                if report is None:
+                    try:
+                        report = maintenance.last_report(get_read_db())
+                    except Exception:
+                        report = None
+                if worker.running:
+                    st.info("⏳ Maintenance is running…")
+                if report:
+                    started = report["started"].replace(tzinfo=timezone.utc).astimezone().strftime("%b %d, %H:%M")
+                    st.markdown(f"""
+                    **Last run:** {started} ({report['seconds']:.1f}s)  
+                    🗑️ {report['orphan_completions']} orphaned completions, {report['orphan_values']} orphaned values  
+                    ♻️ {report['duplicate_completions'] + report['duplicate_values'] + report['duplicate_notes']} duplicate rows  
+                    🧊 {report.get('archived_completions', 0)} completions and {report.get('archived_notes', 0)} notes moved to the archive  
+                    📊 {report['rollup_rows']} rollup rows rebuilt, {len(report['indexes'])} indexes checked
+                    """)
+                    removed = report["orphan_completions"] + report["orphan_values"]
+                    if removed and st.button(f"↩️ Restore the {removed} removed rows", disabled=worker.running,
+                                             help=f"Removed rows are kept for {maintenance.ORPHAN_TTL_DAYS} days."):
+                        restored = maintenance.restore_orphans(get_db_conn(), report["started"])
+                        st.toast(f"Restored {restored} rows." if restored else "Those rows are no longer kept.")
+                if worker.last_error:
+                    st.caption(f"Last attempt failed: {worker.last_error}")
+                if st.button("🧹 Run Now", disabled=worker.running):
+                    worker.trigger()
+                    st.toast("Maintenance started in the background.")
+
+        # ── Reminders
+        with st.expander("🔔 Reminders"):
+            scheduler = get_reminder_scheduler()
+            if scheduler is None:
+                st.info("Reminders are off. Add a [reminders] section with enabled = true to your secrets to get a nudge for pending habits and a weekly digest.")
+            else:
+                st.caption(f"Pending-habit reminder after {scheduler.reminder_time}, weekly digest on {scheduler.digest_day} after {scheduler.digest_time}.")
+                st.markdown(f"**Sent since the server started:** {scheduler.sent['reminder']} reminders, {scheduler.sent['digest']} digests")
+                if scheduler.last_error:
+                    st.caption(f"Last attempt failed: {scheduler.last_error}")
+                try:
+                    pending = reminders.due_not_done(get_db_conn(), date.today())
+                    st.caption("Still pending today: " + (", ".join(f"{h.get('icon', '⭐')} {h['name']}" for h in pending) or "nothing 🎉"))
+                except Exception as e:
+                    st.caption(f"Couldn't check today's habits: {e}")
+
+        # ── Change log
+        with st.expander("🕘 Recent Changes"):
+            st.caption("Every change is kept in a permanent log. Undo any of them, even after a reset.")
+            try:
+                ev_db = get_db_conn()
+                recent = events.recent_events(ev_db)
+                undone = events.undone_seqs(ev_db, [ev["seq"] for ev in recent])
+            except Exception as e:
+                recent, undone = [], set()
+                st.caption(f"Change log unavailable: {e}")
+            if not recent:
+                st.info("No changes recorded yet.")
+            for ev in recent:
+                col_ev, col_btn = st.columns([5, 2])
+                with col_ev:
+                    label = events.ACTION_LABELS.get(ev["action"], ev["action"])
+                    if "undoes" in ev: label += f" of #{ev['undoes']}"
+                    if "redoes" in ev: label += f" of #{ev['redoes']}"
+                    when = ev["ts"].replace(tzinfo=timezone.utc).astimezone().strftime("%b %d, %H:%M")
+                    st.markdown(f"**#{ev['seq']}** {label} <span style='color:{t_text_muted}; font-size:0.8rem;'>· {when}{' · undone' if ev['seq'] in undone else ''}</span>", unsafe_allow_html=True)
+                with col_btn:
+                    if ev["action"] not in ("undo", "redo"):
+                        if ev["seq"] in undone:
+                            if st.button("↪️ Redo", key=f"redo_ev_{ev['seq']}", use_container_width=True):
+                                if replay_event(ev["seq"], redo=True):
+                                    st.rerun()
+                        elif st.button("↩️ Undo", key=f"undo_ev_{ev['seq']}", use_container_width=True):
+                            if replay_event(ev["seq"]):
+                                st.rerun()
+
 # ══════════════════════════════════════════════
 # TAB 5 — Daily Notes
 # ══════════════════════════════════════════════
@@ -1141,7 +1764,7 @@ elif current_tab == "📝  Daily Notes":
                     notes.append({"date": date_str, "note": note_content})
                 
                 data["daily_notes"] = notes
-                if save_data(data):
+                if save_data(data, action="note_save"):
                     st.success("Note saved successfully!")
                     st.rerun()
 
@@ -1149,7 +1772,12 @@ elif current_tab == "📝  Daily Notes":
         st.markdown('<h3 style="margin-top:0px; color:#a78bfa;">📜 Past Notes</h3>', unsafe_allow_html=True)
         
         # Display past notes (excluding the currently selected date if we want, or just show all sorted)
-        sorted_notes = sorted(notes, key=lambda x: x["date"], reverse=True)
+        shown_notes = notes
+        cold = None if data.get("offline") else get_cold_tier()
+        if cold and st.toggle("Include archived notes", key="notes_archived", help="Notes older than a year are kept in the archive."):
+            hot_dates = {n["date"] for n in notes}
+            shown_notes = notes + [n for n in get_cold_notes(cold["token"]) if n["date"] not in hot_dates]
+        sorted_notes = get_sorted_notes(data["version"] + ("+archived" if shown_notes is not notes else ""), shown_notes)
         
         if not sorted_notes:
             st.info("No daily notes written yet.")
@@ -1183,6 +1811,36 @@ elif current_tab == "📝  Daily Notes":
                 """, unsafe_allow_html=True)
 
 
+# ─────────────────────────────────────────────
+# Connection status (refreshes on its own, never touches the network)
+# ─────────────────────────────────────────────
+@st.fragment(run_every=10)
+def connection_status():
+    status = db_status()
+    if status["state"] == "closed":
+        st.markdown("<span style='color:#1e8e3e; font-size:0.85rem;'>🟢 Database connected</span>", unsafe_allow_html=True)
+    elif status["state"] == "open":
+        st.markdown(f"<span style='color:#ef3c3f; font-size:0.85rem;'>🔴 Offline — retrying in {status['retry_in']:.0f}s</span>", unsafe_allow_html=True)
+        st.caption(status["last_error"] or "")
+    elif status["state"] == "missing":
+        st.markdown(f"<span style='color:{t_text_muted}; font-size:0.85rem;'>⚪ Offline mode (no database configured)</span>", unsafe_allow_html=True)
+    else:
+        st.markdown("<span style='color:#f7971e; font-size:0.85rem;'>🟡 Reconnecting…</span>", unsafe_allow_html=True)
+
+with st.sidebar:
+    st.markdown("<br>", unsafe_allow_html=True)
+    col_undo, col_redo = st.columns(2)
+    with col_undo:
+        if st.button("↩️ Undo", disabled=not st.session_state.get("undo_stack"), use_container_width=True, help="Undo your last change"):
+            if undo_last():
+                st.rerun()
+    with col_redo:
+        if st.button("↪️ Redo", disabled=not st.session_state.get("redo_stack"), use_container_width=True, help="Redo the last undone change"):
+            if redo_last():
+                st.rerun()
+    connection_status()
+
+
 # ─────────────────────────────────────────────
 # Footer
 # ─────────────────────────────────────────────
@@ -1191,3 +1849,6 @@ st.markdown(f"""
 <p style="text-align:center; color:{t_text_muted}; font-size:0.8rem;">
     🏆 Habit Tracker &nbsp;•&nbsp; Built with Streamlit &nbsp;•&nbsp; Data securely connected to MongoDB Server
 </p>""", unsafe_allow_html=True)
+
+# Everything for this tab is on screen; use the idle time to warm the others
+prefetch_other_tabs(current_tab, get_data())
@@ -0,0 +1,571 @@
+"""
+🏋️ Concurrent-session load test for the Habit Tracker.
+Drives N sessions of habit_tracker.py at once and reports rerun latency percentiles,
+MongoDB operations and memory per concurrency level. Two modes:
+
+    python loadtest.py --mongo-url mongodb://localhost:27017 --levels 1,8,32,64
+    python loadtest.py --mode apptest --levels 1,4,8 --iterations 3
+
+server (the default) measures what one deployment can take: it starts one `streamlit run`
+process per level (or targets --server-url) backed by the one MongoDB at --mongo-url, and
+connects N websocket clients to its /_stcore/stream endpoint. Each client speaks the
+frontend's protocol: it sends rerun requests carrying its widget states and reads the
+script's deltas back until the run finishes. Memory is the server process's RSS, Mongo ops
+are the server's serverStatus opcounters (so they include the verification reads). Use a
+throwaway database: the app writes to its "tracker" database and the seed step replaces it.
+
+apptest runs each session through streamlit.testing.v1.AppTest in its own process
+(AppTest isn't thread-safe), with a per-process mongomock stand-in unless --mongo-url is
+given. Every session has its own interpreter, Streamlit runtime and caches, so its numbers
+are the cost of one session, not the capacity of one server.
+
+Each session scripts a realistic visit: open the dashboard, log / uncheck habits through
+the checklist and the details dialog, walk History through every time range and add a
+DSA problem. The checklist is a custom component, so its click is sent as the component's
+value; the dialog's button goes as a rerun of the dialog's fragment, as in the browser.
+AppTest can't do either, so there the click is injected into session state and again
+together with the dialog's button (AppTest reruns the whole script). Every write step is
+checked against the database and counted as an error, not a timing, when the row didn't change.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+import uuid
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from unittest import mock
+
+import pymongo
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from streamlit.testing.v1 import AppTest
+from tornado.websocket import websocket_connect
+
+import store
+from records import Completion, Mood, Helped
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "habit_tracker.py")
+TIME_RANGES = ["Last 7 Days", "Last 14 Days", "Last 30 Days", "Last 90 Days", "Last 365 Days", "All Time"]
+MAX_MESSAGE = 256 * 2 ** 20  # plotly figures for All Time get big
+COUNTED_OPS = ["find", "find_one", "insert_one", "insert_many", "bulk_write", "replace_one", "update_one",
+               "delete_many", "delete_one", "find_one_and_update", "aggregate", "count_documents"]
+
+
+# ─────────────────────────────────────────────
+# Mongo stand-in & instrumentation
+# ─────────────────────────────────────────────
+class OpCounter:
+    """Counts collection method calls by wrapping them on the driver's Collection class."""
+
+    def __init__(self, collection_cls):
+        self.counts = Counter()
+        self._lock = threading.Lock()
+        self._originals = {}
+        for name in COUNTED_OPS:
+            original = getattr(collection_cls, name, None)
+            if original is None:
+                continue
+            self._originals[name] = original
+            setattr(collection_cls, name, self._wrap(name, original))
+        self.collection_cls = collection_cls
+
+    def _wrap(self, name, original):
+        def counted(coll, *args, **kwargs):
+            with self._lock:
+                self.counts[name] += 1
+            return original(coll, *args, **kwargs)
+        return counted
+
+    def take(self):
+        with self._lock:
+            counts, self.counts = self.counts, Counter()
+        return counts
+
+    def restore(self):
+        for name, original in self._originals.items():
+            setattr(self.collection_cls, name, original)
+
+
+def start_mongo(url):
+    """Return (url, client, collection class, patcher) for the database this process's sessions will use."""
+    if url:
+        return url, pymongo.MongoClient(url), pymongo.collection.Collection, None
+    try:
+        import mongomock
+    except ImportError:
+        sys.exit("mongomock is needed for the in-process stand-in (pip install mongomock), or pass --mongo-url")
+    # One in-memory server per process: every MongoClient the app creates here sees the same data
+    shared = mongomock.MongoClient()
+    patcher = mock.patch("pymongo.MongoClient", lambda *a, **k: shared)
+    patcher.start()
+    return "mongodb://loadtest", shared, mongomock.collection.Collection, patcher
+
+
+def seed(db, habits, days, problems):
+    for coll in ("habits", "completions", "habit_values", "dsa_problems", "daily_notes", "events", "snapshots", "counters",
+                 "achievements", "dsa_reviews", "completions_archive", "habit_values_archive", "archive_manifest"):
+        db[coll].delete_many({})
+    today = date.today()
+    rng = random.Random(7)
+    habit_rows = [
+        {"id": i, "name": f"Habit {i}", "icon": "⭐", "category": rng.choice(["Health", "Learning", "Wellness"]),
+         "target_days": ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"], "color": "#6c63ff", "unit": "check",
+         "created": str(today - timedelta(days=days))}
+        for i in range(1, habits + 1)
+    ]
+    db.habits.insert_many([store.habit_doc(h) for h in habit_rows])
+    completions = []
+    for n in range(1, days + 1):
+        day = str(today - timedelta(days=n))
+        for h in habit_rows:
+            if rng.random() < 0.7:
+                c = Completion(rng.choice([10, 20, 45, 90]), Mood(rng.randint(1, 6)), Helped(rng.choice([-1, 0, 1])))
+                completions.append({"date": day, "habit_id": str(h["id"]), **c.to_row()})
+    if completions:
+        db.completions.insert_many(completions)
+    if problems:
+        db.dsa_problems.insert_many([
+            {"id": i, "topic": "Array", "name": f"Problem {i}", "url": "", "difficulty": "Easy",
+             "status": "completed" if i % 2 else "open", "completed_on": str(today - timedelta(days=i % days)) if i % 2 else None}
+            for i in range(1, problems + 1)
+        ])
+    return len(habit_rows), len(completions)
+
+
+def is_logged(db, day, habit_id):
+    return db.completions.find_one({"date": day, "habit_id": {"$in": [str(habit_id), habit_id]}}) is not None
+
+
+# ─────────────────────────────────────────────
+# Scripted session: AppTest
+# ─────────────────────────────────────────────
+class Session:
+    def __init__(self, url, timeout, db, owns=lambda habit_id: True):
+        self.at = AppTest.from_file(APP, default_timeout=timeout)
+        self.at.secrets["connections"] = {"mongo": {"url": url}}
+        self.db = db
+        self.owns = owns
+        self.timings = []   # (step, seconds)
+        self.errors = Counter()
+
+    def run(self, step, action=None, verify=None):
+        start = time.perf_counter()
+        try:
+            (action() if action else self.at).run()
+        except Exception as e:
+            self.errors[f"{step}: {type(e).__name__}"] += 1
+            return False
+        elapsed = time.perf_counter() - start
+        if self.at.exception:
+            self.errors[f"{step}: script exception"] += 1
+            return False
+        if verify is not None and not verify():
+            self.errors[f"{step}: not persisted"] += 1
+            return False
+        self.timings.append((step, elapsed))
+        return True
+
+    def button(self, label):
+        return next(b for b in self.at.button if b.label == label)
+
+    def goto(self, tab):
+        return self.run("switch_tab", lambda: self.at.sidebar.radio[0].set_value(tab))
+
+    def _click(self, today, action, habit_id):
+        self.at.session_state[f"checklist_{today}"] = {"action": action, "habit_id": habit_id, "nonce": uuid.uuid4().hex}
+
+    def toggle_habits(self, count):
+        today = str(date.today())
+        data = self.at.session_state["data"]
+        done_today = data["completions"].get(today, {})
+        # Each session toggles its own habits, so another session's write never fails this one's check
+        habits = [h for h in data["habits"] if self.owns(h["id"])] or data["habits"]
+        for h in random.sample(habits, min(count, len(habits))):
+            action = "uncheck" if str(h["id"]) in done_today else "log"
+            self._click(today, action, h["id"])
+            if not self.run("checklist_click"):
+                continue
+            confirm = "Yes, Uncheck" if action == "uncheck" else "Save"
+
+            def save():
+                # The dialog only renders on a run with a fresh click, so the button needs one too
+                button = self.button(confirm)
+                self._click(today, action, h["id"])
+                return button.click()
+            self.run(f"{action}_save", save, lambda: is_logged(self.db, today, h["id"]) == (action == "log"))
+
+    def history(self):
+        self.goto("📊  History & Filters")
+        for r in TIME_RANGES:
+            self.run("history_range", lambda: next(s for s in self.at.selectbox if s.label == "Time Range").set_value(r))
+
+    def dsa(self):
+        self.goto("💻  DSA Tracker")
+        name = f"Load {uuid.uuid4().hex[:6]}"
+
+        def add_problem():
+            next(t for t in self.at.text_input if t.label == "Problem Name").set_value(name)
+            return self.button("Add Problem").click()
+        self.run("dsa_add", add_problem, lambda: self.db.dsa_problems.find_one({"name": name}) is not None)
+
+    def visit(self, toggles):
+        self.goto("📅  Today's Dashboard")
+        self.toggle_habits(toggles)
+        self.history()
+        self.dsa()
+
+
+def drive(job):
+    """One session in its own process: returns its timings, errors, Mongo ops and memory."""
+    url, args, index, n = job
+    url, client, collection_cls, patcher = start_mongo(url)
+    if patcher is not None:
+        seed(client["tracker"], args.habits, args.days, args.problems)
+    counter = OpCounter(collection_cls)
+    rss_before = rss_mb()
+    started = time.time()
+    session = Session(url, args.timeout, client["tracker"], lambda habit_id: habit_id % n == index)
+    if session.run("first_load"):
+        for _ in range(args.iterations):
+            session.visit(args.toggles)
+    return {"timings": session.timings, "errors": session.errors, "ops": counter.take(), "started": started,
+            "finished": time.time(), "rss_mb": rss_mb(), "rss_growth_mb": rss_mb() - rss_before}
+
+
+# ─────────────────────────────────────────────
+# Scripted session: websocket client against one server
+# ─────────────────────────────────────────────
+class WsSession:
+    """One browser tab: reruns the script over the server's websocket with its widget states, like the frontend."""
+
+    def __init__(self, url, timeout, db, owns=lambda habit_id: True):
+        self.url = url.rstrip("/").replace("http", "ws", 1) + "/_stcore/stream"
+        self.timeout = timeout
+        self.db = db
+        self.owns = owns
+        self.ws = None
+        self.states = {}    # widget id -> WidgetState, sent with every rerun
+        self.widgets = {}   # (element type, label) -> (widget proto, fragment id) from the latest run
+        self.cache = {}     # message hash -> ForwardMsg, for the server's ref_hash references
+        self.timings = []   # (step, seconds)
+        self.errors = Counter()
+
+    async def connect(self):
+        self.ws = await websocket_connect(self.url, subprotocols=["streamlit"], max_message_size=MAX_MESSAGE)
+
+    async def rerun(self, states=(), fragment_id=""):
+        """Send one rerun and read until the script finishes. False if the script raised."""
+        for state in states:
+            self.states[state.id] = state
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.fragment_id = fragment_id
+        msg.rerun_script.widget_states.widgets.extend(self.states.values())
+        # Button triggers are one-shot: the frontend drops them once sent
+        self.states = {k: v for k, v in self.states.items() if v.WhichOneof("value") != "trigger_value"}
+        await self.ws.write_message(msg.SerializeToString(), binary=True)
+        if not fragment_id:
+            self.widgets = {}
+        failed = False
+        deadline = time.monotonic() + self.timeout
+        while True:
+            raw = await asyncio.wait_for(self.ws.read_message(), deadline - time.monotonic())
+            if raw is None:
+                raise ConnectionError("server closed the websocket")
+            fwd = ForwardMsg.FromString(raw)
+            if fwd.WhichOneof("type") == "ref_hash":
+                fwd = self.cache.get(fwd.ref_hash)
+                if fwd is None:
+                    continue
+            elif fwd.metadata.cacheable:
+                self.cache[fwd.hash] = fwd
+            kind = fwd.WhichOneof("type")
+            if kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                element = fwd.delta.new_element
+                etype = element.WhichOneof("type")
+                failed |= etype == "exception"
+                widget = getattr(element, etype)
+                if getattr(widget, "id", ""):
+                    # Components are found by name (declared as "<module>.habit_checklist"), widgets by label
+                    label = widget.component_name.rsplit(".", 1)[-1] if etype == "component_instance" else getattr(widget, "label", "")
+                    self.widgets[(etype, label)] = (widget, fwd.delta.fragment_id)
+            elif kind == "script_finished" and fwd.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                return not failed and fwd.script_finished != ForwardMsg.FINISHED_WITH_COMPILE_ERROR
+
+    def state(self, etype, label, **value):
+        """The WidgetState that sets a widget of the latest run (None if it wasn't rendered)."""
+        found, _ = self.widgets.get((etype, label), (None, None))
+        if found is None:
+            return None
+        if "option" in value:
+            if value["option"] not in found.options:
+                return None
+            value = {"int_value": list(found.options).index(value.pop("option"))}
+        return WidgetState(id=found.id, **value)
+
+    async def run(self, step, *states, verify=None, fragment_id=""):
+        if any(state is None for state in states):
+            self.errors[f"{step}: widget not rendered"] += 1
+            return False
+        start = time.perf_counter()
+        try:
+            ok = await self.rerun(states, fragment_id)
+        except Exception as e:
+            self.errors[f"{step}: {type(e).__name__}"] += 1
+            return False
+        elapsed = time.perf_counter() - start
+        if not ok:
+            self.errors[f"{step}: script exception"] += 1
+            return False
+        if verify is not None and not await asyncio.to_thread(verify):
+            self.errors[f"{step}: not persisted"] += 1
+            return False
+        self.timings.append((step, elapsed))
+        return True
+
+    async def goto(self, tab):
+        return await self.run("switch_tab", self.state("radio", "Menu", option=tab))
+
+    def _click(self, action, habit_id):
+        state = self.state("component_instance", "habit_checklist")
+        if state is not None:
+            state.json_value = json.dumps({"action": action, "habit_id": habit_id, "nonce": uuid.uuid4().hex})
+        return state
+
+    async def toggle_habits(self, count):
+        today = str(date.today())
+        ids = [h["id"] for h in await asyncio.to_thread(lambda: list(self.db.habits.find({}, {"_id": 0, "id": 1})))]
+        # Each session toggles its own habits, so another session's write never fails this one's check
+        own = [i for i in ids if self.owns(i)] or ids
+        for hid in random.sample(own, min(count, len(own))):
+            action = "uncheck" if await asyncio.to_thread(is_logged, self.db, today, hid) else "log"
+            if not await self.run("checklist_click", self._click(action, hid)):
+                continue
+            # The dialog is a fragment: its button reruns just the dialog, as a click in the browser does
+            label = "Yes, Uncheck" if action == "uncheck" else "Save"
+            _, fragment_id = self.widgets.get(("button", label), (None, ""))
+            await self.run(f"{action}_save", self.state("button", label, trigger_value=True), fragment_id=fragment_id,
+                           verify=lambda: is_logged(self.db, today, hid) == (action == "log"))
+
+    async def history(self):
+        await self.goto("📊  History & Filters")
+        for r in TIME_RANGES:
+            await self.run("history_range", self.state("selectbox", "Time Range", option=r))
+
+    async def dsa(self):
+        await self.goto("💻  DSA Tracker")
+        name = f"Load {uuid.uuid4().hex[:6]}"
+        await self.run("dsa_add", self.state("text_input", "Problem Name", string_value=name),
+                       self.state("button", "Add Problem", trigger_value=True),
+                       verify=lambda: self.db.dsa_problems.find_one({"name": name}) is not None)
+
+    async def visit(self, toggles):
+        await self.goto("📅  Today's Dashboard")
+        await self.toggle_habits(toggles)
+        await self.history()
+        await self.dsa()
+
+
+async def drive_clients(url, args, n, db):
+    async def one(index):
+        session = WsSession(url, args.timeout, db, lambda habit_id: habit_id % n == index)
+        started = time.time()
+        try:
+            await session.connect()
+        except Exception as e:
+            session.errors[f"connect: {type(e).__name__}"] += 1
+        else:
+            if await session.run("first_load"):
+                for _ in range(args.iterations):
+                    await session.visit(args.toggles)
+            session.ws.close()
+        return {"timings": session.timings, "errors": session.errors, "started": started, "finished": time.time()}
+    return await asyncio.gather(*(one(i) for i in range(n)))
+
+
+def start_server(mongo_url, port, timeout=60):
+    """`streamlit run` from a scratch directory whose secrets point at mongo_url; returns (process, workdir)."""
+    workdir = tempfile.mkdtemp(prefix="habit-loadtest-")
+    os.makedirs(os.path.join(workdir, ".streamlit"))
+    with open(os.path.join(workdir, ".streamlit", "secrets.toml"), "w", encoding="utf-8") as f:
+        f.write(f"[connections.mongo]\nurl = {json.dumps(mongo_url)}\n")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", APP, "--server.headless", "true", "--server.port", str(port),
+         "--browser.gatherUsageStats", "false"],
+        cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + timeout
+    while time.time() < deadline and proc.poll() is None:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=2) as resp:
+                if resp.status == 200:
+                    return proc, workdir
+        except OSError:
+            pass  # not listening yet
+        time.sleep(0.25)
+    stop_server(proc, workdir)
+    sys.exit(f"streamlit run didn't come up on port {port}")
+
+
+def stop_server(proc, workdir):
+    proc.terminate()
+    try:
+        proc.wait(10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+def server_ops(client):
+    counters = client.admin.command("serverStatus")["opcounters"]
+    return Counter({k: v for k, v in counters.items() if isinstance(v, int)})
+
+
+# ─────────────────────────────────────────────
+# Reporting
+# ─────────────────────────────────────────────
+def rss_mb(pid="self"):
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        if pid != "self":
+            return None
+        # Not Linux: fall back to the peak, which is all getrusage knows
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def percentiles(values):
+    if len(values) < 2:
+        v = round(values[0] * 1000, 1) if values else None
+        return {"p50": v, "p95": v, "p99": v}
+    q = statistics.quantiles(values, n=100, method="inclusive")
+    return {"p50": round(q[49] * 1000, 1), "p95": round(q[94] * 1000, 1), "p99": round(q[98] * 1000, 1)}
+
+
+def summarize(n, results, mode):
+    elapsed = max(r["finished"] for r in results) - min(r["started"] for r in results)
+    by_step = {}
+    for r in results:
+        for step, secs in r["timings"]:
+            by_step.setdefault(step, []).append(secs)
+    all_runs = [secs for v in by_step.values() for secs in v]
+    return {
+        "mode": mode,
+        "sessions": n,
+        "reruns": len(all_runs),
+        "seconds": round(elapsed, 2),
+        "reruns_per_s": round(len(all_runs) / elapsed, 1) if elapsed else None,
+        "latency_ms": percentiles(all_runs),
+        "steps_ms": {step: percentiles(v) for step, v in sorted(by_step.items())},
+        "errors": dict(sum((r["errors"] for r in results), Counter())),
+    }
+
+
+def run_level(n, args, url):
+    """apptest mode: one process (and Streamlit runtime) per session."""
+    # spawn: every session gets a fresh interpreter and its own Streamlit runtime
+    with ProcessPoolExecutor(max_workers=n, mp_context=multiprocessing.get_context("spawn")) as pool:
+        results = list(pool.map(drive, [(url, args, i, n) for i in range(n)]))
+    ops = sum((r["ops"] for r in results), Counter())
+    return {
+        **summarize(n, results, "apptest"),
+        "mongo_ops": sum(ops.values()),
+        "mongo_ops_by_type": dict(ops.most_common()),
+        "rss_mb": round(sum(r["rss_mb"] for r in results), 1),
+        "rss_growth_mb": round(sum(r["rss_growth_mb"] for r in results), 1),
+    }
+
+
+def run_server_level(n, args):
+    """server mode: n websocket sessions on one `streamlit run` process and one MongoDB."""
+    # A fresh server per level (unless one was given), so caches and memory start from the same place
+    server = None if args.server_url else start_server(args.mongo_url, args.port, args.timeout)
+    url = args.server_url or f"http://127.0.0.1:{args.port}"
+    client = pymongo.MongoClient(args.mongo_url)
+    try:
+        rss_before = rss_mb(server[0].pid) if server else None
+        ops_before = server_ops(client)
+        results = asyncio.run(drive_clients(url, args, n, client["tracker"]))
+        ops = server_ops(client) - ops_before
+        rss_after = rss_mb(server[0].pid) if server else None
+    finally:
+        client.close()
+        if server:
+            stop_server(*server)
+    return {
+        **summarize(n, results, "server"),
+        "mongo_ops": sum(ops.values()),
+        "mongo_ops_by_type": dict(ops.most_common()),
+        "rss_mb": round(rss_after, 1) if rss_after is not None else None,
+        "rss_growth_mb": round(rss_after - rss_before, 1) if rss_after is not None and rss_before is not None else None,
+    }
+
+
+def print_level(r):
+    lat = r["latency_ms"]
+    # apptest memory is the sum over n separate processes: a per-session cost, not one server's footprint
+    memory = (f"server RSS {r['rss_mb']}MB (+{r['rss_growth_mb']})" if r["mode"] == "server"
+              else f"RSS {r['rss_mb']}MB over {r['sessions']} processes (+{r['rss_growth_mb']})")
+    print(f"{r['sessions']:>4} sessions | {r['reruns']:>5} reruns in {r['seconds']:>7}s ({r['reruns_per_s']}/s) | "
+          f"p50 {lat['p50']}ms p95 {lat['p95']}ms p99 {lat['p99']}ms | "
+          f"{r['mongo_ops']} mongo ops | {memory} | "
+          f"{sum(r['errors'].values())} errors")
+    for step, p in r["steps_ms"].items():
+        print(f"       {step:<16} p50 {p['p50']}ms  p95 {p['p95']}ms  p99 {p['p99']}ms")
+    for err, count in r["errors"].items():
+        print(f"       ! {err} x{count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test habit_tracker.py with concurrent sessions.")
+    parser.add_argument("--mode", choices=["server", "apptest"], default="server",
+                        help="server: websocket sessions on one streamlit run; apptest: one AppTest process per session")
+    parser.add_argument("--levels", default="1,2,4,8", help="comma-separated session counts to run in turn")
+    parser.add_argument("--iterations", type=int, default=2, help="scripted visits per session")
+    parser.add_argument("--toggles", type=int, default=2, help="habits logged / unchecked per visit")
+    parser.add_argument("--habits", type=int, default=8)
+    parser.add_argument("--days", type=int, default=180, help="days of seeded completion history")
+    parser.add_argument("--problems", type=int, default=50)
+    parser.add_argument("--timeout", type=float, default=60, help="per-rerun timeout in seconds")
+    parser.add_argument("--mongo-url", help="MongoDB the sessions share (required in server mode; apptest defaults to mongomock)")
+    parser.add_argument("--server-url", help="server mode: an already running app backed by --mongo-url, instead of starting one")
+    parser.add_argument("--port", type=int, default=8599, help="server mode: port for the server this script starts")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+    if args.mode == "server" and not args.mongo_url:
+        sys.exit("server mode needs --mongo-url: every session and the server share that database (or use --mode apptest)")
+    if args.mode == "apptest":
+        print("apptest mode: every session runs in its own process and runtime; figures are per-session cost, not server capacity")
+
+    results = []
+    for n in [int(x) for x in args.levels.split(",") if x.strip()]:
+        if args.mongo_url:
+            # Every level starts from the same data; mongomock sessions seed their own copy
+            n_habits, n_completions = seed(pymongo.MongoClient(args.mongo_url)["tracker"], args.habits, args.days, args.problems)
+            print(f"Seeded {n_habits} habits, {n_completions} completions, {args.problems} DSA problems")
+        results.append(run_server_level(n, args) if args.mode == "server" else run_level(n, args, args.mongo_url))
+        print_level(results[-1])
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
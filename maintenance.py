@@ -0,0 +1,281 @@
+"""
+🧹 Background maintenance for the Habit Tracker data store.
+A single worker thread per server process periodically cleans up MongoDB off the request
+path: removes completions / values whose habit no longer exists, drops duplicate
+(date, habit_id) rows, moves closed months past the hot window into the Parquet archive
+(tiering.py), rebuilds the monthly rollups and makes sure the indexes exist.
+A lease document keeps several server processes from running it at the same time.
+"""
+
+import os
+import socket
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pymongo
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+import tiering
+
+LEASE_SECONDS = 15 * 60
+
+INDEXES = {
+    "habits": [[("id", pymongo.ASCENDING)]],
+    "completions": [[("date", pymongo.ASCENDING), ("habit_id", pymongo.ASCENDING)],
+                    [("habit_id", pymongo.ASCENDING), ("date", pymongo.ASCENDING)]],
+    "habit_values": [[("habit_id", pymongo.ASCENDING), ("date", pymongo.ASCENDING)]],
+    "completions_archive": [[("habit_id", pymongo.ASCENDING), ("date", pymongo.ASCENDING)]],
+    "habit_values_archive": [[("habit_id", pymongo.ASCENDING), ("date", pymongo.ASCENDING)]],
+    "dsa_problems": [[("id", pymongo.ASCENDING)], [("completed_on", pymongo.ASCENDING)]],
+    "daily_notes": [[("date", pymongo.ASCENDING)]],
+}
+ORPHAN_TTL_DAYS = 30
+
+
+# ─────────────────────────────────────────────
+# In-memory helpers
+# ─────────────────────────────────────────────
+def prune_empty_days(completions):
+    """Drop {day: {}} entries left behind by unchecks and deletes. Returns how many were removed."""
+    empty = [d for d, comps in completions.items() if not comps]
+    for d in empty:
+        del completions[d]
+    return len(empty)
+
+
+# ─────────────────────────────────────────────
+# Store maintenance tasks
+# ─────────────────────────────────────────────
+ORPHAN_COLLECTIONS = ("completions", "habit_values", "completions_archive", "habit_values_archive")
+
+
+def _habit_ids(db):
+    # Archived habits are still in `habits`, so their partitions are kept too
+    ids = [h["id"] for h in db.habits.find({}, {"_id": 0, "id": 1}) if h.get("id") is not None]
+    return set(str(i) for i in ids) | set(int(i) for i in ids)
+
+
+def remove_orphans(db, started=None):
+    """
+    Delete completions / values whose habit no longer exists. Only rows written before the
+    habit list was read are candidates, the list is read again right before deleting (a
+    habit added in between keeps its rows), and every removed row is copied to
+    `orphans_removed` first, so restore_orphans() can put a run back within ORPHAN_TTL_DAYS.
+    """
+    started = started or datetime.now(timezone.utc)
+    cutoff = ObjectId.from_datetime(started)
+    removed = {coll: 0 for coll in ORPHAN_COLLECTIONS}
+    keep = _habit_ids(db)
+    if not keep:
+        # No habits at all is far more likely a bad read than a real state: never wipe on it
+        return removed
+    for coll in ORPHAN_COLLECTIONS:
+        rows = list(db[coll].find({"_id": {"$lt": cutoff}, "habit_id": {"$nin": list(keep)}}))
+        if not rows:
+            continue
+        keep = _habit_ids(db)
+        rows = [r for r in rows if r["habit_id"] not in keep]
+        if not rows or not keep:
+            continue
+        db.orphans_removed.insert_many([{"coll": coll, "doc": r, "removed_at": started} for r in rows])
+        ids = [r["_id"] for r in rows]
+        for i in range(0, len(ids), 1000):
+            # The habit filter again: a row re-pointed at a live habit meanwhile stays
+            removed[coll] += db[coll].delete_many({"_id": {"$in": ids[i:i + 1000]}, "habit_id": {"$nin": list(keep)}}).deleted_count
+    db.rollups.delete_many({"habit_id": {"$nin": [k for k in keep if isinstance(k, str)]}})
+    return removed
+
+
+def orphan_runs(db):
+    """Clean-up runs whose removed rows can still be restored: [{"removed_at", "rows"}], newest first."""
+    return [{"removed_at": g["_id"], "rows": g["rows"]} for g in db.orphans_removed.aggregate([
+        {"$group": {"_id": "$removed_at", "rows": {"$sum": 1}}}, {"$sort": {"_id": -1}},
+    ])]
+
+
+def restore_orphans(db, removed_at):
+    """Put back the rows one remove_orphans() run deleted (removed_at is its report's "started")."""
+    restored = 0
+    for entry in db.orphans_removed.find({"removed_at": removed_at}):
+        db[entry["coll"]].replace_one({"_id": entry["doc"]["_id"]}, entry["doc"], upsert=True)
+        restored += 1
+    db.orphans_removed.delete_many({"removed_at": removed_at})
+    return restored
+
+
+def remove_duplicates(db, coll, key_fields):
+    """Keep the newest row per key, delete the rest."""
+    pipeline = [
+        {"$group": {"_id": {f: f"${f}" for f in key_fields}, "ids": {"$push": "$_id"}, "n": {"$sum": 1}}},
+        {"$match": {"n": {"$gt": 1}}},
+    ]
+    stale = []
+    for group in db[coll].aggregate(pipeline, allowDiskUse=True):
+        stale.extend(sorted(group["ids"])[:-1])
+    removed = 0
+    for i in range(0, len(stale), 1000):
+        removed += db[coll].delete_many({"_id": {"$in": stale[i:i + 1000]}}).deleted_count
+    return removed
+
+
+def rebuild_rollups(db):
+    """
+    Per habit per month: completions and logged minutes, materialized into `rollups`.
+    Months already moved to the cold tier keep the rollups computed while they were hot.
+    """
+    first = db.completions.find_one({}, {"_id": 0, "date": 1}, sort=[("date", pymongo.ASCENDING)])
+    if first is None:
+        return db.rollups.estimated_document_count()
+    rows = list(db.completions.aggregate([
+        {"$group": {
+            "_id": {"habit_id": {"$toString": "$habit_id"}, "month": {"$substrCP": ["$date", 0, 7]}},
+            "done": {"$sum": 1},
+            "minutes": {"$sum": {"$ifNull": ["$minutes", 0]}},
+        }},
+        {"$project": {"_id": 0, "habit_id": "$_id.habit_id", "month": "$_id.month", "done": 1, "minutes": 1}},
+    ], allowDiskUse=True))
+    db.rollups.delete_many({"month": {"$gte": str(first["date"])[:7]}})
+    if rows:
+        db.rollups.insert_many(rows)
+    return db.rollups.estimated_document_count()
+
+
+def ensure_indexes(db):
+    created = []
+    for coll, specs in INDEXES.items():
+        for spec in specs:
+            created.append(f"{coll}.{db[coll].create_index(spec)}")
+    db.rollups.create_index([("habit_id", pymongo.ASCENDING), ("month", pymongo.ASCENDING)])
+    ttl = ORPHAN_TTL_DAYS * 86400
+    try:
+        created.append(f"orphans_removed.{db.orphans_removed.create_index('removed_at', expireAfterSeconds=ttl)}")
+    except OperationFailure:
+        # An older non-TTL index on the same key: replace it
+        db.orphans_removed.drop_index("removed_at_1")
+        created.append(f"orphans_removed.{db.orphans_removed.create_index('removed_at', expireAfterSeconds=ttl)}")
+    return created
+
+
+def run_maintenance(db, archive=None):
+    started = datetime.now(timezone.utc)
+    orphans = remove_orphans(db, started)
+    # Archive after cleanup so orphans and duplicates never reach the cold tier
+    dupes = {
+        "duplicate_completions": remove_duplicates(db, "completions", ["date", "habit_id"]),
+        "duplicate_values": remove_duplicates(db, "habit_values", ["date", "habit_id"]),
+        "duplicate_notes": remove_duplicates(db, "daily_notes", ["date"]),
+    }
+    # Rollups first: the months about to go cold are still in the hot tier
+    rollup_rows = rebuild_rollups(db)
+    archived = tiering.archive_closed_months(db, archive) if archive is not None else {}
+    report = {
+        "started": started,
+        "orphan_completions": orphans["completions"] + orphans["completions_archive"],
+        "orphan_values": orphans["habit_values"] + orphans["habit_values_archive"],
+        **dupes,
+        "archived_completions": archived.get("completions", 0),
+        "archived_notes": archived.get("daily_notes", 0),
+        "rollup_rows": rollup_rows,
+        "indexes": ensure_indexes(db),
+    }
+    report["finished"] = datetime.now(timezone.utc)
+    report["seconds"] = (report["finished"] - started).total_seconds()
+    db.maintenance_runs.insert_one(dict(report))
+    return report
+
+
+def last_report(db):
+    return db.maintenance_runs.find_one({}, {"_id": 0}, sort=[("started", pymongo.DESCENDING)])
+
+
+# ─────────────────────────────────────────────
+# Worker
+# ─────────────────────────────────────────────
+def acquire_lease(db, owner, seconds=LEASE_SECONDS):
+    now = datetime.now(timezone.utc)
+    try:
+        db.locks.find_one_and_update(
+            {"_id": "maintenance", "$or": [{"expires": {"$lt": now}}, {"owner": owner}]},
+            {"$set": {"owner": owner, "expires": now + timedelta(seconds=seconds)}},
+            upsert=True,
+        )
+        return True
+    except DuplicateKeyError:
+        # Someone else holds an unexpired lease
+        return False
+
+
+def release_lease(db, owner):
+    db.locks.delete_one({"_id": "maintenance", "owner": owner})
+
+
+class MaintenanceWorker:
+    def __init__(self, get_db, interval_hours=6.0, first_delay=60.0, archive=None):
+        self.get_db = get_db
+        self.archive = archive
+        self.interval = interval_hours * 3600
+        self.first_delay = first_delay
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.last = None
+        self.last_error = None
+        self.running = False
+        self._trigger = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="maintenance", daemon=True)
+        self._thread.start()
+
+    def trigger(self):
+        """Ask for a run as soon as possible without waiting for it."""
+        self._trigger.set()
+
+    def _loop(self):
+        delay = self.first_delay
+        while True:
+            self._trigger.wait(delay)
+            self._trigger.clear()
+            delay = self.interval
+            try:
+                db = self.get_db()
+            except Exception as e:
+                # Breaker open or no credentials: try again on the next cycle
+                self.last_error = str(e)
+                continue
+            if not acquire_lease(db, self.owner):
+                continue
+            self.running = True
+            try:
+                self.last = run_maintenance(db, self.archive)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+            finally:
+                self.running = False
+                release_lease(db, self.owner)
+
+
+def main():
+    import argparse
+    import api
+
+    parser = argparse.ArgumentParser(description="Run store maintenance or undo its orphan clean-up.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("run")
+    sub.add_parser("list-orphans", help="clean-up runs whose removed rows can still be restored")
+    r = sub.add_parser("restore-orphans", help="put back the rows one run removed")
+    r.add_argument("started", type=datetime.fromisoformat, help="the run's start time, as shown by list-orphans (UTC)")
+    args = parser.parse_args()
+
+    db = api.get_db()
+    if args.cmd == "run":
+        report = run_maintenance(db)
+        print(f"Done in {report['seconds']:.1f}s: {report['orphan_completions']} orphaned completions, {report['orphan_values']} orphaned values removed")
+    elif args.cmd == "list-orphans":
+        for run in orphan_runs(db):
+            print(f"{run['removed_at'].replace(tzinfo=timezone.utc).isoformat()}  {run['rows']} rows")
+    else:
+        started = args.started if args.started.tzinfo else args.started.replace(tzinfo=timezone.utc)
+        print(f"Restored {restore_orphans(db, started)} rows")
+
+
+if __name__ == "__main__":
+    main()
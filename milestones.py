@@ -0,0 +1,166 @@
+"""
+🏅 Achievements and milestones for the Habit Tracker.
+Rules: 7 / 30 / 100 day streaks per habit, perfect weeks (every scheduled habit-day of a
+Mon-Sun week done) and 10 / 50 / 100 DSA problems solved. Achievements are earned once,
+stored in the `achievements` collection with the day they were earned, and never revoked.
+
+Each write only re-checks what its patches touched: the streak run through a logged day,
+the week around it, the solved count when a DSA problem changes. History is scanned once,
+by backfill(), which does the whole thing with a few array operations over the
+(habits x days) completion matrix.
+"""
+
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import pymongo
+from pymongo import UpdateOne
+
+import trends
+
+STREAKS = (7, 30, 100)
+DSA_SOLVED = (10, 50, 100)
+
+
+def streak_doc(habit, n, earned_on):
+    return {"_id": f"streak:{n}:{habit['id']}", "kind": "streak", "n": n, "habit_id": habit["id"],
+            "title": f"{n}-day streak", "detail": f"{habit.get('icon', '⭐')} {habit['name']}",
+            "icon": "🔥" if n < 100 else "💯", "earned_on": str(earned_on)}
+
+
+def week_doc(monday, earned_on):
+    year, week, _ = monday.isocalendar()
+    return {"_id": f"perfect_week:{year}-W{week:02d}", "kind": "perfect_week", "week": str(monday),
+            "title": "Perfect week", "detail": f"Week of {monday:%b %d, %Y}", "icon": "🌟", "earned_on": str(earned_on)}
+
+
+def dsa_doc(n, earned_on):
+    return {"_id": f"dsa_solved:{n}", "kind": "dsa_solved", "n": n, "title": f"{n} problems solved",
+            "detail": "DSA Tracker", "icon": "🧠", "earned_on": str(earned_on)}
+
+
+# ─────────────────────────────────────────────
+# Incremental rules
+# ─────────────────────────────────────────────
+def _run_through(completions, hid, day):
+    """(first day, length) of the consecutive-day run containing `day`."""
+    start, end = day, day
+    while hid in completions.get(str(start - timedelta(days=1)), ()):
+        start -= timedelta(days=1)
+    while hid in completions.get(str(end + timedelta(days=1)), ()):
+        end += timedelta(days=1)
+    return start, (end - start).days + 1
+
+
+def streak_achievements(completions, habit, day):
+    hid = str(habit["id"])
+    if hid not in completions.get(str(day), ()):
+        return []
+    start, length = _run_through(completions, hid, day)
+    return [streak_doc(habit, n, start + timedelta(days=n - 1)) for n in STREAKS if length >= n]
+
+
+def perfect_week(completions, habits, day):
+    monday = day - timedelta(days=day.weekday())
+    days = pd.date_range(monday, periods=7, freq="D")
+    sched = trends.scheduled_mask(habits, days)
+    done = trends.done_matrix(completions, habits, days)
+    if not sched.any() or (sched & ~done).any():
+        return []
+    last = 6 - int(np.argmax(sched.any(axis=0)[::-1]))
+    return [week_doc(monday, monday + timedelta(days=last))]
+
+
+def dsa_achievements(problems, today=None):
+    solved = sorted(str(p.get("completed_on") or today or date.today()) for p in problems if p.get("status") == "completed")
+    return [dsa_doc(n, solved[n - 1]) for n in DSA_SOLVED if len(solved) >= n]
+
+
+def evaluate(data, patches, today=None):
+    """Achievements the written patches may have earned (already-earned ones included; record() skips them)."""
+    habits = {str(h["id"]): h for h in data["habits"]}
+    completions = data["completions"]
+    docs, weeks, dsa = [], set(), False
+    for p in patches:
+        kind = p["k"][0]
+        if kind == "completion" and p["a"] is not None and p["k"][2] in habits:
+            day = date.fromisoformat(p["k"][1])
+            docs += streak_achievements(completions, habits[p["k"][2]], day)
+            weeks.add(day - timedelta(days=day.weekday()))
+        elif kind == "dsa" and p["a"] is not None:
+            dsa = True
+    for monday in weeks:
+        docs += perfect_week(completions, data["habits"], monday)
+    if dsa:
+        docs += dsa_achievements(data.get("dsa_problems", []), today)
+    return docs
+
+
+# ─────────────────────────────────────────────
+# Storage
+# ─────────────────────────────────────────────
+def record(db, docs):
+    """Store achievements not earned before; returns just the new ones."""
+    if not docs:
+        return []
+    docs = list({d["_id"]: d for d in docs}.values())
+    now = datetime.now(timezone.utc)
+    result = db.achievements.bulk_write(
+        [UpdateOne({"_id": d["_id"]}, {"$setOnInsert": {**d, "recorded_at": now}}, upsert=True) for d in docs],
+        ordered=False,
+    )
+    return [docs[i] for i in sorted(result.upserted_ids)]
+
+
+def on_write(db, data, patches, today=None):
+    return record(db, evaluate(data, patches, today))
+
+
+def load(db):
+    return list(db.achievements.find({}, {"recorded_at": 0}).sort([("earned_on", pymongo.DESCENDING), ("_id", 1)]))
+
+
+# ─────────────────────────────────────────────
+# One-off backfill
+# ─────────────────────────────────────────────
+def backfill_docs(completions, habits, problems, today=None):
+    """Every achievement already earned in the given history, from one (habits x days) matrix."""
+    today = today or date.today()
+    docs = dsa_achievements(problems, today)
+    if not completions or not habits:
+        return docs
+    first = date.fromisoformat(min(completions))
+    monday = first - timedelta(days=first.weekday())
+    sunday = today + timedelta(days=6 - today.weekday())
+    days = pd.date_range(monday, sunday, freq="D")
+    done = trends.done_matrix(completions, habits, days)
+    sched = trends.scheduled_mask(habits, days)
+
+    # Run length ending at each day: distance to the last miss before it
+    idx = np.arange(len(days))
+    last_miss = np.maximum.accumulate(np.where(done, -1, idx), axis=1)
+    run = idx - last_miss
+    for n in STREAKS:
+        reached = run >= n
+        hit = reached.any(axis=1)
+        first_day = reached.argmax(axis=1)
+        for i in np.flatnonzero(hit):
+            docs.append(streak_doc(habits[i], n, days[first_day[i]].date()))
+
+    # Weeks where nothing scheduled was missed (days still ahead count as missed)
+    weeks_sched = sched.reshape(len(habits), -1, 7).any(axis=0)
+    weeks_missed = (sched & ~done).reshape(len(habits), -1, 7).any(axis=(0, 2))
+    for w in np.flatnonzero(weeks_sched.any(axis=1) & ~weeks_missed):
+        last = 6 - int(np.argmax(weeks_sched[w][::-1]))
+        docs.append(week_doc(days[w * 7].date(), days[w * 7 + last].date()))
+    return docs
+
+
+def backfill(db, completions, habits, problems, today=None):
+    """Scan history once per database; later achievements come from on_write()."""
+    if db.counters.find_one({"_id": "achievements"}):
+        return 0
+    earned = record(db, backfill_docs(completions, habits, problems, today))
+    db.counters.update_one({"_id": "achievements"}, {"$set": {"backfilled_at": datetime.now(timezone.utc)}}, upsert=True)
+    return len(earned)
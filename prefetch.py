@@ -0,0 +1,74 @@
+"""
+⏩ Idle-time prefetch for the Habit Tracker.
+After a tab has rendered, the app queues the cached computations behind the views a user
+is likely to open next (the other tabs' default state). One low-priority worker thread per
+server process runs them, so switching tabs hits a warm cache.
+
+Work is bounded and cancellable: a session's new rerun cancels whatever it still had
+queued, each job has a time budget, stale jobs are dropped, and the worker pauses between
+tasks so foreground reruns get the interpreter first.
+"""
+
+import queue
+import threading
+import time
+
+
+class Prefetcher:
+    def __init__(self, budget_s=2.0, pause_s=0.02, max_age_s=30.0, max_queue=64):
+        self.budget_s = budget_s
+        self.pause_s = pause_s
+        self.max_age_s = max_age_s
+        self.stats = {"done": 0, "cancelled": 0, "expired": 0, "failed": 0, "dropped": 0}
+        self.last_error = None
+        self._gen = {}            # session id -> latest generation
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._loop, name="prefetch", daemon=True)
+        self._thread.start()
+
+    def submit(self, session_id, tasks):
+        """Queue [(name, fn, args)] for a session, replacing anything it still had pending."""
+        with self._lock:
+            gen = self._gen.get(session_id, 0) + 1
+            self._gen[session_id] = gen
+        try:
+            self._queue.put_nowait((session_id, gen, time.monotonic(), list(tasks)))
+        except queue.Full:
+            # Server is busy: prefetching is the first thing to give up
+            self.stats["dropped"] += 1
+
+    def cancel(self, session_id):
+        with self._lock:
+            if session_id in self._gen:
+                self._gen[session_id] += 1
+
+    def _current(self, session_id, gen):
+        with self._lock:
+            return self._gen.get(session_id) == gen
+
+    def _loop(self):
+        while True:
+            session_id, gen, queued_at, tasks = self._queue.get()
+            if time.monotonic() - queued_at > self.max_age_s:
+                self.stats["expired"] += 1
+                continue
+            started = time.monotonic()
+            for name, fn, args in tasks:
+                if not self._current(session_id, gen):
+                    self.stats["cancelled"] += 1
+                    break
+                if time.monotonic() - started > self.budget_s:
+                    self.stats["expired"] += 1
+                    break
+                try:
+                    fn(*args)
+                    self.stats["done"] += 1
+                except Exception as e:
+                    self.stats["failed"] += 1
+                    self.last_error = f"{name}: {e}"
+                time.sleep(self.pause_s)
+            with self._lock:
+                # Forget finished sessions so the map doesn't grow forever
+                if self._gen.get(session_id) == gen:
+                    del self._gen[session_id]
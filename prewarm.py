@@ -0,0 +1,167 @@
+"""
+🔥 Server-start prewarm for the Habit Tracker.
+Starts the Streamlit server in this process and, alongside it, does everything the first
+visitor would otherwise wait for: imports the heavy modules, opens the MongoDB pool and
+pings it (the same ConnectionManager the app gets, via connection.shared), loads the
+shared data snapshot (store.shared_state) and builds the default History and trend figures
+once so Plotly and NumPy are warm. Use it as the container command:
+
+    python prewarm.py --ready-file /tmp/habit-tracker.ready --ready-port 8502 -- --server.port 8501
+
+Readiness for the orchestrator: the ready file appears (with the step timings as JSON) and
+GET :ready-port/ready turns from 503 to 200 once the warm-up is done and Streamlit's own
+/_stcore/health answers on the server port. A failed warm-up step is reported but doesn't
+block readiness; the app copes with a cold cache, just slower.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import urllib.request
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "habit_tracker.py")
+DEFAULT_DAYS = 7  # the History tab's default range
+DEFAULT_PORT = 8501
+
+STATUS = {"state": "starting", "steps": {}, "errors": {}}
+
+
+def _step(name, fn):
+    started = time.perf_counter()
+    try:
+        result = fn()
+    except Exception as e:
+        STATUS["errors"][name] = str(e)
+        result = None
+    STATUS["steps"][name] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def _imports():
+    import numpy  # noqa: F401
+    import pandas  # noqa: F401
+    import plotly.graph_objects  # noqa: F401
+    import pyarrow.parquet  # noqa: F401
+    import charts  # noqa: F401
+    import trends  # noqa: F401
+
+
+def _figures(data):
+    import charts
+    import trends
+    from report import THEME  # colors don't matter here, only the code paths
+    today = date.today()
+    habits = data["habits"]
+    frame = charts.history_frame(data, today, DEFAULT_DAYS, {h["id"] for h in habits})
+    if frame is None:
+        return
+    stats = charts.habit_stats(data, today, DEFAULT_DAYS)
+    rates = {hid: s["rate_n"] for hid, s in stats.items()}
+    figures = [
+        charts.completion_line(frame["daily"], THEME),
+        charts.completion_heatmap(frame["pivot"], THEME),
+        charts.category_donut(*charts.category_rates(habits, rates), THEME),
+        charts.habit_rate_bars(habits, rates, THEME),
+    ]
+    trends.compute(data["completions"], habits, today)
+    for fig in figures:
+        fig.to_json()  # what st.plotly_chart does with it; loads the validators and encoders
+
+
+def server_port(streamlit_args):
+    """The port `streamlit run` will bind: --server.port, then STREAMLIT_SERVER_PORT, then the default."""
+    for i, arg in enumerate(streamlit_args):
+        if arg.startswith("--server.port="):
+            return int(arg.split("=", 1)[1])
+        if arg == "--server.port" and i + 1 < len(streamlit_args):
+            return int(streamlit_args[i + 1])
+    return int(os.environ.get("STREAMLIT_SERVER_PORT", DEFAULT_PORT))
+
+
+def _wait_for_server(port, poll_s=0.25):
+    url = f"http://127.0.0.1:{port}/_stcore/health"
+    while True:
+        try:
+            with urllib.request.urlopen(url, timeout=2) as resp:
+                if resp.status == 200:
+                    return
+        except OSError:
+            pass  # not listening yet
+        time.sleep(poll_s)
+
+
+def warm(conf, port=DEFAULT_PORT):
+    import connection
+    import store
+
+    _step("imports", _imports)
+    db = None
+    if conf.get("url"):
+        manager = connection.shared(conf)
+        db = _step("connect", manager.get)
+    data = _step("snapshot", lambda: store.shared_state(db)) if db is not None else None
+    if data is not None:
+        _step("figures", lambda: _figures(data))
+    # Warm is not enough: ready means Streamlit is accepting connections too
+    _step("server", lambda: _wait_for_server(port))
+    STATUS["state"] = "ready"
+
+
+def _serve_ready(port):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            ready = STATUS["state"] == "ready"
+            body = json.dumps(STATUS).encode("utf-8")
+            self.send_response(200 if ready else 503)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+    threading.Thread(target=server.serve_forever, name="ready-endpoint", daemon=True).start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Streamlit app with a prewarm phase and a readiness signal.")
+    parser.add_argument("--ready-file", help="created once warm (removed at start)")
+    parser.add_argument("--ready-port", type=int, help="serve GET /ready on this port")
+    parser.add_argument("streamlit_args", nargs="*", help="passed to `streamlit run` (put them after --)")
+    args = parser.parse_args()
+
+    import api
+    conf = api.read_secrets().get("connections", {}).get("mongo", {})
+
+    if args.ready_file and os.path.exists(args.ready_file):
+        os.remove(args.ready_file)
+    if args.ready_port:
+        _serve_ready(args.ready_port)
+
+    def run():
+        started = time.perf_counter()
+        warm(conf, server_port(args.streamlit_args))
+        STATUS["seconds"] = round(time.perf_counter() - started, 3)
+        print(f"Prewarm done in {STATUS['seconds']}s: {STATUS['steps']}" + (f", errors: {STATUS['errors']}" if STATUS["errors"] else ""))
+        if args.ready_file:
+            with open(args.ready_file + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(STATUS, f)
+            os.replace(args.ready_file + ".tmp", args.ready_file)
+
+    threading.Thread(target=run, name="prewarm", daemon=True).start()
+
+    # The server runs in this process, so everything warmed above is what the app's sessions use
+    from streamlit.web import cli
+    sys.argv = ["streamlit", "run", APP, *args.streamlit_args]
+    sys.exit(cli.main())
+
+
+if __name__ == "__main__":
+    main()
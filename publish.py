@@ -0,0 +1,259 @@
+"""
+📺 Read-only static publishing for wall displays.
+Renders Today's Dashboard and the History tab's default view as two plain HTML files,
+index.html and history.html, using the app's own card markup (render.py) and Plotly
+figures (charts.py). Viewers only fetch files: no Streamlit session, no script rerun and
+no copy of the data per screen. Pages reload themselves every `refresh` seconds.
+
+The app rebuilds them after each of its writes when [publish] enabled = true; the Publisher
+also checks on an interval, so writes from the HTTP API or another server show up too. An
+unchanged change log and calendar day skip the rebuild. Files are replaced atomically, so a
+viewer never reads half a page. Serve them with any static server, or:
+
+    python publish.py build                         # once
+    python publish.py watch --interval 60           # rebuild when the data changes
+    python publish.py serve --port 8080 --max-age 30
+
+`serve` adds Cache-Control and answers If-Modified-Since with 304, so a screen polling the
+page costs one stat() until the next rebuild.
+"""
+
+import argparse
+import functools
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import charts
+import milestones
+import render
+import store
+from report import THEME
+
+HISTORY_DAYS = 30
+REFRESH = 60
+
+PAGE = render.Template("""<!doctype html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<meta http-equiv="refresh" content="{refresh}">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+{scripts}
+<style>
+  body {{ font-family: -apple-system, "Segoe UI", sans-serif; background: {bg}; color: {text}; max-width: 1200px; margin: 24px auto; padding: 0 16px; }}
+  h1 {{ text-align: center; margin-bottom: 4px; }} .muted {{ color: {muted}; text-align: center; }}
+  nav {{ text-align: center; margin: 12px 0 24px; }} nav a {{ margin: 0 10px; color: #6c63ff; text-decoration: none; font-weight: 600; }}
+  .stats {{ display: grid; grid-template-columns: repeat(4, minmax(0, 1fr)); gap: 1rem; margin-bottom: 24px; }}
+  .stat-card {{ background: {card}; border: 1px solid {border}; border-radius: 16px; padding: 24px; text-align: center; }}
+  .stat-number {{ font-size: 2.8rem; font-weight: 800; color: #6c63ff; }}
+  .stat-label {{ font-size: 0.85rem; color: {muted}; text-transform: uppercase; letter-spacing: 1px; }}
+  .section-title {{ font-size: 1.3rem; font-weight: 700; color: #a78bfa; margin: 28px 0 16px; padding-bottom: 8px; border-bottom: 1px solid {border}; }}
+  .habit-card {{ background: {card}; border: 1px solid {border}; border-radius: 16px; padding: 20px; margin-bottom: 14px; }}
+  .check-row {{ display: flex; gap: 12px; }} .check-row .habit-card {{ flex: 1; }}
+  .check-row .check-toggle, .check-row .edit-link {{ display: none; }}
+  .streak-badge {{ display: inline-block; background: linear-gradient(90deg, #f7971e, #ffd200); color: #1a1a2e; border-radius: 20px; padding: 4px 14px; font-size: 0.85rem; font-weight: 700; }}
+  .done-badge {{ display: inline-block; background: #e6f4ea; color: #1e8e3e; border: 1px solid #1e8e3e; border-radius: 8px; padding: 2px 10px; font-size: 0.8rem; font-weight: 700; }}
+  .pending-badge {{ display: inline-block; background: {card}; color: {muted}; border: 1px solid {border}; border-radius: 8px; padding: 2px 10px; font-size: 0.8rem; }}
+  .chart {{ background: {card}; border-radius: 12px; margin: 16px 0; padding: 8px; }}
+  footer {{ text-align: center; color: {muted}; font-size: 0.75rem; margin: 32px 0; }}
+</style></head>
+<body>
+<h1>🏆 Habit Tracker</h1>
+<p class="muted">{subtitle}</p>
+<nav><a href="index.html">📅 Today's Dashboard</a><a href="history.html">📊 History</a></nav>
+{body}
+<footer>Published {published} · read-only · refreshes every {refresh}s</footer>
+</body></html>""")
+
+STAT = render.Template("""<div class="stat-card"><div class="stat-number">{value}</div><div class="stat-label">{label}</div></div>""")
+
+PLOTLY = '<script src="https://cdn.plot.ly/plotly-2.35.2.min.js"></script>'
+
+
+def _page(title, subtitle, body, refresh, scripts=""):
+    return PAGE(title=title, subtitle=subtitle, body=body, refresh=refresh, scripts=scripts,
+                published=f"{datetime.now():%b %d, %H:%M:%S}", bg=THEME["bg"], text=THEME["text"],
+                muted=THEME["text_muted"], card=THEME["card_bg1"], border=THEME["card_border"])
+
+
+def _section(title, html):
+    return f'<div class="section-title">{title}</div>{html}'
+
+
+# ─────────────────────────────────────────────
+# Pages
+# ─────────────────────────────────────────────
+def dashboard_html(data, earned, today, refresh=REFRESH):
+    """Today's Dashboard: stat cards, week strip, recent achievements and the checklist, without the buttons."""
+    habits = data["habits"]
+    completions = data["completions"]
+    today_completions = completions.get(str(today), {})
+    total = len(habits)
+    done_count = sum(1 for h in habits if str(h["id"]) in today_completions)
+    stats = charts.habit_stats(data, today, 7)
+
+    week_days = []
+    for i in range(7):
+        d = today - timedelta(days=6 - i)
+        week_days.append((d, sum(1 for h in habits if str(h["id"]) in completions.get(str(d), {})), d == today))
+    week_done = sum(done for _, done, _ in week_days)
+
+    cards = "".join([
+        STAT(value=f"{done_count}/{total}", label="Completed Today"),
+        STAT(value=f"{int(done_count / total * 100) if total else 0}%", label="Daily Goal Target"),
+        STAT(value=f"🔥{max((s['streak'] for s in stats.values()), default=0)}", label="Best Active Streak"),
+        STAT(value=f"{int(week_done / (total * 7) * 100) if total else 0}%", label="Weekly Consistency"),
+    ])
+    body = [f'<div class="stats">{cards}</div>', _section("📆 Your Week at a Glance", render.week_strip(week_days, total, THEME))]
+    if earned:
+        body.append(_section("🏅 Achievements", render.achievements(earned[:8], THEME)))
+    rows = [
+        render.checklist_row(h, str(h["id"]) in today_completions, stats[h["id"]]["streak"],
+                             today_completions.get(str(h["id"])), "", THEME)
+        for h in habits
+    ]
+    body.append(_section("✅ Daily Checklist", render.checklist(rows) if rows else '<p class="muted">No habits yet.</p>'))
+    return _page("Habit Tracker — Today", f"{today:%A, %B %d, %Y}", "\n".join(body), refresh)
+
+
+def history_html(data, today, n_days=HISTORY_DAYS, refresh=REFRESH):
+    """The History tab's unfiltered view over the last n_days: the charts.py figures and the streak cards."""
+    habits = data["habits"]
+    stats = charts.habit_stats(data, today, n_days)
+    rates = {hid: s["rate_n"] for hid, s in stats.items()}
+    figures = []
+    frame = charts.history_frame(data, today, n_days, {h["id"] for h in habits})
+    if frame is not None:
+        figures.append(charts.completion_line(frame["daily"], THEME))
+        if len(habits) > 1:
+            figures.append(charts.completion_heatmap(frame["pivot"], THEME))
+    if habits:
+        figures.append(charts.category_donut(*charts.category_rates(habits, rates), THEME))
+        figures.append(charts.habit_rate_bars(habits, rates, THEME))
+
+    chart_html = "\n".join(
+        f'<div class="chart">{fig.to_html(full_html=False, include_plotlyjs=False, config={"staticPlot": True})}</div>'
+        for fig in figures
+    )
+    cards = render.streak_cards(
+        render.streak_card(h, stats[h["id"]]["streak"], stats[h["id"]]["longest"], stats[h["id"]]["rate_7"],
+                           stats[h["id"]]["rate_30"], THEME)
+        for h in habits
+    )
+    body = _section("📈 Completion History", chart_html) + _section("🔥 Streaks & Statistics", cards)
+    start = today - timedelta(days=n_days - 1)
+    return _page("Habit Tracker — History", f"{start:%b %d} – {today:%b %d, %Y}", body, refresh, PLOTLY)
+
+
+def _write(path, text):
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(path + ".tmp", path)
+
+
+def build(data, earned, out_dir, today=None, refresh=REFRESH):
+    """Write index.html and history.html into out_dir; returns the paths."""
+    today = today or date.today()
+    os.makedirs(out_dir, exist_ok=True)
+    pages = {"index.html": dashboard_html(data, earned, today, refresh), "history.html": history_html(data, today, refresh=refresh)}
+    for name, html in pages.items():
+        _write(os.path.join(out_dir, name), html)
+    return [os.path.join(out_dir, name) for name in pages]
+
+
+def publish(db, out_dir, refresh=REFRESH):
+    # The process-wide snapshot: free when a session in this process already loaded it
+    return build(store.shared_state(db), milestones.load(db), out_dir, refresh=refresh)
+
+
+# ─────────────────────────────────────────────
+# Background rebuilds
+# ─────────────────────────────────────────────
+class Publisher:
+    def __init__(self, get_db, out_dir, interval_seconds=REFRESH, debounce_seconds=2.0, refresh=REFRESH):
+        self.get_db = get_db
+        self.out_dir = out_dir
+        self.interval = interval_seconds
+        self.debounce = debounce_seconds
+        self.refresh = refresh
+        self.last = None
+        self.last_error = None
+        self._key = None
+        self._request = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="publisher", daemon=True)
+        self._thread.start()
+
+    def request(self):
+        """Ask for a rebuild after a write; a burst of writes becomes one rebuild."""
+        self._request.set()
+
+    def _loop(self):
+        force = True  # first pass: the pages may not exist yet
+        while True:
+            try:
+                db = self.get_db()
+                key = (store.event_seq(db), date.today())
+                if force or key != self._key:
+                    started = time.perf_counter()
+                    publish(db, self.out_dir, self.refresh)
+                    self._key = key
+                    self.last = {"at": datetime.now(), "seconds": round(time.perf_counter() - started, 3)}
+                self.last_error = None
+            except Exception as e:
+                # Breaker open or a render failure: the old pages stay up until the next pass
+                self.last_error = str(e)
+            force = self._request.wait(self.interval)
+            if force:
+                time.sleep(self.debounce)
+                self._request.clear()
+
+
+# ─────────────────────────────────────────────
+# Serving
+# ─────────────────────────────────────────────
+class CachingHandler(SimpleHTTPRequestHandler):
+    max_age = 30
+
+    def end_headers(self):
+        # Viewers and any proxy in front may reuse a page for max_age, then revalidate with If-Modified-Since
+        self.send_header("Cache-Control", f"public, max-age={self.max_age}, stale-while-revalidate={self.max_age}")
+        super().end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(out_dir, port, max_age):
+    handler = type("Handler", (CachingHandler,), {"max_age": max_age})
+    server = ThreadingHTTPServer(("0.0.0.0", port), functools.partial(handler, directory=out_dir))
+    print(f"Serving {out_dir} on :{port}")
+    server.serve_forever()
+
+
+def main():
+    import api
+
+    conf = api.read_secrets().get("publish", {})
+    parser = argparse.ArgumentParser(description="Publish the dashboard and history as static, read-only HTML.")
+    parser.add_argument("cmd", choices=["build", "watch", "serve"])
+    parser.add_argument("--dir", default=conf.get("path", "site"))
+    parser.add_argument("--interval", type=float, default=conf.get("interval_seconds", REFRESH), help="watch: seconds between checks")
+    parser.add_argument("--refresh", type=int, default=conf.get("refresh_seconds", REFRESH), help="how often the pages reload themselves")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-age", type=int, default=30, help="serve: Cache-Control max-age in seconds")
+    args = parser.parse_args()
+
+    if args.cmd == "serve":
+        serve(args.dir, args.port, args.max_age)
+    elif args.cmd == "build":
+        started = time.perf_counter()
+        print(f"Wrote {', '.join(publish(api.get_db(), args.dir, args.refresh))} in {time.perf_counter() - started:.2f}s")
+    else:
+        publisher = Publisher(api.get_db, args.dir, args.interval, refresh=args.refresh)
+        print(f"Publishing to {args.dir}, checking every {args.interval:g}s")
+        publisher._thread.join()
+
+
+if __name__ == "__main__":
+    main()
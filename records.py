@@ -0,0 +1,152 @@
+"""
+🧾 Completion records for the Habit Tracker.
+Each logged completion is held as a small typed record instead of a dict of strings,
+so durations, moods and "helped" answers can be aggregated without string parsing.
+"""
+
+import sys
+from enum import IntEnum
+
+# ─────────────────────────────────────────────
+# Encoded detail fields
+# ─────────────────────────────────────────────
+# Duration choices offered by the log dialog, stored as integer minutes.
+DURATION_OPTIONS = {
+    "< 15 minutes": 10,
+    "15 minutes": 15,
+    "30 minutes": 30,
+    "45 minutes": 45,
+    "1 hour": 60,
+    "1.5 hours": 90,
+    "2+ hours": 120,
+}
+DURATION_LABELS = {m: label for label, m in DURATION_OPTIONS.items()}
+
+MOOD_EMOJIS = ["😭", "😟", "😐", "🙂", "😄", "🚀"]
+
+
+class Mood(IntEnum):
+    NONE = 0
+    AWFUL = 1
+    BAD = 2
+    MEH = 3
+    GOOD = 4
+    GREAT = 5
+    AMAZING = 6
+
+    @property
+    def emoji(self):
+        return MOOD_EMOJIS[self - 1] if self else ""
+
+    @classmethod
+    def from_emoji(cls, emoji):
+        return cls(MOOD_EMOJIS.index(emoji) + 1) if emoji in MOOD_EMOJIS else cls.NONE
+
+
+class Helped(IntEnum):
+    NO = -1
+    NOT_SURE = 0
+    YES = 1
+
+    @property
+    def label(self):
+        return HELPED_LABELS[self]
+
+    @classmethod
+    def from_label(cls, label):
+        return HELPED_VALUES.get(label)
+
+
+HELPED_LABELS = {Helped.YES: "Yes", Helped.NO: "No", Helped.NOT_SURE: "Not sure"}
+HELPED_VALUES = {v: k for k, v in HELPED_LABELS.items()}
+
+
+def minutes_from_label(label):
+    if label in DURATION_OPTIONS:
+        return DURATION_OPTIONS[label]
+    return None
+
+
+def label_from_minutes(minutes):
+    if minutes is None:
+        return ""
+    if minutes in DURATION_LABELS:
+        return DURATION_LABELS[minutes]
+    # Snap free-form minute values to the closest dialog option
+    closest = min(DURATION_LABELS, key=lambda m: abs(m - minutes))
+    return DURATION_LABELS[closest]
+
+
+# ─────────────────────────────────────────────
+# Completion record
+# ─────────────────────────────────────────────
+class Completion:
+    __slots__ = ("minutes", "mood", "helped", "notes", "legacy_label")
+
+    def __init__(self, minutes=None, mood=Mood.NONE, helped=None, notes="", legacy_label=""):
+        self.minutes = minutes
+        self.mood = Mood(mood)
+        self.helped = None if helped is None else Helped(helped)
+        self.notes = sys.intern(notes) if notes else ""
+        # Old free-form "duration" / "time" text that doesn't map to minutes, kept as written
+        self.legacy_label = legacy_label or ""
+
+    @classmethod
+    def from_row(cls, row):
+        """Build a record from a stored row, accepting both typed and legacy string fields."""
+        minutes = row.get("minutes")
+        legacy = row.get("legacy_label") or ""
+        if minutes is None:
+            raw = str(row.get("duration") or row.get("time") or "")
+            minutes = minutes_from_label(raw)
+            if minutes is None and raw:
+                legacy = raw
+        else:
+            minutes = int(minutes)
+
+        mood = row.get("mood")
+        if mood is None:
+            mood = Mood.from_emoji(str(row.get("mode", "")))
+
+        helped = row.get("helped")
+        if isinstance(helped, str):
+            helped = Helped.from_label(helped)
+        elif helped is not None:
+            helped = int(helped)
+
+        notes = row.get("notes")
+        return cls(minutes, mood, helped, str(notes) if notes else "", legacy)
+
+    def to_row(self):
+        row = {
+            "minutes": self.minutes,
+            "mood": int(self.mood),
+            "helped": None if self.helped is None else int(self.helped),
+            "notes": self.notes,
+        }
+        if self.legacy_label:
+            row["legacy_label"] = self.legacy_label
+        return row
+
+    @property
+    def duration_label(self):
+        return label_from_minutes(self.minutes)
+
+    @property
+    def mood_emoji(self):
+        return self.mood.emoji
+
+    @property
+    def helped_label(self):
+        return self.helped.label if self.helped is not None else ""
+
+    def has_details(self):
+        return self.minutes is not None or bool(self.mood) or self.helped is not None or bool(self.notes) or bool(self.legacy_label)
+
+    def __eq__(self, other):
+        if not isinstance(other, Completion):
+            return NotImplemented
+        return self.to_row() == other.to_row()
+
+    def __repr__(self):
+        return f"Completion(minutes={self.minutes}, mood={self.mood.name}, helped={self.helped_label or None}, notes={self.notes!r})"
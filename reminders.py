@@ -0,0 +1,254 @@
+"""
+🔔 Reminders and weekly digests for the Habit Tracker.
+A scheduler thread checks the clock once a minute. After reminder_time it finds, for every
+configured user, the habits due today (per target_days) that have no completion yet and
+sends one reminder per user. On digest_day after digest_time it sends a summary of the
+past week. The "due but not done" check is one habits query plus one distinct() over the
+(date, habit_id) completions index per user, so nobody's history is loaded.
+
+Each user is a tracker database. Config lives in st.secrets / .streamlit/secrets.toml:
+
+    [reminders]
+    enabled = true
+    reminder_time = "21:00"
+    digest_day = "Sun"
+    digest_time = "18:00"
+    notifier = "smtp"                 # or "file"
+    smtp_host = "localhost"           # python -m aiosmtpd -n -l localhost:1025 for a debug server
+    smtp_port = 1025
+    sender = "habits@localhost"
+    file_path = "notifications.jsonl"
+    users = [{name = "me", email = "me@example.com", db = "tracker"}]
+
+Run once from a shell with `python reminders.py [--digest] [--date YYYY-MM-DD]`.
+"""
+
+import argparse
+import json
+import smtplib
+import threading
+from datetime import date, datetime, timedelta, timezone
+from email.message import EmailMessage
+
+from pymongo.errors import DuplicateKeyError
+
+from analytics import WEEKDAYS
+
+DEFAULT_USERS = [{"name": "me", "email": None, "db": "tracker"}]
+
+
+# ─────────────────────────────────────────────
+# Queries
+# ─────────────────────────────────────────────
+def _due_match(day):
+    wd = WEEKDAYS[day.weekday()]
+    # target_days is stored as "Mon,Tue,..."; empty means every day
+    return {"$or": [{"target_days": {"$regex": wd}}, {"target_days": {"$in": ["", None, []]}}], "archived": {"$ne": True}}
+
+
+def due_not_done(db, day):
+    """Habits due on `day` without a completion, as [{"id", "name", "icon"}]."""
+    habits = list(db.habits.find(_due_match(day), {"_id": 0, "id": 1, "name": 1, "icon": 1}).sort("id", 1))
+    ids = [h["id"] for h in habits]
+    # habit_id is a string in current rows but an int in some older ones: match both on the index
+    done = {str(hid) for hid in db.completions.distinct(
+        "habit_id", {"date": str(day), "habit_id": {"$in": [str(i) for i in ids] + ids}})}
+    return [h for h in habits if str(h["id"]) not in done]
+
+
+def weekly_summary(db, end):
+    """Per habit: days done and days due over the 7 days ending `end`."""
+    start = end - timedelta(days=6)
+    done = {
+        row["_id"]: row["n"]
+        for row in db.completions.aggregate([
+            {"$match": {"date": {"$gte": str(start), "$lte": str(end)}}},
+            {"$group": {"_id": {"$toString": "$habit_id"}, "n": {"$sum": 1}}},
+        ])
+    }
+    summary = []
+    for h in db.habits.find({"archived": {"$ne": True}}, {"_id": 0, "id": 1, "name": 1, "icon": 1, "target_days": 1}).sort("id", 1):
+        days = h.get("target_days") or []
+        days = days.split(",") if isinstance(days, str) else days
+        due = sum(1 for i in range(7) if not days or WEEKDAYS[(start + timedelta(days=i)).weekday()] in days)
+        summary.append({"id": h["id"], "name": h["name"], "icon": h.get("icon", "⭐"), "done": min(done.get(str(h["id"]), 0), due), "due": due})
+    return summary
+
+
+# ─────────────────────────────────────────────
+# Messages
+# ─────────────────────────────────────────────
+def reminder_message(user, day, pending):
+    lines = [f"{h.get('icon', '⭐')} {h['name']}" for h in pending]
+    return {
+        "to": user.get("email"), "user": user["name"], "kind": "reminder", "date": str(day),
+        "subject": f"⏰ {len(pending)} habit{'s' if len(pending) != 1 else ''} still pending today",
+        "body": "Still to do today:\n\n" + "\n".join(lines) + "\n\nThere's still time to keep your streaks going!",
+    }
+
+
+def digest_message(user, end, summary):
+    due = sum(s["due"] for s in summary)
+    done = sum(s["done"] for s in summary)
+    lines = [f"{s['icon']} {s['name']}: {s['done']}/{s['due']}" for s in summary]
+    return {
+        "to": user.get("email"), "user": user["name"], "kind": "digest", "date": str(end),
+        "subject": f"📊 Your week: {done / due * 100 if due else 0:.0f}% of habits completed",
+        "body": f"Week ending {end:%B %d}: {done} of {due} scheduled habits done.\n\n" + "\n".join(lines),
+    }
+
+
+# ─────────────────────────────────────────────
+# Notifiers
+# ─────────────────────────────────────────────
+class SMTPNotifier:
+    def __init__(self, host="localhost", port=1025, sender="habits@localhost", username=None, password=None, starttls=False):
+        self.host, self.port, self.sender = host, int(port), sender
+        self.username, self.password, self.starttls = username, password, starttls
+
+    def send(self, messages):
+        """Send a batch over one connection."""
+        messages = [m for m in messages if m.get("to")]
+        if not messages:
+            return 0
+        with smtplib.SMTP(self.host, self.port, timeout=30) as smtp:
+            if self.starttls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+            for m in messages:
+                msg = EmailMessage()
+                msg["From"], msg["To"], msg["Subject"] = self.sender, m["to"], m["subject"]
+                msg.set_content(m["body"])
+                smtp.send_message(msg)
+        return len(messages)
+
+
+class FileNotifier:
+    """Appends every message as a JSON line; for tests and local debugging."""
+
+    def __init__(self, file_path="notifications.jsonl"):
+        self.path = file_path
+
+    def send(self, messages):
+        with open(self.path, "a", encoding="utf-8") as f:
+            for m in messages:
+                f.write(json.dumps({**m, "sent_at": datetime.now(timezone.utc).isoformat()}, ensure_ascii=False) + "\n")
+        return len(messages)
+
+
+NOTIFIERS = {
+    "smtp": lambda conf: SMTPNotifier(
+        host=conf.get("smtp_host", "localhost"), port=conf.get("smtp_port", 1025),
+        sender=conf.get("sender", "habits@localhost"), username=conf.get("smtp_username"),
+        password=conf.get("smtp_password"), starttls=conf.get("smtp_starttls", False),
+    ),
+    "file": lambda conf: FileNotifier(conf.get("file_path", "notifications.jsonl")),
+}
+
+
+def make_notifier(conf):
+    return NOTIFIERS[conf.get("notifier", "file")](conf)
+
+
+# ─────────────────────────────────────────────
+# Sending
+# ─────────────────────────────────────────────
+def claim(db, key):
+    """Record a notification as sent before sending it, so several processes never double-send."""
+    try:
+        db.notifications_sent.insert_one({"_id": key, "at": datetime.now(timezone.utc)})
+        return True
+    except DuplicateKeyError:
+        return False
+
+
+def send_batch(get_db, users, notifier, kind, day):
+    """Build and send one reminder or digest per user for `day`. Returns how many were sent."""
+    batch, claimed = [], []
+    for user in users:
+        db = get_db(user.get("db", "tracker"))
+        key = f"{kind}:{user['name']}:{day}"
+        if db.notifications_sent.find_one({"_id": key}, {"_id": 1}):
+            continue
+        if kind == "reminder":
+            pending = due_not_done(db, day)
+            if not pending or not claim(db, key):
+                continue
+            batch.append(reminder_message(user, day, pending))
+        else:
+            summary = weekly_summary(db, day)
+            if not summary or not claim(db, key):
+                continue
+            batch.append(digest_message(user, day, summary))
+        claimed.append((db, key))
+    if not batch:
+        return 0
+    try:
+        return notifier.send(batch)
+    except Exception:
+        # Nothing went out: release the claims so the next tick retries
+        for db, key in claimed:
+            db.notifications_sent.delete_one({"_id": key})
+        raise
+
+
+def _at(day, hhmm):
+    h, m = (int(x) for x in hhmm.split(":"))
+    return datetime(day.year, day.month, day.day, h, m)
+
+
+class ReminderScheduler:
+    def __init__(self, get_db, conf, tick_seconds=60.0):
+        self.get_db = get_db
+        self.users = list(conf.get("users", DEFAULT_USERS))
+        self.notifier = make_notifier(conf)
+        self.reminder_time = conf.get("reminder_time", "21:00")
+        self.digest_day = conf.get("digest_day", "Sun")
+        self.digest_time = conf.get("digest_time", "18:00")
+        self.tick = tick_seconds
+        self.sent = {"reminder": 0, "digest": 0}
+        self.last_error = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="reminders", daemon=True)
+        self._thread.start()
+
+    def run_due(self, now=None):
+        """Send whatever is due at local time `now`; safe to call repeatedly."""
+        now = now or datetime.now()
+        today = now.date()
+        if now >= _at(today, self.reminder_time):
+            self.sent["reminder"] += send_batch(self.get_db, self.users, self.notifier, "reminder", today)
+        if WEEKDAYS[today.weekday()] == self.digest_day and now >= _at(today, self.digest_time):
+            self.sent["digest"] += send_batch(self.get_db, self.users, self.notifier, "digest", today)
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.wait(self.tick):
+            try:
+                self.run_due()
+                self.last_error = None
+            except Exception as e:
+                # Mongo or SMTP down: the claims were released, try again next tick
+                self.last_error = str(e)
+
+
+def main():
+    import api
+
+    parser = argparse.ArgumentParser(description="Send habit reminders or the weekly digest now.")
+    parser.add_argument("--digest", action="store_true", help="send the weekly digest instead of reminders")
+    parser.add_argument("--date", type=date.fromisoformat, default=date.today())
+    args = parser.parse_args()
+
+    conf = api.read_secrets().get("reminders", {})
+    client = api.get_manager().get().client
+    sent = send_batch(lambda name: client[name], conf.get("users", DEFAULT_USERS), make_notifier(conf),
+                      "digest" if args.digest else "reminder", args.date)
+    print(f"Sent {sent} {'digest' if args.digest else 'reminder'}(s)")
+
+
+if __name__ == "__main__":
+    main()
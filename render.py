@@ -0,0 +1,193 @@
+"""
+🎨 HTML templates for the Habit Tracker dashboard.
+Card templates are parsed once at import time and each section (week strip, checklist,
+streak cards, achievements) renders to a single HTML payload, so a section costs one
+element per rerun no matter how many habits there are.
+"""
+
+import html
+from string import Formatter
+
+
+class Template:
+    """A str.format-style template pre-split into literal / field parts."""
+    __slots__ = ("parts",)
+
+    def __init__(self, src):
+        self.parts = [(lit, field) for lit, field, _, _ in Formatter().parse(src)]
+
+    def __call__(self, **values):
+        out = []
+        for lit, field in self.parts:
+            out.append(lit)
+            if field is not None:
+                out.append(str(values[field]))
+        return "".join(out)
+
+
+def esc(text):
+    return html.escape(str(text), quote=True)
+
+
+# ─────────────────────────────────────────────
+# Week strip
+# ─────────────────────────────────────────────
+WEEK_STRIP = Template("""<div style="display:grid; grid-template-columns:repeat(7, minmax(0, 1fr)); gap:1rem;">{cells}</div>""")
+
+WEEK_CELL = Template("""
+<div style="background:{bg}; border:{border}; border-radius:12px; padding:10px; text-align:center;">
+    <div style="font-size:0.7rem; color:#888;">{weekday}</div>
+    <div style="font-size:1.1rem; font-weight:700; color:{day_color};">{day}</div>
+    <div style="font-size:0.75rem; color:{frac_color};">{done}/{total}</div>
+</div>""")
+
+
+def week_strip(days, total, theme):
+    """days: [(date, done_count, is_today)] oldest first."""
+    cells = []
+    for d, done, is_today in days:
+        all_done = done == total and total > 0
+        cells.append(WEEK_CELL(
+            bg="#6c63ff" if is_today else ("#e6f4ea" if all_done else theme["card_bg1"]),
+            border="2px solid #6c63ff" if is_today else f"1px solid {theme['card_border']}",
+            weekday=d.strftime("%a"),
+            day=d.day,
+            day_color="white" if is_today or done == total else "#666",
+            frac_color="#1e8e3e" if all_done else theme["text_muted"],
+            done=done,
+            total=total,
+        ))
+    return WEEK_STRIP(cells="".join(cells))
+
+
+# ─────────────────────────────────────────────
+# Daily checklist
+# ─────────────────────────────────────────────
+CHECK_ROW = Template("""
+<div class="check-row">
+    <button class="check-toggle" data-action="{action}" data-habit="{hid}" title="Toggle">{toggle}</button>
+    <div class="habit-card" style="border-left: 4px solid {color}; {done_style}">
+        <div style="display:flex; justify-content:space-between; align-items:center; margin-bottom:8px;">
+            <div style="font-size:1.1rem; font-weight:700;">
+                {icon} {name}
+                <span style="font-size:0.75rem; color:{muted}; font-weight:400; margin-left:8px;">(Goal: {category})</span>
+            </div>
+            <div style="display:flex; gap:8px; align-items:center;">{badges}</div>
+        </div>
+        {details}
+    </div>
+</div>""")
+
+EDIT_LINK = Template("""<button class="edit-link" data-action="edit" data-habit="{hid}" title="Edit Log Details" style="background:{bg}; border:1px solid {border}; padding:2px 6px; border-radius:12px; font-size:0.75rem; color:{muted}; margin-left:4px; cursor:pointer;">✏️ Edit</button>""")
+
+DETAILS = Template("""<div style='margin-top:12px; padding:10px; background:{bg}; border-radius:8px; font-size:0.85rem; border: 1px solid {border}; color:#a78bfa;'>{line}{notes}</div>""")
+
+STREAK_BADGE = Template("""<span class="streak-badge">🔥 {streak} day streak</span>""")
+
+
+def detail_parts(detail):
+    parts = []
+    if detail.minutes is not None: parts.append(f"⏳ {detail.duration_label}")
+    elif detail.legacy_label: parts.append(f"⏱️ {esc(detail.legacy_label)}")  # older entries
+    if detail.mood: parts.append(f"🎯 {detail.mood_emoji}")
+    if detail.helped is not None: parts.append(f"💡 {detail.helped_label}")
+    return " | ".join(parts)
+
+
+def checklist_row(h, done, streak, detail, extra_badges, theme):
+    hid = h["id"]
+    edit = EDIT_LINK(hid=hid, bg=theme["card_bg2"], border=theme["card_border"], muted=theme["text_muted"]) if done else ""
+    status = f'<span class="done-badge">✓ Done</span>{edit}' if done else '<span class="pending-badge">Pending</span>'
+    streak_html = STREAK_BADGE(streak=streak) if streak > 0 else ""
+
+    details = ""
+    if done and detail is not None and detail.has_details():
+        line = detail_parts(detail)
+        details = DETAILS(
+            bg=theme["bg"], border=theme["card_border"],
+            line=f"<div>{line}</div>" if line else "",
+            notes=f"<div style='margin-top:4px;'>📝 <i>{esc(detail.notes)}</i></div>" if detail.notes else "",
+        )
+
+    return CHECK_ROW(
+        action="uncheck" if done else "log",
+        hid=hid,
+        toggle="✅" if done else "⬜",
+        color=h["color"],
+        done_style="opacity:0.6; filter: grayscale(40%);" if done else "",
+        icon=h["icon"],
+        name=esc(h["name"]),
+        muted=theme["text_muted"],
+        category=esc(h["category"]),
+        badges=f"{extra_badges}{streak_html} {status}",
+        details=details,
+    )
+
+
+def checklist(rows):
+    return f'<div class="checklist">{"".join(rows)}</div>'
+
+
+# ─────────────────────────────────────────────
+# History streak cards
+# ─────────────────────────────────────────────
+STREAK_CARDS = Template("""<div style="display:grid; grid-template-columns:repeat(auto-fill, minmax(260px, 1fr)); gap:1rem;">{cards}</div>""")
+
+STREAK_CARD = Template("""
+<div class="habit-card" style="border-left: 4px solid {color};">
+    <div style="font-size:1.05rem; font-weight:700; margin-bottom:12px;">{icon} {name}</div>
+    <div style="display:grid; grid-template-columns:1fr 1fr; gap:10px; text-align:center;">
+        <div style="background:{bg}; border-radius:10px; padding:10px;">
+            <div style="font-size:1.8rem; font-weight:800; color:#e65100;">{streak}</div>
+            <div style="font-size:0.72rem; color:{muted};">Current Streak {fire}</div>
+        </div>
+        <div style="background:{bg}; border-radius:10px; padding:10px;">
+            <div style="font-size:1.8rem; font-weight:800; color:#6c63ff;">{longest}</div>
+            <div style="font-size:0.72rem; color:{muted};">Best Ever 🏆</div>
+        </div>
+        <div style="background:{bg}; border-radius:10px; padding:10px;">
+            <div style="font-size:1.4rem; font-weight:700; color:#1e8e3e;">{rate_7}%</div>
+            <div style="font-size:0.72rem; color:{muted};">7-Day Rate</div>
+        </div>
+        <div style="background:{bg}; border-radius:10px; padding:10px;">
+            <div style="font-size:1.4rem; font-weight:700; color:#00838f;">{rate_30}%</div>
+            <div style="font-size:0.72rem; color:{muted};">30-Day Rate</div>
+        </div>
+    </div>
+</div>""")
+
+
+def streak_card(h, streak, longest, rate_7, rate_30, theme):
+    return STREAK_CARD(
+        color=h["color"], icon=h["icon"], name=esc(h["name"]),
+        bg=theme["bg"], muted=theme["text_muted"],
+        streak=streak, fire="🔥" * min(streak, 5) if streak > 0 else "💤",
+        longest=longest, rate_7=f"{rate_7:.0f}", rate_30=f"{rate_30:.0f}",
+    )
+
+
+def streak_cards(cards):
+    return STREAK_CARDS(cards="".join(cards))
+
+
+# ─────────────────────────────────────────────
+# Achievements
+# ─────────────────────────────────────────────
+ACHIEVEMENTS = Template("""<div style="display:flex; flex-wrap:wrap; gap:0.6rem;">{badges}</div>""")
+
+ACHIEVEMENT = Template("""
+<div title="Earned {earned}" style="background:{bg}; border:1px solid {border}; border-radius:12px; padding:8px 12px; display:flex; gap:8px; align-items:center;">
+    <div style="font-size:1.4rem;">{icon}</div>
+    <div>
+        <div style="font-size:0.85rem; font-weight:700;">{title}</div>
+        <div style="font-size:0.72rem; color:{muted};">{detail} · {earned}</div>
+    </div>
+</div>""")
+
+
+def achievements(docs, theme):
+    return ACHIEVEMENTS(badges="".join(
+        ACHIEVEMENT(icon=a["icon"], title=esc(a["title"]), detail=esc(a["detail"]), earned=a["earned_on"],
+                    bg=theme["card_bg1"], border=theme["card_border"], muted=theme["text_muted"])
+        for a in docs
+    ))
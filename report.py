@@ -0,0 +1,229 @@
+"""
+🗞️ Batch habit reports without a browser or a Streamlit server.
+Renders the History tab's analytics (streaks, completion rates, the completion / heatmap /
+category / per-habit charts) as static HTML pages and, with kaleido installed, PNG images,
+one report per user or per user and category. Reports are spread over a process pool:
+
+    python report.py --period week                    # last full week, one report per user
+    python report.py --period month --by category --png
+    python report.py --start 2025-01-01 --end 2025-03-31 --workers 8 --out reports/q1
+
+Users are tracker databases, as listed in the [reminders] users setting (see reminders.py).
+Archived months (the [archive] cold tier, see tiering.py) count towards the period and the
+longest streak, as in the History tab.
+"""
+
+import argparse
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
+
+import charts
+import connection
+import render
+import store
+import tiering
+from reminders import DEFAULT_USERS
+
+THEME = {"bg": "#f4f4f9", "text": "#1a1a2e", "card_bg1": "#ffffff", "card_bg2": "#f8f9fa",
+         "card_border": "#e9ecef", "text_muted": "#6c757d", "stat_bg": "#eef2f5"}
+
+PAGE = render.Template("""<!doctype html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<script src="https://cdn.plot.ly/plotly-2.35.2.min.js"></script>
+<style>
+  body {{ font-family: -apple-system, "Segoe UI", sans-serif; background: {bg}; color: {text}; max-width: 1000px; margin: 32px auto; padding: 0 16px; }}
+  h1 {{ margin-bottom: 4px; }} .muted {{ color: {muted}; }}
+  table {{ border-collapse: collapse; width: 100%; background: #fff; margin: 16px 0; }}
+  th, td {{ padding: 8px 12px; border-bottom: 1px solid {border}; text-align: left; }}
+  .chart {{ background: #fff; border-radius: 12px; margin: 16px 0; padding: 8px; }}
+</style></head>
+<body>
+<h1>{title}</h1>
+<p class="muted">{period} &nbsp;•&nbsp; {done} of {due} habit-days completed ({pct}%)</p>
+<table><tr><th>Habit</th><th>Category</th><th>Current streak</th><th>Longest</th><th>Period %</th><th>7-day %</th><th>30-day %</th></tr>
+{rows}
+</table>
+{charts}
+</body></html>""")
+
+ROW = render.Template("<tr><td>{icon} {name}</td><td>{category}</td><td>{streak}</td><td>{longest}</td><td>{rate_n}</td><td>{rate_7}</td><td>{rate_30}</td></tr>")
+
+
+# ─────────────────────────────────────────────
+# Periods & jobs
+# ─────────────────────────────────────────────
+def period_bounds(period, today=None):
+    """(start, end) of the last full week (Mon-Sun) or calendar month before today."""
+    today = today or date.today()
+    if period == "week":
+        end = today - timedelta(days=today.weekday() + 1)
+        return end - timedelta(days=6), end
+    end = today.replace(day=1) - timedelta(days=1)
+    return end.replace(day=1), end
+
+
+def slug(text):
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-") or "all"
+
+
+# Per worker process: one Mongo client and each user's data loaded once
+_client = None
+_read_pref = None
+_states = {}
+_cold_done = {}
+
+
+def _db(db_name):
+    global _client, _read_pref
+    if _client is None:
+        import pymongo
+        import api
+        conf = api.mongo_settings()
+        if not conf["url"]:
+            raise RuntimeError("No MongoDB URL: set HABIT_MONGO_URL or connections.mongo.url in .streamlit/secrets.toml")
+        _client = pymongo.MongoClient(conf["url"])
+        # Reports are analytics reads: routed like the app's History views
+        _read_pref = connection.read_preference(conf.get("read_preference", "primary"), conf.get("max_staleness_seconds", -1))
+    return _client.get_database(db_name, read_preference=_read_pref)
+
+
+def _load(db_name):
+    if db_name not in _states:
+        _states[db_name] = store.load_state(_db(db_name))
+    return _states[db_name]
+
+
+def _archive(db_name):
+    import api
+    conf = api.read_secrets().get("archive", {})
+    root = conf.get("path", "archive")
+    if conf.get("backend", "local") == "gridfs":
+        # Each user's partitions are in their own database's bucket
+        return tiering.GridFSArchive(lambda: _client.get_database(db_name), root)
+    return tiering.LocalArchive(root)
+
+
+def with_cold_tier(db_name, data, start, end):
+    """(data with the period's archived completions merged in, all-time done index for the longest streak)."""
+    _db(db_name)
+    # The cold tier is read on the primary: a lagging secondary may miss a month already gone from the hot tier
+    db = _client.get_database(db_name)
+    if tiering.manifest_token(db) is None:
+        return data, None
+    archive = _archive(db_name)
+    if db_name not in _cold_done:
+        _cold_done[db_name] = tiering.cold_done_index(db, archive)
+    longest = tiering.merge_tiers(data["completions"], _cold_done[db_name])
+    if start >= tiering.cold_cutoff():
+        return data, longest
+    cold = tiering.cold_completions(db, archive, start, end)
+    return {**data, "completions": tiering.merge_tiers(data["completions"], cold)}, longest
+
+
+def build_report(user, category, start, end, out_dir, png):
+    """Render one report; returns the files written. Runs in a worker process."""
+    data, longest = with_cold_tier(user.get("db", "tracker"), _load(user.get("db", "tracker")), start, end)
+    habits = [h for h in data["habits"] if category is None or h["category"] == category]
+    n_days = (end - start).days + 1
+    stats = charts.habit_stats(data, end, n_days, longest)
+    title = f"Habit report — {user['name']}" + (f" — {category}" if category else "")
+
+    figures = {}
+    frame = charts.history_frame(data, end, n_days, {h["id"] for h in habits})
+    if frame is not None:
+        figures["completion"] = charts.completion_line(frame["daily"], THEME)
+        if len(habits) > 1:
+            figures["heatmap"] = charts.completion_heatmap(frame["pivot"], THEME)
+    rates_n = {hid: s["rate_n"] for hid, s in stats.items()}
+    if habits and category is None:
+        figures["categories"] = charts.category_donut(*charts.category_rates(habits, rates_n), THEME)
+    if habits:
+        figures["habits"] = charts.habit_rate_bars(habits, rates_n, THEME)
+
+    done = int(frame["pivot"].values.sum()) if frame is not None else 0
+    due = len(habits) * n_days
+    rows = "\n".join(
+        ROW(icon=render.esc(h.get("icon", "⭐")), name=render.esc(h["name"]), category=render.esc(h["category"]),
+            streak=stats[h["id"]]["streak"], longest=stats[h["id"]]["longest"],
+            rate_n=f"{stats[h['id']]['rate_n']:.0f}", rate_7=f"{stats[h['id']]['rate_7']:.0f}",
+            rate_30=f"{stats[h['id']]['rate_30']:.0f}")
+        for h in habits
+    )
+    chart_html = "\n".join(
+        f'<div class="chart">{fig.to_html(full_html=False, include_plotlyjs=False)}</div>' for fig in figures.values()
+    )
+    html = PAGE(title=render.esc(title), period=f"{start:%b %d, %Y} – {end:%b %d, %Y}", done=done, due=due,
+                pct=f"{done / due * 100 if due else 0:.0f}", rows=rows, charts=chart_html,
+                bg=THEME["bg"], text=THEME["text"], muted=THEME["text_muted"], border=THEME["card_border"])
+
+    base = os.path.join(out_dir, f"{slug(user['name'])}_{slug(category or 'all')}_{start}_{end}")
+    written = [base + ".html"]
+    with open(written[0], "w", encoding="utf-8") as f:
+        f.write(html)
+    if png:
+        # Static images go through kaleido, no browser needed
+        for name, fig in figures.items():
+            fig.write_image(f"{base}_{name}.png", width=1000, scale=2)
+            written.append(f"{base}_{name}.png")
+    return written
+
+
+def _close_client():
+    # MongoClient isn't fork-safe: workers open their own (loaded states are plain data and can be inherited)
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+
+
+def jobs_for(users, by):
+    if by == "user":
+        return [(u, None) for u in users]
+    jobs = []
+    for u in users:
+        for category in sorted({h["category"] for h in _load(u.get("db", "tracker"))["habits"]}):
+            jobs.append((u, category))
+    return jobs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render habit reports as HTML (and PNG) without Streamlit.")
+    parser.add_argument("--period", choices=["week", "month"], default="week")
+    parser.add_argument("--start", type=date.fromisoformat)
+    parser.add_argument("--end", type=date.fromisoformat)
+    parser.add_argument("--by", choices=["user", "category"], default="user")
+    parser.add_argument("--user", action="append", help="only these user names (repeatable)")
+    parser.add_argument("--png", action="store_true", help="also export every chart as PNG (needs kaleido)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--out", default="reports")
+    args = parser.parse_args()
+
+    import api
+    users = api.read_secrets().get("reminders", {}).get("users", DEFAULT_USERS)
+    if args.user:
+        users = [u for u in users if u["name"] in args.user]
+    start, end = period_bounds(args.period)
+    start, end = args.start or start, args.end or end
+    os.makedirs(args.out, exist_ok=True)
+
+    jobs = jobs_for(users, args.by)
+    _close_client()
+    began = time.perf_counter()
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(build_report, u, c, start, end, args.out, args.png): (u["name"], c) for u, c in jobs}
+        for f in as_completed(futures):
+            name, category = futures[f]
+            try:
+                print(f"✓ {name}{' / ' + category if category else ''}: {', '.join(f.result())}")
+            except Exception as e:
+                failed += 1
+                print(f"✗ {name}{' / ' + category if category else ''}: {e}")
+    print(f"{len(jobs) - failed}/{len(jobs)} reports in {time.perf_counter() - began:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
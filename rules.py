@@ -0,0 +1,106 @@
+"""
+🔗 Derived habit completions.
+A habit can carry a rule such as {"source": "dsa_solved", "min": 2}, meaning
+"done on any day with at least 2 DSA problems completed_on that day".
+Solved problems are kept in a per-day count index, and DSA edits only touch the
+days they change, so completions materialize without rescanning the problem list.
+"""
+
+from collections import Counter
+
+import series
+from records import Completion
+
+RULE_SOURCES = {
+    "dsa_solved": "DSA problems solved",
+}
+
+
+# ─────────────────────────────────────────────
+# Solved-per-day index
+# ─────────────────────────────────────────────
+def solved_day(problem):
+    if problem is None or problem.get("status") != "completed" or not problem.get("completed_on"):
+        return None
+    return str(problem["completed_on"])[:10]
+
+
+def build_dsa_index(problems):
+    """{day: solved count}. Built once per load; afterwards kept current by update_dsa_index."""
+    return Counter(d for d in map(solved_day, problems) if d)
+
+
+def get_dsa_index(data):
+    if "dsa_day_counts" not in data:
+        data["dsa_day_counts"] = build_dsa_index(data.get("dsa_problems", []))
+    return data["dsa_day_counts"]
+
+
+def update_dsa_index(index, changes):
+    """Apply (before, after) problem pairs to the index and return the set of touched days."""
+    touched = set()
+    for before, after in changes:
+        old_day, new_day = solved_day(before), solved_day(after)
+        if old_day == new_day:
+            continue
+        if old_day:
+            index[old_day] -= 1
+            if index[old_day] <= 0:
+                del index[old_day]
+            touched.add(old_day)
+        if new_day:
+            index[new_day] += 1
+            touched.add(new_day)
+    return touched
+
+
+# ─────────────────────────────────────────────
+# Materialization
+# ─────────────────────────────────────────────
+def linked_habits(habits, source):
+    return [h for h in habits if (h.get("rule") or {}).get("source") == source]
+
+
+def materialize(data, days, source="dsa_solved"):
+    """Re-evaluate rule-linked habits on the given days. Returns True if anything changed."""
+    habits = linked_habits(data.get("habits", []), source)
+    if not habits or not days:
+        return False
+    index = get_dsa_index(data)
+    completions = data["completions"]
+    changed = False
+
+    for h in habits:
+        hid = str(h["id"])
+        for day in days:
+            count = index.get(day, 0)
+            if series.is_quantitative(h):
+                h_series = data.setdefault("values", {}).setdefault(hid, series.ValueSeries())
+                if count:
+                    h_series.set(day, float(count))
+                else:
+                    h_series.remove(day)
+                done = series.meets_target(h, count)
+            else:
+                done = count >= h["rule"].get("min", 1)
+
+            day_comps = completions.get(day, {})
+            if done and hid not in day_comps:
+                completions.setdefault(day, {})[hid] = Completion()
+                changed = True
+            elif not done and hid in day_comps:
+                del day_comps[hid]
+                if not day_comps:
+                    del completions[day]
+                changed = True
+            elif series.is_quantitative(h):
+                changed = True  # value may have moved without flipping the completion
+    return changed
+
+
+def backfill(data, habit):
+    """Materialize a newly linked habit over every day that has solved problems."""
+    source = (habit.get("rule") or {}).get("source")
+    if source == "dsa_solved":
+        return materialize(data, set(get_dsa_index(data)), source)
+    return False
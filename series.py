@@ -0,0 +1,144 @@
+"""
+📏 Numeric time series for quantitative habits.
+Habits like "Phone Usage" or "DSA 2 Problems A day" carry a unit and a target instead of
+a plain done / not-done flag. Each habit's daily values live in a compact ValueSeries
+(two flat typed arrays sorted by day) and roll up to daily / weekly / monthly stats with pandas.
+"""
+
+from array import array
+from bisect import bisect_left
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+# ─────────────────────────────────────────────
+# Units & targets
+# ─────────────────────────────────────────────
+UNITS = {
+    "check": "Done / Not done",
+    "count": "Count",
+    "minutes": "Minutes",
+    "hours": "Hours",
+}
+UNIT_SUFFIX = {"check": "", "count": "", "minutes": " min", "hours": " h"}
+TARGET_OPS = {">=": "At least", "<=": "At most"}
+
+
+def is_quantitative(habit):
+    return habit.get("unit", "check") != "check"
+
+
+def meets_target(habit, value):
+    if value is None:
+        return False
+    target = habit.get("target")
+    if target is None:
+        return value > 0
+    if habit.get("target_op", ">=") == "<=":
+        return value <= target
+    return value >= target
+
+
+def format_value(habit, value):
+    unit = habit.get("unit", "check")
+    txt = f"{value:g}{UNIT_SUFFIX.get(unit, '')}"
+    if habit.get("target") is not None:
+        op = "≤" if habit.get("target_op", ">=") == "<=" else "≥"
+        txt += f" / {op} {habit['target']:g}{UNIT_SUFFIX.get(unit, '')}"
+    return txt
+
+
+# ─────────────────────────────────────────────
+# Per-habit series
+# ─────────────────────────────────────────────
+class ValueSeries:
+    __slots__ = ("days", "values")
+
+    def __init__(self):
+        self.days = array("q")    # date ordinals, ascending
+        self.values = array("d")
+
+    def __len__(self):
+        return len(self.days)
+
+    def set(self, day_str, value):
+        o = date.fromisoformat(day_str).toordinal()
+        i = bisect_left(self.days, o)
+        if i < len(self.days) and self.days[i] == o:
+            self.values[i] = value
+        else:
+            self.days.insert(i, o)
+            self.values.insert(i, value)
+
+    def get(self, day_str, default=None):
+        o = date.fromisoformat(day_str).toordinal()
+        i = bisect_left(self.days, o)
+        if i < len(self.days) and self.days[i] == o:
+            return self.values[i]
+        return default
+
+    def remove(self, day_str):
+        o = date.fromisoformat(day_str).toordinal()
+        i = bisect_left(self.days, o)
+        if i < len(self.days) and self.days[i] == o:
+            del self.days[i]
+            del self.values[i]
+
+    def items(self):
+        for o, v in zip(self.days, self.values):
+            yield str(date.fromordinal(o)), v
+
+    def to_series(self, start=None, end=None):
+        """Values as a pandas Series on a DatetimeIndex, optionally clipped to [start, end]."""
+        if not self.days:
+            return pd.Series([], index=pd.DatetimeIndex([]), dtype="float64", name="value")
+        days = np.frombuffer(self.days, dtype=np.int64)
+        values = np.frombuffer(self.values, dtype=np.float64)
+        lo = 0 if start is None else np.searchsorted(days, start.toordinal(), "left")
+        hi = len(days) if end is None else np.searchsorted(days, end.toordinal(), "right")
+        # Proleptic ordinal 1 is 0001-01-01; 719163 is the ordinal of the Unix epoch
+        idx = pd.to_datetime(days[lo:hi] - 719163, unit="D")
+        return pd.Series(values[lo:hi].copy(), index=idx, name="value")
+
+
+# ─────────────────────────────────────────────
+# Rollups
+# ─────────────────────────────────────────────
+FREQS = {"Daily": "D", "Weekly": "W-SUN", "Monthly": "MS"}
+
+
+def rollup(series, freq="Daily", percentiles=(50, 90)):
+    """Sum / mean / percentile rollup of a value Series at daily, weekly or monthly grain."""
+    cols = ["sum", "mean"] + [f"p{p}" for p in percentiles]
+    if series.empty:
+        return pd.DataFrame(columns=cols)
+    grouped = series.resample(FREQS[freq])
+    out = pd.DataFrame({"sum": grouped.sum(), "mean": grouped.mean()})
+    for p in percentiles:
+        out[f"p{p}"] = grouped.quantile(p / 100)
+    # Periods without any logged value are gaps, not zeros
+    out.loc[grouped.count() == 0, :] = np.nan
+    return out[cols]
+
+
+def series_from_rows(rows, presorted=False):
+    """Build {habit_id: ValueSeries} from stored {"habit_id", "date", "value"} rows."""
+    values = {}
+    if not presorted:
+        rows = sorted(rows, key=lambda r: str(r.get("date", "")))
+    for row in rows:
+        d = str(row.get("date", ""))
+        hid = str(row.get("habit_id", ""))
+        if not d or not hid or row.get("value") is None:
+            continue
+        values.setdefault(hid, ValueSeries()).set(d, float(row["value"]))
+    return values
+
+
+def series_to_rows(values):
+    return [
+        {"habit_id": hid, "date": d, "value": v}
+        for hid, s in values.items()
+        for d, v in s.items()
+    ]
@@ -0,0 +1,123 @@
+"""
+🔁 Spaced repetition for solved DSA problems.
+Each solved problem carries an SM-2 schedule in p["srs"]: {"ef", "interval", "reps", "due",
+"last", "reviews"}. Reviewing grades recall 0-5; a pass (>= 3) stretches the interval by the
+ease factor, a fail starts the problem over tomorrow. Every outcome is also appended to the
+`dsa_reviews` collection.
+
+ReviewQueue keeps one binary min-heap of (due, id) per (topic, difficulty). A review
+pushes the problem's new entry and leaves the old one behind as stale, so updates are
+O(log n), and the heaps are compacted once stale entries outnumber live ones. The day's
+queue is read without popping: a best-first walk from the roots of the selected heaps,
+which costs O(k log n) for k due problems.
+"""
+
+import heapq
+import itertools
+from datetime import date, datetime, timedelta, timezone
+
+GRADES = {"Again": 1, "Hard": 3, "Good": 4, "Easy": 5}
+MIN_EF = 1.3
+START_EF = 2.5
+REVIEW_BATCH = 20
+
+
+def state(p):
+    """The problem's schedule; a solved problem that was never reviewed is due the day after it was solved."""
+    if p.get("srs"):
+        return p["srs"]
+    solved = date.fromisoformat(str(p["completed_on"])[:10]) if p.get("completed_on") else date.today()
+    return {"ef": START_EF, "interval": 0, "reps": 0, "due": str(solved + timedelta(days=1)), "last": None, "reviews": 0}
+
+
+def review(p, quality, today=None):
+    """New SM-2 schedule after grading recall of problem p (0-5). Returns a fresh dict, p is not touched."""
+    today = today or date.today()
+    s = state(p)
+    if quality < 3:
+        reps, interval = 0, 1
+    else:
+        reps = s["reps"] + 1
+        interval = 1 if reps == 1 else 6 if reps == 2 else max(1, round(s["interval"] * s["ef"]))
+    ef = max(MIN_EF, s["ef"] + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    return {"ef": round(ef, 3), "interval": interval, "reps": reps, "due": str(today + timedelta(days=interval)),
+            "last": str(today), "reviews": s["reviews"] + 1}
+
+
+def log_review(db, p, quality, schedule):
+    db.dsa_reviews.insert_one({
+        "problem_id": p["id"], "name": p["name"], "topic": p.get("topic", ""), "difficulty": p.get("difficulty"),
+        "quality": quality, "interval": schedule["interval"], "ef": schedule["ef"], "date": schedule["last"],
+        "ts": datetime.now(timezone.utc),
+    })
+
+
+class ReviewQueue:
+    def __init__(self, problems):
+        self.problems = {}
+        self._heaps = {}   # (topic, difficulty) -> [(due, id)]
+        self._live = {}    # id -> (due, bucket)
+        self._stale = 0
+        for p in problems:
+            if p.get("status") == "completed":
+                self.problems[p["id"]] = p
+                bucket = (p.get("topic", ""), p.get("difficulty"))
+                self._live[p["id"]] = (state(p)["due"], bucket)
+                self._heaps.setdefault(bucket, []).append((state(p)["due"], p["id"]))
+        for heap in self._heaps.values():
+            heapq.heapify(heap)
+
+    def __len__(self):
+        return len(self._live)
+
+    def topics(self):
+        return sorted({topic for topic, _ in self._heaps if topic})
+
+    def update(self, p):
+        """Re-queue one problem after a review or edit (drops it if it's no longer solved)."""
+        entry = None
+        if p.get("status") == "completed":
+            entry = (state(p)["due"], (p.get("topic", ""), p.get("difficulty")))
+        old = self._live.pop(p["id"], None)
+        self.problems.pop(p["id"], None)
+        if entry is not None:
+            self.problems[p["id"]] = p
+            self._live[p["id"]] = entry
+        if old == entry:
+            return  # the heap entry it already has is still right
+        if old is not None:
+            self._stale += 1
+        if entry is not None:
+            heapq.heappush(self._heaps.setdefault(entry[1], []), (entry[0], p["id"]))
+        if self._stale > len(self._live):
+            self._compact()
+
+    def _compact(self):
+        for bucket, heap in self._heaps.items():
+            heap[:] = [(due, pid) for due, pid in heap if self._live.get(pid) == (due, bucket)]
+            heapq.heapify(heap)
+        self._stale = 0
+
+    def due(self, today=None, topics=None, difficulties=None, limit=None):
+        """Problems due on or before today, most overdue first, optionally only some topics / difficulties."""
+        today = str(today or date.today())
+        tie = itertools.count()  # keeps buckets out of tuple comparisons
+        frontier = []
+        for bucket, heap in self._heaps.items():
+            if heap and (not topics or bucket[0] in topics) and (not difficulties or bucket[1] in difficulties):
+                frontier.append((heap[0][0], heap[0][1], next(tie), bucket, 0))
+        heapq.heapify(frontier)
+        out, seen = [], set()
+        while frontier and (limit is None or len(out) < limit):
+            due, pid, _, bucket, i = heapq.heappop(frontier)
+            if due > today:
+                break
+            # A stale entry can match again if the problem went back to an earlier due date
+            if self._live.get(pid) == (due, bucket) and pid not in seen:
+                seen.add(pid)
+                out.append(self.problems[pid])
+            heap = self._heaps[bucket]
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child][0], heap[child][1], next(tie), bucket, child))
+        return out
@@ -0,0 +1,44 @@
+"""
+🔥 Streak and completion-rate calculations.
+Pure functions over the {day: {habit_id: ...}} completions mapping, shared by the
+Streamlit app and the headless tools. Any mapping whose values support `in`
+(dicts of records, sets of habit ids) works.
+"""
+
+from datetime import date, timedelta
+
+
+def current_streak(completions, habit_id, today=None):
+    streak = 0
+    d = today or date.today()
+    hid = str(habit_id)
+    while hid in completions.get(str(d), ()):
+        streak += 1
+        d -= timedelta(days=1)
+    return streak
+
+
+def longest_streak(completions, habit_id):
+    best = cur = 0
+    prev = None
+    hid = str(habit_id)
+    for ds in sorted(completions):
+        if hid in completions[ds]:
+            d = date.fromisoformat(ds)
+            if prev and (d - prev).days == 1:
+                cur += 1
+            else:
+                cur = 1
+            best = max(best, cur)
+            prev = d
+        else:
+            cur = 0
+            prev = None
+    return best
+
+
+def completion_rate(completions, habit_id, days=30, today=None):
+    today = today or date.today()
+    hid = str(habit_id)
+    done = sum(1 for i in range(days) if hid in completions.get(str(today - timedelta(days=i)), ()))
+    return (done / days * 100) if days else 0
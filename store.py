@@ -0,0 +1,315 @@
+"""
+🗄️ MongoDB data layer for the Habit Tracker.
+Shared by the Streamlit app and the headless tools (HTTP API, scripts): parses the
+collections into the in-memory state and writes changes back as row-level patches,
+so several writers can work on the same database without clobbering each other.
+"""
+
+import pickle
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import pymongo
+
+import events
+import rules
+import series
+from records import Completion
+
+LOAD_WORKERS = 6
+LOAD_BATCH = 2000
+SNAPSHOT_MAX_AGE = 60
+ARCHIVE_PARTITIONS = {"completions": "completions_archive", "habit_values": "habit_values_archive"}
+
+
+# ─────────────────────────────────────────────
+# Parsing
+# ─────────────────────────────────────────────
+def parse_habit(h):
+    if not h.get("id"):
+        return None
+    if "target_days" in h and isinstance(h["target_days"], str) and h["target_days"]:
+        h["target_days"] = h["target_days"].split(",")
+    elif not h.get("target_days"):
+        h["target_days"] = []
+    h["id"] = int(h["id"])
+    if not h.get("icon"): h["icon"] = "⭐"
+    if not h.get("unit"): h["unit"] = "check"
+    if h.get("target") is not None: h["target"] = float(h["target"])
+    return h
+
+
+def parse_problem(p):
+    if not p.get("id"):
+        return None
+    p["id"] = int(p["id"])
+    if not p.get("topic"): p["topic"] = ""
+    if not p.get("url"): p["url"] = ""
+    if "completed_on" not in p: p["completed_on"] = None
+    return p
+
+
+def load_habits(db, archived=False):
+    """Active habits, or with archived=True the archived ones (see archive_habit)."""
+    query = {"archived": True} if archived else {"archived": {"$ne": True}}
+    return [h for h in map(parse_habit, db.habits.find(query, {"_id": 0})) if h]
+
+
+def _load_completions(db, batch_size, coll="completions", query=None):
+    completions = {}
+    for row in db[coll].find(query or {}, {"_id": 0}).batch_size(batch_size):
+        d = str(row.get("date", ""))
+        hid = str(row.get("habit_id", ""))
+        if not d or not hid: continue
+        completions.setdefault(d, {})[hid] = Completion.from_row(row)
+    return completions
+
+
+def _load_problems(db, batch_size):
+    return [p for p in map(parse_problem, db.dsa_problems.find({}, {"_id": 0}).batch_size(batch_size)) if p]
+
+
+def _load_notes(db, batch_size):
+    daily_notes = []
+    try:
+        for row in db.daily_notes.find({}, {"_id": 0}).batch_size(batch_size):
+            if not row.get("date"): continue
+            daily_notes.append({"date": str(row["date"]), "note": str(row.get("note", ""))})
+    except Exception:
+        pass
+    return daily_notes
+
+
+def _load_values(db, batch_size, coll="habit_values", query=None):
+    # Sorted by the (habit_id, date) index so each series is built by appends
+    cursor = db[coll].find(query or {}, {"_id": 0}).sort([("habit_id", 1), ("date", 1)]).batch_size(batch_size)
+    return series.series_from_rows(cursor, presorted=True)
+
+
+_pool = ThreadPoolExecutor(max_workers=LOAD_WORKERS, thread_name_prefix="store-load")
+
+
+def load_state(db, batch_size=LOAD_BATCH):
+    """
+    Fetch every collection concurrently and parse each cursor batch by batch as it arrives,
+    so a cold load takes about as long as the slowest collection rather than the sum.
+    """
+    futures = {
+        "habits": _pool.submit(load_habits, db),
+        "completions": _pool.submit(_load_completions, db, batch_size),
+        "dsa_problems": _pool.submit(_load_problems, db, batch_size),
+        "daily_notes": _pool.submit(_load_notes, db, batch_size),
+        "values": _pool.submit(_load_values, db, batch_size),
+        "archived_habits": _pool.submit(load_habits, db, True),
+    }
+    data = {name: f.result() for name, f in futures.items()}
+    data["dsa_day_counts"] = rules.build_dsa_index(data["dsa_problems"])
+    return data
+
+
+def load_archived(db, habit_ids, batch_size=LOAD_BATCH):
+    """History of archived habits from their partitions: {"completions": {day: {hid: ...}}, "values": {hid: series}}."""
+    query = {"habit_id": {"$in": [str(h) for h in habit_ids] + [int(h) for h in habit_ids]}}
+    return {
+        "completions": _load_completions(db, batch_size, ARCHIVE_PARTITIONS["completions"], query),
+        "values": _load_values(db, batch_size, ARCHIVE_PARTITIONS["habit_values"], query),
+    }
+
+
+# One pickled load_state() per database for the whole process (see shared_state)
+_snapshots = {}
+_snapshot_lock = threading.Lock()
+
+
+def event_seq(db):
+    """Sequence number of the latest change-log event; moves on every logged write."""
+    counter = db.counters.find_one({"_id": "events"}, {"seq": 1})
+    return counter["seq"] if counter else 0
+
+
+def shared_state(db, max_age_s=SNAPSHOT_MAX_AGE):
+    """
+    load_state() shared by every session in the process: reused while the change log hasn't
+    moved and it is younger than max_age_s (writes that skip the log, like a CLI restore,
+    show up within that), reloaded otherwise. Each caller gets its own copy to mutate.
+    """
+    seq = event_seq(db)
+    with _snapshot_lock:
+        snap = _snapshots.get(db.name)
+        if snap is None or snap["seq"] != seq or time.monotonic() - snap["at"] > max_age_s:
+            data = load_state(db)
+            _snapshots[db.name] = {"seq": seq, "at": time.monotonic(), "blob": pickle.dumps(data, pickle.HIGHEST_PROTOCOL)}
+            return data
+        blob = snap["blob"]
+    return pickle.loads(blob)
+
+
+def load_done_index(db, habit_ids=None):
+    """Lightweight {day: {habit_id}} view of completions, enough for streaks and rates."""
+    query = {} if habit_ids is None else {"habit_id": {"$in": [str(h) for h in habit_ids]}}
+    done = {}
+    for row in db.completions.find(query, {"_id": 0, "date": 1, "habit_id": 1}).batch_size(5000):
+        done.setdefault(str(row["date"]), set()).add(str(row["habit_id"]))
+    return done
+
+
+# ─────────────────────────────────────────────
+# Writing
+# ─────────────────────────────────────────────
+def habit_doc(h):
+    doc = {k: v for k, v in h.items() if k != "_id"}
+    if isinstance(doc.get("target_days"), list):
+        doc["target_days"] = ",".join(doc["target_days"])
+    return doc
+
+
+def _patch_op(kind, key, row):
+    """(collection, write op) for one row-level patch; row None means delete."""
+    if kind == "habit":
+        # Only archive_habit / restore_habit change the archive flags: a row written from an older
+        # state (undo / redo, a stale session) keeps them, and never deletes an archived habit
+        flt = {"id": int(key[1])}
+        if row is None:
+            return "habits", pymongo.DeleteMany({**flt, "archived": {"$ne": True}})
+        doc = {k: v for k, v in habit_doc(row).items() if k not in ARCHIVE_FIELDS}
+        keep = {f: f"${f}" for f in ("_id",) + ARCHIVE_FIELDS}  # fields missing on the stored doc stay missing
+        return "habits", pymongo.UpdateOne(flt, [{"$replaceWith": {"$mergeObjects": [{"$literal": doc}, keep]}}], upsert=True)
+    elif kind == "completion":
+        flt = {"date": key[1], "habit_id": key[2]}
+        doc = None if row is None else {**flt, **row}
+        coll = "completions"
+    elif kind == "value":
+        flt = {"habit_id": key[1], "date": key[2]}
+        doc = None if row is None else {**flt, "value": row}
+        coll = "habit_values"
+    elif kind == "dsa":
+        flt = {"id": int(key[1])}
+        doc = None if row is None else {k: v for k, v in row.items() if k != "_id"}
+        coll = "dsa_problems"
+    elif kind == "note":
+        flt = {"date": key[1]}
+        doc = None if row is None else {"date": key[1], "note": row}
+        coll = "daily_notes"
+    else:
+        return None, None
+    if doc is None:
+        return coll, pymongo.DeleteMany(flt)
+    return coll, pymongo.ReplaceOne(flt, doc, upsert=True)
+
+
+def write_patches(db, patches):
+    """Apply row-level patches ({"k": key, "a": after}) with one unordered bulk write per collection."""
+    ops = {}
+    for p in patches:
+        coll, op = _patch_op(p["k"][0], p["k"], p["a"])
+        if op is not None:
+            ops.setdefault(coll, []).append(op)
+    for coll, coll_ops in ops.items():
+        db[coll].bulk_write(coll_ops, ordered=False)
+    return {coll: len(coll_ops) for coll, coll_ops in ops.items()}
+
+
+# ─────────────────────────────────────────────
+# Archived habits
+# ─────────────────────────────────────────────
+def _move_rows(db, src, dst, habit_id):
+    # Older rows may carry the habit id as a number
+    rows = list(db[src].find({"habit_id": {"$in": [str(habit_id), int(habit_id)]}}))
+    if rows:
+        db[dst].bulk_write([
+            pymongo.ReplaceOne({"habit_id": r["habit_id"], "date": r["date"]}, {k: v for k, v in r.items() if k != "_id"}, upsert=True)
+            for r in rows
+        ], ordered=False)
+        # Delete exactly the rows that were copied
+        db[src].delete_many({"_id": {"$in": [r["_id"] for r in rows]}})
+    return len(rows)
+
+
+ARCHIVE_FIELDS = ("archived", "archived_on")
+
+
+def archive_habit(db, habit_id):
+    """
+    Retire a habit without losing history: flag it archived, then move its completions and
+    values into the archive partitions so default loads never read them. Returns rows moved.
+    """
+    db.habits.update_one({"id": int(habit_id)}, {"$set": {"archived": True, "archived_on": str(date.today())}})
+    return {src: _move_rows(db, src, dst, habit_id) for src, dst in ARCHIVE_PARTITIONS.items()}
+
+
+def restore_habit(db, habit_id):
+    """Undo archive_habit: rows go back to the hot collections before the habit is active again."""
+    moved = {src: _move_rows(db, dst, src, habit_id) for src, dst in ARCHIVE_PARTITIONS.items()}
+    db.habits.update_one({"id": int(habit_id)}, {"$unset": {"archived": "", "archived_on": ""}})
+    return moved
+
+
+# ─────────────────────────────────────────────
+# Bulk completion logging
+# ─────────────────────────────────────────────
+def apply_completion_ops(db, ops):
+    """
+    Log / unlog many completions in one round of reads and writes.
+    ops: [{"op": "log" | "unlog", "habit_id", "date", optional "minutes" / "duration",
+           "mood" / "mode", "helped", "notes", "value"}]; the last op per (date, habit_id) wins.
+    Returns (before_rows, after_rows, patches, errors).
+    """
+    habits = {str(h["id"]): h for h in load_habits(db)}
+    errors = []
+    latest = {}
+    for i, op in enumerate(ops):
+        hid = str(op.get("habit_id", ""))
+        day = str(op.get("date", ""))[:10]
+        try:
+            date.fromisoformat(day)
+        except ValueError:
+            errors.append({"index": i, "error": f"invalid date {op.get('date')!r}"})
+            continue
+        if hid not in habits:
+            errors.append({"index": i, "error": f"unknown habit_id {op.get('habit_id')!r}"})
+            continue
+        if op.get("op", "log") not in ("log", "unlog"):
+            errors.append({"index": i, "error": f"unknown op {op.get('op')!r}"})
+            continue
+        latest[(day, hid)] = (i, op)
+
+    if not latest:
+        return {}, {}, [], errors
+
+    days = sorted({d for d, _ in latest})
+    hids = sorted({h for _, h in latest})
+    before = {}
+    for row in db.completions.find({"date": {"$in": days}, "habit_id": {"$in": hids}}, {"_id": 0}):
+        if (row["date"], row["habit_id"]) in latest:
+            before[("completion", row["date"], row["habit_id"])] = Completion.from_row(row).to_row()
+    for row in db.habit_values.find({"date": {"$in": days}, "habit_id": {"$in": hids}}, {"_id": 0}):
+        if (row["date"], row["habit_id"]) in latest:
+            before[("value", row["habit_id"], row["date"])] = float(row["value"])
+
+    after = dict(before)
+    for (day, hid), (i, op) in latest.items():
+        habit = habits[hid]
+        if op.get("op", "log") == "unlog":
+            after.pop(("completion", day, hid), None)
+            after.pop(("value", hid, day), None)
+            continue
+        try:
+            record = Completion.from_row(op)
+            value = None if op.get("value") is None else float(op["value"])
+        except (ValueError, TypeError) as e:
+            errors.append({"index": i, "error": f"invalid details: {e}"})
+            continue
+        done = True
+        if value is not None and series.is_quantitative(habit):
+            after[("value", hid, day)] = value
+            done = series.meets_target(habit, value)
+        if done:
+            after[("completion", day, hid)] = record.to_row()
+        else:
+            after.pop(("completion", day, hid), None)
+
+    patches = events.diff(before, after)
+    write_patches(db, patches)
+    return before, after, patches, errors
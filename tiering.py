@@ -0,0 +1,266 @@
+"""
+🧊 Hot / cold tiering of completion history.
+Closed months older than COLD_AFTER_DAYS move out of the `completions` and `daily_notes`
+collections into one compressed Parquet file per month, kept either in a local directory
+or a GridFS bucket. Mongo (the hot tier) and the session state stay small; the cold tier
+is only read when a long-range view, the longest streak or an export asks for it, through
+memory-mapped files and row-group predicate pushdown.
+
+The `archive_manifest` collection lists the partitions ({coll, month, version, rows}); a new
+version is written, verified and recorded before the hot rows are deleted.
+"""
+
+import os
+import shutil
+import uuid
+from collections import ChainMap
+from datetime import date, datetime, timedelta, timezone
+
+import gridfs
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pymongo
+
+from records import Completion
+
+COLD_AFTER_DAYS = 365
+COMPRESSION = "zstd"
+DELETE_CHUNK = 1000
+
+SCHEMAS = {
+    "completions": pa.schema([
+        ("date", pa.string()), ("habit_id", pa.string()), ("minutes", pa.int32()),
+        ("mood", pa.int8()), ("helped", pa.int8()), ("notes", pa.string()), ("legacy_label", pa.string()),
+    ]),
+    "daily_notes": pa.schema([("date", pa.string()), ("note", pa.string())]),
+}
+KEYS = {"completions": ("date", "habit_id"), "daily_notes": ("date",)}
+
+
+def normalize(coll, row):
+    if coll == "completions":
+        return {"date": str(row["date"]), "habit_id": str(row["habit_id"]), **Completion.from_row(row).to_row()}
+    return {"date": str(row["date"]), "note": str(row.get("note", ""))}
+
+
+# ─────────────────────────────────────────────
+# Storage backends
+# ─────────────────────────────────────────────
+def partition_name(coll, month, version):
+    return f"{coll}/month={month}/part-{version}.parquet"
+
+
+class LocalArchive:
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, name):
+        return os.path.join(self.root, *name.split("/"))
+
+    def write(self, name, table):
+        path = self._path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        pq.write_table(table, path + ".tmp", compression=COMPRESSION)
+        os.replace(path + ".tmp", path)
+
+    def local_path(self, name):
+        path = self._path(name)
+        return path if os.path.exists(path) else None
+
+    def remove(self, name):
+        try:
+            os.remove(self._path(name))
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+class GridFSArchive:
+    """Partitions live in a GridFS bucket; reads go through a local file cache so they can be memory-mapped."""
+
+    def __init__(self, get_db, cache_dir, bucket="archive"):
+        self.get_db = get_db
+        self.bucket = bucket
+        self.cache = LocalArchive(cache_dir)
+
+    def _fs(self):
+        return gridfs.GridFSBucket(self.get_db(), bucket_name=self.bucket)
+
+    def write(self, name, table):
+        sink = pa.BufferOutputStream()
+        pq.write_table(table, sink, compression=COMPRESSION)
+        self._fs().upload_from_stream(name, sink.getvalue().to_pybytes())
+        self.cache.write(name, table)
+
+    def local_path(self, name):
+        path = self.cache.local_path(name)
+        if path is not None:
+            return path
+        # Versioned names never change content, so a cached copy is always current
+        path = self.cache._path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            with open(path + ".tmp", "wb") as f:
+                self._fs().download_to_stream_by_name(name, f)
+        except gridfs.errors.NoFile:
+            os.remove(path + ".tmp")
+            return None
+        os.replace(path + ".tmp", path)
+        return path
+
+    def remove(self, name):
+        fs = self._fs()
+        for f in fs.find({"filename": name}):
+            fs.delete(f._id)
+        self.cache.remove(name)
+
+    def clear(self):
+        self.get_db()[f"{self.bucket}.files"].drop()
+        self.get_db()[f"{self.bucket}.chunks"].drop()
+        self.cache.clear()
+
+
+# ─────────────────────────────────────────────
+# Archiving
+# ─────────────────────────────────────────────
+def cold_cutoff(today=None):
+    """First day of the oldest month that stays hot; everything before it is cold."""
+    return ((today or date.today()) - timedelta(days=COLD_AFTER_DAYS)).replace(day=1)
+
+
+def _month_query(month):
+    return {"date": {"$gte": f"{month}-01", "$lte": f"{month}-31"}}
+
+
+def _read(archive, coll, entry, filters=None, columns=None):
+    path = archive.local_path(partition_name(coll, entry["month"], entry["version"]))
+    if path is None:
+        return None
+    # Read against the current schema: older partitions get nulls for columns added since
+    return pq.read_table(path, columns=columns, filters=filters, memory_map=True, schema=SCHEMAS[coll])
+
+
+def archive_month(db, archive, coll, month):
+    """Move one month of hot rows into its Parquet partition (merging with what is already there)."""
+    hot = list(db[coll].find(_month_query(month)))
+    if not hot:
+        return 0
+    key_fields = KEYS[coll]
+    merged = {}
+    entry = db.archive_manifest.find_one({"_id": f"{coll}:{month}"})
+    if entry:
+        old = _read(archive, coll, entry)
+        if old is None:
+            raise RuntimeError(f"Archive partition {coll} {month} is missing; not archiving over it")
+        for row in old.to_pylist():
+            merged[tuple(row[k] for k in key_fields)] = row
+    for row in hot:
+        row = normalize(coll, row)
+        merged[tuple(row[k] for k in key_fields)] = row  # hot copy wins
+
+    rows = [merged[k] for k in sorted(merged)]
+    version = uuid.uuid4().hex[:12]
+    name = partition_name(coll, month, version)
+    archive.write(name, pa.Table.from_pylist(rows, schema=SCHEMAS[coll]))
+    check = archive.local_path(name)
+    if check is None or pq.read_metadata(check).num_rows != len(rows):
+        raise RuntimeError(f"Archive partition {name} failed verification")
+
+    db.archive_manifest.replace_one({"_id": f"{coll}:{month}"}, {
+        "coll": coll, "month": month, "version": version, "rows": len(rows),
+        "archived_at": datetime.now(timezone.utc),
+    }, upsert=True)
+    # Delete exactly the rows that were copied, not whatever matches the month now
+    ids = [row["_id"] for row in hot]
+    for i in range(0, len(ids), DELETE_CHUNK):
+        db[coll].delete_many({"_id": {"$in": ids[i:i + DELETE_CHUNK]}})
+    if entry:
+        archive.remove(partition_name(coll, month, entry["version"]))
+    return len(hot)
+
+
+def archive_closed_months(db, archive, today=None):
+    """Archive every month before cold_cutoff() in both tiered collections. Returns rows moved per collection."""
+    cutoff = str(cold_cutoff(today))
+    db.archive_manifest.create_index([("coll", pymongo.ASCENDING), ("month", pymongo.ASCENDING)])
+    moved = {}
+    for coll in SCHEMAS:
+        months = sorted({str(d)[:7] for d in db[coll].distinct("date", {"date": {"$lt": cutoff}})})
+        moved[coll] = sum(archive_month(db, archive, coll, m) for m in months)
+    return moved
+
+
+def clear(db, archive):
+    archive.clear()
+    db.archive_manifest.delete_many({})
+
+
+# ─────────────────────────────────────────────
+# Reading the cold tier
+# ─────────────────────────────────────────────
+def manifest_token(db):
+    """Changes whenever any partition is (re)written; None if nothing is archived."""
+    last = db.archive_manifest.find_one({}, {"_id": 0, "version": 1, "archived_at": 1}, sort=[("archived_at", pymongo.DESCENDING)])
+    if last is None:
+        return None
+    return f"{db.archive_manifest.estimated_document_count()}:{last['version']}"
+
+
+def earliest_day(db):
+    first = db.archive_manifest.find_one({}, {"_id": 0, "month": 1}, sort=[("month", pymongo.ASCENDING)])
+    return date.fromisoformat(f"{first['month']}-01") if first else None
+
+
+def read_table(db, archive, coll, start=None, end=None, habit_ids=None, columns=None):
+    """Cold rows of one collection: months outside [start, end] are skipped via the manifest, the rest filtered per row group."""
+    months = {}
+    if start is not None:
+        months["$gte"] = str(start)[:7]
+    if end is not None:
+        months["$lte"] = str(end)[:7]
+    query = {"coll": coll, **({"month": months} if months else {})}
+    filters = []
+    if start is not None:
+        filters.append(("date", ">=", str(start)))
+    if end is not None:
+        filters.append(("date", "<=", str(end)))
+    if habit_ids is not None:
+        filters.append(("habit_id", "in", [str(h) for h in habit_ids]))
+    tables = []
+    for entry in db.archive_manifest.find(query, {"_id": 0}).sort("month", 1):
+        table = _read(archive, coll, entry, filters or None, columns)
+        if table is not None:
+            tables.append(table)
+    if not tables:
+        schema = SCHEMAS[coll]
+        return schema.empty_table() if columns is None else pa.schema([schema.field(c) for c in columns]).empty_table()
+    return pa.concat_tables(tables)
+
+
+def cold_completions(db, archive, start=None, end=None, habit_ids=None):
+    completions = {}
+    for row in read_table(db, archive, "completions", start, end, habit_ids).to_pylist():
+        completions.setdefault(row["date"], {})[row["habit_id"]] = Completion.from_row(row)
+    return completions
+
+
+def cold_done_index(db, archive, habit_ids=None):
+    """{day: {habit_id}} over the whole cold tier; only the two key columns are read."""
+    table = read_table(db, archive, "completions", habit_ids=habit_ids, columns=["date", "habit_id"])
+    done = {}
+    for d, hid in zip(table.column("date").to_pylist(), table.column("habit_id").to_pylist()):
+        done.setdefault(d, set()).add(hid)
+    return done
+
+
+def merge_tiers(hot, cold):
+    """One {day: ...} view over both tiers without copying them; hot entries win on overlapping days."""
+    overlap = {d: {**cold[d], **hot[d]} if isinstance(cold[d], dict) else set(cold[d]) | set(hot[d])
+               for d in hot.keys() & cold.keys()}
+    return ChainMap(overlap, hot, cold)
+
+
+def cold_notes(db, archive):
+    return read_table(db, archive, "daily_notes").to_pylist()
@@ -0,0 +1,140 @@
+"""
+📈 Trend and forecasting engine for the Habit Tracker.
+Builds one (habits x days) completion matrix for the last LOOKBACK days and derives every
+trend from it with array operations: rolling 7 / 30 day rates over scheduled days, fast and
+slow EWMAs (their difference is the momentum), week-over-week deltas, a per-habit
+"streak at risk" probability for today and an expected completion rate for the coming week.
+Cost is one pass over the window's completions plus O(habits x days) NumPy work.
+"""
+
+import numpy as np
+import pandas as pd
+
+from analytics import WEEKDAYS
+
+LOOKBACK = 90
+FAST_HALF_LIFE = 7
+SLOW_HALF_LIFE = 30
+WEEKDAY_WEEKS = 8
+
+
+# ─────────────────────────────────────────────
+# Matrices
+# ─────────────────────────────────────────────
+def scheduled_mask(habits, days):
+    """(habits x days) bool: the habit is due that day per target_days and already existed."""
+    by_wd = np.zeros((len(habits), 7), dtype=bool)
+    created = np.full(len(habits), np.datetime64("NaT", "D"))
+    for i, h in enumerate(habits):
+        wds = [WEEKDAYS.index(wd) for wd in h.get("target_days", []) if wd in WEEKDAYS]
+        by_wd[i, wds or list(range(7))] = True
+        if h.get("created"):
+            created[i] = np.datetime64(str(h["created"])[:10], "D")
+    day_values = days.values.astype("datetime64[D]")
+    existed = np.isnat(created)[:, None] | (day_values[None, :] >= created[:, None])
+    return by_wd[:, days.dayofweek.to_numpy()] & existed
+
+
+def done_matrix(completions, habits, days):
+    index = {str(h["id"]): i for i, h in enumerate(habits)}
+    done = np.zeros((len(habits), len(days)), dtype=bool)
+    for j, ds in enumerate(days.strftime("%Y-%m-%d")):
+        for hid in completions.get(ds, ()):
+            i = index.get(hid)
+            if i is not None:
+                done[i, j] = True
+    return done
+
+
+def _rolling_sum(x, w):
+    """Trailing w-day sums along the day axis (shorter at the left edge)."""
+    cs = np.cumsum(x, axis=1, dtype=np.float64)
+    out = cs.copy()
+    out[:, w:] -= cs[:, :-w]
+    return out
+
+
+def _ratio(num, den):
+    return np.divide(num, den, out=np.full(np.shape(num), np.nan), where=den > 0)
+
+
+def _ewma(hit, sched, half_life):
+    """Exponentially weighted hit rate over scheduled days, newest day last."""
+    age = np.arange(hit.shape[1])[::-1]
+    w = 0.5 ** (age / half_life)
+    return _ratio((hit * w).sum(axis=1), (sched * w).sum(axis=1))
+
+
+def _trailing_run(x):
+    """Length of the trailing run of True per row."""
+    return np.cumprod(x[:, ::-1], axis=1).sum(axis=1)
+
+
+# ─────────────────────────────────────────────
+# Trends
+# ─────────────────────────────────────────────
+def compute(completions, habits, today, lookback=LOOKBACK):
+    """All per-habit trends as of `today` (a date), plus the matrices the charts aggregate."""
+    days = pd.date_range(end=pd.Timestamp(today), periods=lookback, freq="D")
+    sched = scheduled_mask(habits, days)
+    done = done_matrix(completions, habits, days)
+    hit = done & sched
+
+    rate_7 = _ratio(_rolling_sum(hit, 7), _rolling_sum(sched, 7))
+    rate_30 = _ratio(_rolling_sum(hit, 30), _rolling_sum(sched, 30))
+
+    # Today is still in progress: predictions learn from history up to yesterday
+    past_hit, past_sched = hit[:, :-1], sched[:, :-1]
+    fast = _ewma(past_hit, past_sched, FAST_HALF_LIFE)
+    slow = _ewma(past_hit, past_sched, SLOW_HALF_LIFE)
+
+    recent = slice(-1 - WEEKDAY_WEEKS * 7, -1)
+    onehot = (days.dayofweek[recent].to_numpy()[:, None] == np.arange(7)).astype(np.float64)
+    wd_rate = _ratio(hit[:, recent].astype(np.float64) @ onehot, sched[:, recent].astype(np.float64) @ onehot)
+    # Blend of recent form and how this weekday usually goes; falls back to whichever exists
+    p_by_wd = np.where(np.isnan(wd_rate), fast[:, None], np.where(np.isnan(fast)[:, None], wd_rate, (fast[:, None] + wd_rate) / 2))
+
+    today_wd = days.dayofweek[-1]
+    streak_before = _trailing_run(done[:, :-1])
+    due_today = sched[:, -1]
+    done_today = done[:, -1]
+    at_risk = (streak_before > 0) & due_today & ~done_today
+    risk = np.where(at_risk, 1 - np.nan_to_num(p_by_wd[:, today_wd], nan=0.5), 0.0)
+
+    table = pd.DataFrame({
+        "rate_7": rate_7[:, -1] * 100,
+        "rate_30": rate_30[:, -1] * 100,
+        "ewma_fast": fast * 100,
+        "ewma_slow": slow * 100,
+        "momentum": (fast - slow) * 100,
+        "wow_delta": (rate_7[:, -1] - rate_7[:, -8]) * 100,
+        "streak": streak_before + done_today,
+        "due_today": due_today,
+        "done_today": done_today,
+        "streak_risk": risk,
+    }, index=pd.Index([int(h["id"]) for h in habits], name="habit_id"))
+    return {"days": days, "ids": table.index.to_numpy(), "hit": hit, "sched": sched, "p_by_wd": p_by_wd, "table": table}
+
+
+def daily_rates(result, habit_ids, start):
+    """Per-day and rolling 7-day completion % over the chosen habits from `start` on."""
+    rows = np.isin(result["ids"], list(habit_ids))
+    hit = result["hit"][rows].sum(axis=0, keepdims=True)
+    sched = result["sched"][rows].sum(axis=0, keepdims=True)
+    frame = pd.DataFrame({
+        "rate": _ratio(hit, sched)[0] * 100,
+        "rolling_7": _ratio(_rolling_sum(hit, 7), _rolling_sum(sched, 7))[0] * 100,
+    }, index=result["days"])
+    return frame[frame.index >= pd.Timestamp(start)]
+
+
+def forecast(result, habits, horizon=7):
+    """Expected completion % for each of the next `horizon` days over the given habits."""
+    pos = {hid: i for i, hid in enumerate(result["ids"])}
+    habits = [h for h in habits if int(h["id"]) in pos]
+    days = pd.date_range(result["days"][-1] + pd.Timedelta(days=1), periods=horizon, freq="D")
+    sched = scheduled_mask(habits, days)
+    p = result["p_by_wd"][[pos[int(h["id"])] for h in habits]][:, days.dayofweek.to_numpy()]
+    expected = np.nansum(np.where(sched, p, 0), axis=0)
+    known = (sched & ~np.isnan(p)).sum(axis=0)
+    return pd.Series(_ratio(expected, known) * 100, index=days, name="expected")